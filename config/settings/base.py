@@ -322,6 +322,10 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'veryusefulproject.currencies.tasks.update_crypto_currency_info',
         'schedule': crontab(hour="*", minute=0),
     },
+    'reconcileNotificationCounters': {
+        'task': 'veryusefulproject.notifications.tasks.reconcile_notification_counters',
+        'schedule': crontab(hour=4, minute=30),
+    },
 }
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-send-task-events
 CELERY_WORKER_SEND_TASK_EVENTS = True
@@ -426,3 +430,27 @@ SIMPLE_JWT = {
 
 DEFENDER_REDIS_URL = env('REDIS_URL')
 CENTRIFUGO_API_KEY = env('CENTRIFUGO_API_KEY')
+CENTRIFUGO_API_URL = env('CENTRIFUGO_API_URL', default="http://centrifugo:8000/api")
+# Number of keep-alive connections each process keeps open to the API of Centrifugo
+CENTRIFUGO_API_POOL_SIZE = env.int('CENTRIFUGO_API_POOL_SIZE', default=10)
+# Seconds to wait for Centrifugo to answer a single API request
+CENTRIFUGO_API_TIMEOUT = env.float('CENTRIFUGO_API_TIMEOUT', default=5)
+# Base URL of the parser service, which scrapes products and rates
+PARSER_URL = env('PARSER_URL', default="http://parser:3000")
+# Number of keep-alive connections each process keeps open to the parser
+PARSER_POOL_SIZE = env.int('PARSER_POOL_SIZE', default=10)
+# Times a failed request to the parser is retried, with exponential backoff
+PARSER_MAX_RETRIES = env.int('PARSER_MAX_RETRIES', default=3)
+# Seconds a request to the parser may take, retries included. Keep it below
+# CELERY_TASK_SOFT_TIME_LIMIT and PRODUCT_INFO_SCRAPE_TIMEOUT.
+PARSER_REQUEST_DEADLINE = env.float('PARSER_REQUEST_DEADLINE', default=45)
+# Relative change below which a newly scraped fiat rate isn't stored again
+FIAT_RATE_CHANGE_TOLERANCE = env.float('FIAT_RATE_CHANGE_TOLERANCE', default=0.0001)
+# Seconds the scraped information of a product is served from the cache
+PRODUCT_INFO_CACHE_TIMEOUT = env.int('PRODUCT_INFO_CACHE_TIMEOUT', default=600)
+# Seconds other requests wait for a running scrape of the same product before giving up
+PRODUCT_INFO_SCRAPE_TIMEOUT = env.int('PRODUCT_INFO_SCRAPE_TIMEOUT', default=90)
+# Milliseconds an exact count of a list may take before the planner's estimate is used
+COUNT_TIME_BUDGET = env.int('COUNT_TIME_BUDGET', default=100)
+# Seconds a count of a list is served from the cache at most
+COUNT_CACHE_TIMEOUT = env.int('COUNT_CACHE_TIMEOUT', default=300)
@@ -1,14 +1,43 @@
+import os
+
 import pytest
 
+from veryusefulproject.core.reference_data import clear_reference_tables
+from veryusefulproject.currencies.history import crypto_rate_history
 from veryusefulproject.users.models import User
 from veryusefulproject.users.tests.factories import UserFactory
 
 
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing benchmark, only run when BENCHMARK is set")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Timings only mean something on a quiet machine, so benchmarks are opt-in.
+    if os.environ.get("BENCHMARK"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run when BENCHMARK is set")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def reference_tables():
+    # Rows cached by one test would otherwise outlive its rolled-back transaction.
+    clear_reference_tables()
+    crypto_rate_history.clear()
+    yield
+    clear_reference_tables()
+    crypto_rate_history.clear()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -0,0 +1,209 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from json import dumps, loads
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CentrifugoPublisher:
+    """
+    Client for the server API of Centrifugo.
+
+    Every instance keeps a single requests session with a pool of keep-alive connections,
+    so consecutive publishes reuse the same TCP connection instead of opening a new one
+    per message.
+
+    Besides the blocking "publish", "broadcast" and "batch" methods, "enqueue" hands a
+    command to a background thread and returns immediately. The thread drains everything
+    that has piled up in the meantime and sends it to Centrifugo as one batch request,
+    so callers such as Celery tasks never wait on the realtime server.
+    """
+
+    def __init__(self, api_url, api_key, pool_size=10, timeout=5, max_batch_size=100):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._queue = None
+        self._worker = None
+
+    def _ensure_process_state(self):
+        """
+        Sessions, queues and threads don't survive a fork, and Celery forks its workers
+        after this module has been imported, so everything is created lazily per process.
+        """
+
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "Content-type": "application/json",
+                "Authorization": "apikey " + self.api_key
+            })
+
+            self._session = session
+            self._queue = queue.Queue()
+            self._worker = None
+            self._pid = os.getpid()
+
+    @property
+    def session(self):
+        self._ensure_process_state()
+        return self._session
+
+    def _post(self, body):
+        resp = self.session.post(self.api_url, data=body, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp
+
+    def send(self, command):
+        """
+        Sends a single command and returns the decoded reply of Centrifugo.
+        """
+
+        return self._post(dumps(command)).json()
+
+    def batch(self, commands):
+        """
+        Sends several commands in one HTTP request and returns a list of replies in the
+        same order. Centrifugo accepts newline-delimited commands in a single request body
+        and answers with newline-delimited replies.
+        """
+
+        if not commands:
+            return []
+
+        if len(commands) == 1:
+            return [self.send(commands[0])]
+
+        resp = self._post("\n".join(dumps(command) for command in commands))
+        return [loads(line) for line in resp.text.splitlines() if line.strip()]
+
+    def publish(self, channel, data):
+        return self.send(build_command("publish", data, channel))
+
+    def broadcast(self, channels, data):
+        """
+        Publishes the same data into many channels with a single command.
+        """
+
+        return self.send({
+            "method": "broadcast",
+            "params": {
+                "channels": list(channels),
+                "data": data
+            }
+        })
+
+    def enqueue(self, command):
+        """
+        Queues a command to be sent by the background thread, and returns without
+        waiting for Centrifugo.
+        """
+
+        self._ensure_process_state()
+        self._queue.put(command)
+
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._run,
+                        name="centrifugo-publisher",
+                        daemon=True
+                    )
+                    self._worker.start()
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every queued command has been handed to Centrifugo.
+        """
+
+        if self._pid != os.getpid() or self._queue is None:
+            return
+
+        if timeout is None:
+            self._queue.join()
+            return
+
+        # Queue.join() doesn't take a timeout, so wait on its condition manually.
+        with self._queue.all_tasks_done:
+            self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks, timeout=timeout
+            )
+
+    def _drain(self, first):
+        commands = [first]
+        while len(commands) < self.max_batch_size:
+            try:
+                commands.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return commands
+
+    def _run(self):
+        while True:
+            commands = self._drain(self._queue.get())
+            try:
+                self.batch(commands)
+            except Exception as e:
+                logger.warning("Failed to send %d command(s) to Centrifugo: %s", len(commands), e)
+            finally:
+                for _ in commands:
+                    self._queue.task_done()
+
+
+def build_command(method, data, channel):
+    return {
+        "method": method,
+        "params": {
+            "channel": channel,
+            "data": data
+        }
+    }
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """
+    Returns the publisher shared by the whole process, configured from the settings.
+    """
+
+    global _publisher
+
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = CentrifugoPublisher(
+                    settings.CENTRIFUGO_API_URL,
+                    settings.CENTRIFUGO_API_KEY,
+                    pool_size=settings.CENTRIFUGO_API_POOL_SIZE,
+                    timeout=settings.CENTRIFUGO_API_TIMEOUT,
+                )
+                atexit.register(_publisher.flush, settings.CENTRIFUGO_API_TIMEOUT)
+
+    return _publisher
@@ -0,0 +1,114 @@
+import json
+from functools import lru_cache
+from hashlib import blake2b
+from uuid import uuid4
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connections, transaction
+
+
+def version_key(model):
+    return f"counts:{model._meta.label_lower}:version"
+
+
+@lru_cache(maxsize=None)
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+
+
+def _models_of(queryset):
+    models_by_table = _models_by_table()
+    tables = {join.table_name for join in queryset.query.alias_map.values()}
+    tables.add(queryset.model._meta.db_table)
+
+    return sorted(
+        (models_by_table[table] for table in tables if table in models_by_table),
+        key=lambda model: model._meta.label_lower
+    )
+
+
+def _versions(models):
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def invalidate_counts(model, using=None):
+    """
+    Makes every cached count of a query that reads the table of "model" stale, once the
+    current transaction has been committed.
+    """
+
+    transaction.on_commit(lambda: cache.set(version_key(model), uuid4().hex, timeout=None), using=using)
+
+
+def _exact_count(queryset, budget):
+    """
+    Counts the rows of "queryset", or returns None if that takes longer than "budget"
+    milliseconds. Only PostgreSQL can stop a query that runs over its budget.
+    """
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or not budget:
+        return queryset.count()
+
+    # Under ATOMIC_REQUESTS this is only a savepoint, and releasing it would leave the
+    # timeout in place for the rest of the request, so the previous one is put back. A
+    # count that runs over the budget rolls the savepoint back, and the timeout with it.
+    try:
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            previous = cursor.fetchone()[0]
+            cursor.execute("SET LOCAL statement_timeout TO %s", [int(budget)])
+            count = queryset.count()
+            cursor.execute("SET LOCAL statement_timeout TO %s", [previous])
+            return count
+    except OperationalError:
+        return None
+
+
+def _estimated_count(queryset):
+    """
+    Returns the number of rows the query planner expects "queryset" to have.
+    """
+
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(queryset, budget=None, timeout=None):
+    """
+    Returns the number of rows of "queryset", and whether that number is only an
+    estimate.
+
+    Counts are cached by the query and the versions of the tables it reads, which are
+    replaced by "invalidate_counts" from the signals of the models whose lists are
+    counted. An exact count is given up on after "budget" milliseconds, in which case the
+    estimate of the query planner is given instead. Either is cached for "timeout"
+    seconds at most, since bulk updates don't send signals.
+    """
+
+    if budget is None:
+        budget = settings.COUNT_TIME_BUDGET
+    if timeout is None:
+        timeout = settings.COUNT_CACHE_TIMEOUT
+
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    fingerprint = repr((queryset.db, sql, params, _versions(_models_of(queryset))))
+    key = f"counts:{queryset.model._meta.label_lower}:" + blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+
+    result = cache.get(key)
+    if result is None:
+        count = _exact_count(queryset, budget)
+        result = (count, False) if count is not None else (_estimated_count(queryset), True)
+        cache.set(key, result, timeout)
+
+    return result
@@ -0,0 +1,170 @@
+"""
+Local stand-ins for the HTTP services the backend talks to, for tests and benchmarks
+that shouldn't depend on the containers of docker compose.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+
+
+class _FakeServer:
+    handler_class = None
+
+    def __init__(self):
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def record(self, handler, body):
+        with self._lock:
+            self.connections.add(handler.client_address)
+            self.requests.append(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive, so pooled clients can be told apart from ones
+    # that open a new connection per request.
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which stalls keep-alive clients on
+    # delayed ACKs unless Nagle's algorithm is off.
+    disable_nagle_algorithm = True
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length).decode("utf-8")
+
+    def reply(self, status, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _CentrifugoHandler(_JSONHandler):
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.read_body()
+
+        if self.headers.get("Authorization") != f"apikey {fake.api_key}":
+            self.reply(401, "")
+            return
+
+        commands = [loads(line) for line in body.splitlines() if line.strip()]
+        fake.record(self, commands)
+        self.reply(200, "\n".join(dumps({"result": {}}) for _ in commands))
+
+
+class FakeCentrifugoServer(_FakeServer):
+    """
+    Accepts the server API commands of Centrifugo, including newline-delimited batches,
+    and records every request as the list of commands it carried.
+    """
+
+    handler_class = _CentrifugoHandler
+
+    def __init__(self, api_key="test-api-key"):
+        self.api_key = api_key
+        super().__init__()
+
+    @property
+    def api_url(self):
+        return f"{self.url}/api"
+
+    @property
+    def commands(self):
+        with self._lock:
+            return [command for request in self.requests for command in request]
+
+
+class _ParserHandler(_JSONHandler):
+    def handle_route(self):
+        fake = self.server.fake
+        body = self.read_body()
+        fake.record(self, (self.command, self.path, loads(body) if body else None))
+
+        reply = fake.next_reply(self.command, self.path)
+        if reply is None:
+            self.reply(404, dumps({"reason": "Not found"}))
+            return
+
+        fake.enter()
+        try:
+            if reply.get("delay"):
+                time.sleep(reply["delay"])
+
+            self.reply(reply.get("status", 200), dumps(reply.get("body")))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            fake.leave()
+
+    do_GET = handle_route
+    do_POST = handle_route
+
+
+class FakeParserServer(_FakeServer):
+    """
+    Answers like the parser service with scripted replies. Every reply is a dict with
+    the "body" to send as JSON, and optionally a "status" code and a "delay" in seconds.
+    The replies of a route are used in order, and the last one is repeated. The most
+    requests answered at the same time is kept in "max_in_flight".
+    """
+
+    handler_class = _ParserHandler
+    BUSY = {"body": {"status": "-1", "reason": "Too many connections right now. Please try again later."}}
+
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        super().__init__()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def script(self, method, path, *replies):
+        with self._lock:
+            self.routes[(method, path)] = list(replies)
+
+    def next_reply(self, method, path):
+        with self._lock:
+            replies = self.routes.get((method, path))
+            if not replies:
+                return None
+            return replies.pop(0) if len(replies) > 1 else replies[0]
@@ -0,0 +1,50 @@
+import time
+from json import dumps
+
+import requests
+from django.core.management.base import BaseCommand
+
+from veryusefulproject.core.centrifugo import CentrifugoPublisher, build_command
+from veryusefulproject.core.fakes import FakeCentrifugoServer
+
+
+class Command(BaseCommand):
+    help = "Measures publishes per second against a local stand-in Centrifugo server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=2000)
+
+    def report(self, name, count, elapsed):
+        self.stdout.write(f"{name:<32}{count / elapsed:>12.0f} publishes/sec")
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        commands = [build_command("publish", {"current_status": "1"}, "user#user") for _ in range(count)]
+
+        with FakeCentrifugoServer() as server:
+            headers = {"Content-type": "application/json", "Authorization": "apikey " + server.api_key}
+
+            # The way messages were sent before: a new connection for every publish.
+            start = time.perf_counter()
+            for command in commands:
+                requests.post(server.api_url, data=dumps(command), headers=headers).json()
+            self.report("requests.post per message", count, time.perf_counter() - start)
+
+            publisher = CentrifugoPublisher(server.api_url, server.api_key)
+            start = time.perf_counter()
+            for command in commands:
+                publisher.send(command)
+            self.report("pooled session", count, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for offset in range(0, count, publisher.max_batch_size):
+                publisher.batch(commands[offset:offset + publisher.max_batch_size])
+            self.report("pooled session, batched", count, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for command in commands:
+                publisher.enqueue(command)
+            enqueued = time.perf_counter() - start
+            publisher.flush()
+            self.report("enqueue (caller side)", count, enqueued)
+            self.report("enqueue (until delivered)", count, time.perf_counter() - start)
@@ -1,31 +1,77 @@
+from copy import deepcopy
+
 from rest_framework.exceptions import NotFound
 
+# Pruned field maps by (serializer class, fields, fields_exclude), shared by the process.
+_field_plans = {}
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, dict):
+        # Contexts are passed on as they are, so the same object means the same context.
+        return id(value)
+
+    return value
+
+
 class DynamicFieldsSerializerMixin(object):
+    """
+    Lets a serializer be limited to the fields named in "fields", minus the ones named in
+    "fields_exclude".
+
+    The pruned field map of every combination is built once per process and copied for
+    every instance, instead of building all fields and dropping most of them each time.
+    Nested serializers made through "serialize_nested" are kept and reused for every
+    object the serializer handles.
+    """
+
     def __init__(self, *args, **kwargs):
         # Don't pass the 'fields' arg up to the superclass
-        fields = kwargs.pop('fields', None)
-        fields_exclude = kwargs.pop("fields_exclude", None)
-
-        allowed = None
-        excluded = None
+        self._fields_allowed = kwargs.pop('fields', None)
+        self._fields_excluded = kwargs.pop("fields_exclude", None)
 
         # Instantiate the superclass normally
         super(DynamicFieldsSerializerMixin, self).__init__(*args, **kwargs)
 
-        existing = set(self.fields.keys())
+    def get_fields(self):
+        key = (type(self), _freeze(self._fields_allowed), _freeze(self._fields_excluded))
+        plan = _field_plans.get(key)
+        if plan is None:
+            plan = _field_plans[key] = self._prune_fields(super(DynamicFieldsSerializerMixin, self).get_fields())
 
-        if fields_exclude is not None:
-            excluded = set(fields_exclude)
-            for field_name in excluded.intersection(existing):
-                self.fields.pop(field_name)
+        return deepcopy(plan)
 
-        if fields is not None:
-            allowed = set(fields)
-            if excluded is not None:
-                allowed.difference_update(excluded)
-            # Drop any fields that are not specified in the `fields` argument.
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+    def _prune_fields(self, fields):
+        excluded = set(self._fields_excluded) if self._fields_excluded is not None else set()
+        allowed = set(self._fields_allowed) - excluded if self._fields_allowed is not None else None
+
+        return {
+            field_name: field
+            for field_name, field in fields.items()
+            if field_name not in excluded and (allowed is None or field_name in allowed)
+        }
+
+    def serialize_nested(self, serializer_class, instance, many=False, **kwargs):
+        """
+        Serializes "instance" with a serializer made once per combination of arguments and
+        kept for every other object this serializer handles, such as the other rows of a
+        page.
+        """
+
+        if instance is None and not many:
+            return serializer_class(instance, **kwargs).data
+
+        if not hasattr(self, "_nested_serializers"):
+            self._nested_serializers = {}
+
+        key = (serializer_class, many, tuple(sorted((name, _freeze(value)) for name, value in kwargs.items())))
+        serializer = self._nested_serializers.get(key)
+        if serializer is None:
+            serializer = self._nested_serializers[key] = serializer_class(many=many, **kwargs)
+
+        return serializer.to_representation(instance)
 
 
 class PaginationHandlerMixin(object):
@@ -42,9 +88,14 @@ class PaginationHandlerMixin(object):
     def paginate_queryset(self, queryset):
         if self.paginator is None:
             return None
-        pageNumber = self.request.query_params.get("page", "")
-        if (int(pageNumber)) > 1000:
-            return None
+
+        # Deep pages of page number paginators are refused. Keyset paginators cost the same
+        # on every page, and have no page numbers anyway.
+        page_query_param = getattr(self.paginator, "page_query_param", None)
+        if page_query_param:
+            pageNumber = self.request.query_params.get(page_query_param, "")
+            if pageNumber.isdigit() and int(pageNumber) > 1000:
+                return None
         return self.paginator.paginate_queryset(queryset, self.request, view=self)
 
     def get_paginated_response(self, data):
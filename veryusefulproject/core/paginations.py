@@ -1,53 +1,38 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 from django.core.paginator import Paginator
-from django.db import connection, transaction
-from django.db.utils import OperationalError
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counts import count_rows
 
 
 class LargeTablePaginator(Paginator):
     """
-    Combination of ideas from:
-    - https://gist.github.com/safar/3bbf96678f3e479b6cb683083d35cb4d
-    - https://medium.com/@hakibenita/optimizing-django-admin-paginator-53c4eb6bfca3
-
-    Overrides the count method of QuerySet objects to avoid timeouts.
-    - Try to get the real count limiting the queryset execution time to 150 ms.
-    - If count takes longer than 150 ms the database kills the query and raises OperationError. In that case,
-    get an estimate instead of actual count when not filtered (this estimate can be stale and hence not fit for
-    situations where the count of objects actually matter).
-    - If any other exception occured fall back to default behaviour.
+    Counts the objects of every page with the count service, which caches counts and
+    falls back to the estimate of the query planner when an exact count would take too
+    long. Whether the count is an estimate is kept in "approximate".
     """
 
+    approximate = False
+
     @cached_property
     def count(self):
         """
-        Returns an estimated number of objects, across all pages.
+        Returns the number of objects, across all pages, which might be an estimate.
         """
-        try:
-            with transaction.atomic(), connection.cursor() as cursor:
-                # Limit to 150 ms
-                cursor.execute('SET LOCAL statement_timeout TO 100;')
-                return super().count
-        except OperationalError:
-            pass
-
-        if not self.object_list.query.where:
-            try:
-                with transaction.atomic(), connection.cursor() as cursor:
-                    # Obtain estimated values (only valid with PostgreSQL)
-                    cursor.execute(
-                        "SELECT reltuples FROM pg_class WHERE relname = %s",
-                        [self.object_list.query.model._meta.db_table]
-                    )
-                    estimate = int(cursor.fetchone()[0])
-                    return estimate
-            except Exception:
-                # If any other exception occurred fall back to default behaviour
-                pass
-        return super().count
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+
+        count, self.approximate = count_rows(self.object_list)
+        return count
 
 
 class BasicPagination(PageNumberPagination):
@@ -56,8 +41,137 @@ class BasicPagination(PageNumberPagination):
     def get_paginated_response(self, data):
         return Response({
             'count': self.page.paginator.count,
+            'approximate': self.page.paginator.approximate,
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'results': data,
             'page_range': list(self.page.paginator.page_range)
         })
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates from newest to oldest by (created_at, id), with a cursor that holds the
+    position of the first or last row of the page instead of a page number. A page is
+    fetched by filtering on that position rather than by skipping the rows before it
+    with OFFSET, so every page costs the same as the first one.
+
+    Counting every row of a list costs more than a page of it, so the count is only
+    given when it is asked for with "?count=1", and then comes from the count service.
+
+    Pages can be rows made by "values()", as long as they have the key fields.
+    """
+
+    page_size = 20
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    key_fields = ("created_at", "id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset = queryset
+
+        position, backwards = self.decode_cursor(request)
+        created_at, id = self.key_fields
+        if backwards:
+            queryset = queryset.order_by(created_at, id)
+        else:
+            queryset = queryset.order_by(f"-{created_at}", f"-{id}")
+
+        if position is not None:
+            queryset = queryset.filter(self.beyond(position, backwards))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def beyond(self, position, backwards):
+        created_at, id = self.key_fields
+        lookup = "gt" if backwards else "lt"
+        return Q(**{f"{created_at}__{lookup}": position[0]}) | Q(
+            **{created_at: position[0], f"{id}__{lookup}": position[1]}
+        )
+
+    def position_of(self, row):
+        if isinstance(row, dict):
+            return tuple(row[field] for field in self.key_fields)
+
+        return tuple(getattr(row, field) for field in self.key_fields)
+
+    def encode_cursor(self, row, backwards):
+        created_at, id = self.position_of(row)
+        cursor = json.dumps([created_at.isoformat(), id, int(backwards)], separators=(",", ":"))
+        return urlsafe_b64encode(cursor.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Cursors come from clients, so anything but what encode_cursor makes is rejected.
+        if not isinstance(cursor, list) or len(cursor) != 3:
+            raise NotFound(self.invalid_cursor_message)
+
+        created_at, id, backwards = cursor
+        if not isinstance(created_at, str) or type(id) is not int or backwards not in (0, 1):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            created_at = parse_datetime(created_at)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return (created_at, id), bool(backwards)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1], False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], True))
+
+    def get_count(self):
+        """
+        Returns the number of rows of every page, and whether it is an estimate.
+        """
+
+        return count_rows(self.queryset)
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.request.query_params.get(self.count_query_param) in ("1", "true"):
+            response['count'], response['approximate'] = self.get_count()
+
+        return Response(response)
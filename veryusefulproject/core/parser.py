@@ -0,0 +1,281 @@
+import logging
+import os
+import random
+import threading
+import time
+from typing import NamedTuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class ParserError(Exception):
+    """
+    The parser failed to answer a request, even after retrying it.
+    """
+
+
+class ParserBusy(ParserError):
+    """
+    The parser has too many pages open and asked us to try again later.
+    """
+
+
+class ParserUnavailable(ParserError):
+    """
+    The parser has failed too often lately, so requests aren't even sent to it.
+    """
+
+
+class Endpoint(NamedTuple):
+    method: str
+    path: str
+    # Seconds to wait for a connection, and for the response once connected
+    timeout: tuple
+
+
+ENDPOINTS = {
+    "product": Endpoint("POST", "/", (3, 45)),
+    "currencies": Endpoint("GET", "/getCurrencyData/", (3, 45)),
+    "cryptocurrency": Endpoint("POST", "/getCryptoCurrencyData/", (3, 30)),
+}
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a failing service for "reset_timeout" seconds once
+    "failure_threshold" requests in a row have failed. After that, a single trial
+    request is let through, which closes the circuit again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LatencyStats:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.busy = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed, outcome):
+        self.requests += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        if outcome == "failure":
+            self.failures += 1
+        elif outcome == "busy":
+            self.busy += 1
+
+    @property
+    def average(self):
+        return self.total / self.requests if self.requests else 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "busy": self.busy,
+            "average": self.average,
+            "max": self.max,
+        }
+
+
+class ParserClient:
+    """
+    Client for the internal parser service, which scrapes products and rates with a
+    headless browser.
+
+    Requests go through a pooled session with a timeout per endpoint. Failed requests
+    are retried with exponential backoff and jitter, and a response with "status": "-1",
+    which the parser sends when it has too many pages open, is treated as a request to
+    back off rather than as a failure. A circuit breaker stops calling the parser for a
+    while once it keeps failing, so that workers aren't tied up by a parser that is down.
+    Latency and outcome counts are kept per endpoint in "metrics".
+
+    A request, retries and backoff included, never takes much longer than "deadline"
+    seconds: the read timeout of every attempt is cut to the time left, and no attempt
+    is started, nor slept for, once too little time is left for it to connect.
+    """
+
+    def __init__(self, base_url, pool_size=10, max_retries=3, backoff=0.5, max_backoff=8,
+                 failure_threshold=5, reset_timeout=30, endpoints=None, deadline=45):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.endpoints = endpoints or ENDPOINTS
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = {name: LatencyStats() for name in self.endpoints}
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+
+    @property
+    def session(self):
+        # Sessions don't survive the fork of Celery workers, so they are made per process.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+
+        return self._session
+
+    def _backoff_delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _send(self, endpoint, payload, timeout):
+        resp = self.session.request(
+            endpoint.method,
+            self.base_url + endpoint.path,
+            json=payload,
+            timeout=timeout
+        )
+        if resp.status_code >= 500:
+            raise ParserError(f"The parser responded with {resp.status_code}")
+        resp.raise_for_status()
+
+        data = resp.json()
+        if isinstance(data, dict) and data.get("status") == "-1":
+            raise ParserBusy(data.get("reason", "The parser is busy."))
+
+        return data
+
+    def request(self, name, payload=None):
+        """
+        Sends a request to one of the endpoints of the parser, and returns the decoded
+        response.
+        """
+
+        endpoint = self.endpoints[name]
+        stats = self.metrics[name]
+        error = None
+
+        connect_timeout, read_timeout = endpoint.timeout
+        deadline = time.monotonic() + self.deadline
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self._backoff_delay(attempt - 1)
+                if deadline - time.monotonic() - delay <= connect_timeout:
+                    break
+                time.sleep(delay)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= connect_timeout:
+                break
+
+            if not self.breaker.allow():
+                raise ParserUnavailable("The parser is failing, so it isn't being called for now.")
+
+            timeout = (connect_timeout, min(read_timeout, remaining - connect_timeout))
+            start = time.perf_counter()
+            try:
+                data = self._send(endpoint, payload, timeout)
+            except ParserBusy as e:
+                # The parser is up but saturated, so give it time without tripping the breaker.
+                stats.record(time.perf_counter() - start, "busy")
+                self.breaker.record_success()
+                error = e
+                continue
+            except (requests.ConnectionError, requests.Timeout, ParserError, ValueError) as e:
+                stats.record(time.perf_counter() - start, "failure")
+                self.breaker.record_failure()
+                logger.warning("Request to the parser at %s failed: %s", endpoint.path, e)
+                error = e
+                continue
+            except requests.HTTPError as e:
+                # Client errors won't go away by retrying.
+                stats.record(time.perf_counter() - start, "failure")
+                raise ParserError(str(e)) from e
+
+            stats.record(time.perf_counter() - start, "success")
+            self.breaker.record_success()
+            return data
+
+        if error is None:
+            raise ParserError(f"No time was left to send a request to the parser at {endpoint.path}")
+        if isinstance(error, ParserError):
+            raise error
+        raise ParserError(str(error)) from error
+
+    def get_product_info(self, url):
+        return self.request("product", {"url": url})
+
+    def get_currency_data(self):
+        return self.request("currencies")
+
+    def get_crypto_currency_data(self, name, ticker):
+        return self.request("cryptocurrency", {"name": name, "ticker": ticker})
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_parser_client():
+    """
+    Returns the parser client shared by the whole process, configured from the settings.
+    """
+
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ParserClient(
+                    settings.PARSER_URL,
+                    pool_size=settings.PARSER_POOL_SIZE,
+                    max_retries=settings.PARSER_MAX_RETRIES,
+                    deadline=settings.PARSER_REQUEST_DEADLINE,
+                )
+
+    return _client
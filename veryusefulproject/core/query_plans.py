@@ -0,0 +1,49 @@
+import json
+
+from django.db import connections, transaction
+
+
+def supports_plans(using="default"):
+    return connections[using].vendor == "postgresql"
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def explain(queryset):
+    """
+    Returns every node of the plan PostgreSQL chooses for "queryset", with sequential scans
+    turned off as far as the planner can avoid them. Test tables are so small that a
+    sequential scan is always the cheapest, so a sequential scan left in such a plan
+    means that no index can serve the query at all.
+    """
+
+    with transaction.atomic(using=queryset.db), connections[queryset.db].cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = json.loads(queryset.explain(format="json"))
+
+    return list(_nodes(plan[0]["Plan"]))
+
+
+def sequential_scans(queryset):
+    """
+    Returns the names of the tables "queryset" can only read with a sequential scan.
+    """
+
+    return sorted({node["Relation Name"] for node in explain(queryset) if node["Node Type"] == "Seq Scan"})
+
+
+def assert_uses_indexes(queryset, tables=None):
+    """
+    Fails when "queryset" reads any of "tables", or any table at all if "tables" is None,
+    with a sequential scan.
+    """
+
+    scans = sequential_scans(queryset)
+    if tables is not None:
+        scans = [table for table in scans if table in tables]
+
+    assert not scans, f"Sequential scans of {', '.join(scans)} in:\n{queryset.query}"
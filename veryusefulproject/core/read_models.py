@@ -0,0 +1,250 @@
+from types import SimpleNamespace
+
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework import serializers
+from rest_framework.fields import ModelField
+
+
+class Column:
+    """
+    A column of the row. It is formatted the way a ModelSerializer formats its model
+    field, unless "raw" is set, in which case the value is passed on as it is. Columns
+    that are relations give the primary key of the related row, like a
+    PrimaryKeyRelatedField does.
+    """
+
+    def __init__(self, path, raw=False):
+        self.path = path
+        self.raw = raw
+
+
+class Group:
+    """
+    A dict of fields of the same row, or of the row joined through "relation". It is
+    None when there is no such row, like the SerializerMethodFields that check for a
+    reverse one-to-one link before serializing it.
+    """
+
+    def __init__(self, fields, relation=None):
+        self.fields = fields
+        self.relation = relation
+
+
+class Related:
+    """
+    A list with a dict for every row of a one-to-many or many-to-many relation. The rows
+    are fetched with one query for the whole page, not one for every row of it.
+    """
+
+    def __init__(self, relation, fields):
+        self.relation = relation
+        self.fields = fields
+
+
+class Computed:
+    """
+    Values worked out for every row of the page at once, for anything that isn't a
+    column. "build" receives a dict of "columns" for every row, and returns a value for
+    every row, or a tuple of values if the Computed is put under a tuple of names.
+    """
+
+    def __init__(self, build, columns=()):
+        self.build = build
+        self.columns = tuple(columns)
+
+
+def _join(*parts):
+    return LOOKUP_SEP.join(part for part in parts if part)
+
+
+def _resolve(model, path):
+    """
+    Returns the model field at the end of "path", and the model it belongs to.
+    """
+
+    field = None
+    for name in path.split(LOOKUP_SEP):
+        if field is not None:
+            model = field.related_model
+        field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+    return field, model
+
+
+def _formatter(model_field):
+    if model_field.is_relation:
+        return None
+
+    field_class, field_kwargs = serializers.ModelSerializer().build_standard_field(model_field.name, model_field)
+    field = field_class(**field_kwargs)
+    if isinstance(field, ModelField):
+        # Model fields without a serializer field of their own are formatted from the instance.
+        attname = model_field.attname
+        return lambda value: field.to_representation(SimpleNamespace(**{attname: value}))
+
+    return field.to_representation
+
+
+class _ColumnNode:
+    def __init__(self, model, prefix, column):
+        self.key = _join(prefix, column.path)
+        self.format = None if column.raw else _formatter(_resolve(model, column.path)[0])
+
+    def columns(self):
+        return [self.key]
+
+    def render(self, rows):
+        key, format = self.key, self.format
+        if format is None:
+            return [row[key] for row in rows]
+
+        return [None if row[key] is None else format(row[key]) for row in rows]
+
+
+class _ComputedNode:
+    def __init__(self, model, prefix, computed):
+        self.build = computed.build
+        self.keys = [(name, _join(prefix, name)) for name in computed.columns]
+
+    def columns(self):
+        return [key for name, key in self.keys]
+
+    def render(self, rows):
+        return list(self.build([{name: row[key] for name, key in self.keys} for row in rows]))
+
+
+class _GroupNode:
+    def __init__(self, model, prefix, fields, relation=None):
+        self.present_key = None
+        if relation:
+            model = _resolve(model, relation)[0].related_model
+            prefix = _join(prefix, relation)
+            self.present_key = _join(prefix, "pk")
+
+        self.children = [(name, _compile(model, prefix, field)) for name, field in fields.items()]
+
+    def columns(self):
+        columns = [self.present_key] if self.present_key else []
+        for name, child in self.children:
+            columns.extend(child.columns())
+
+        return columns
+
+    def render(self, rows):
+        count = len(rows)
+        if self.present_key:
+            present = [index for index, row in enumerate(rows) if row[self.present_key] is not None]
+            rows = [rows[index] for index in present]
+
+        data = [{} for row in rows]
+        for name, child in self.children:
+            values = child.render(rows)
+            if isinstance(name, tuple):
+                for item, value in zip(data, values):
+                    item.update(zip(name, value))
+            else:
+                for item, value in zip(data, values):
+                    item[name] = value
+
+        if self.present_key is None:
+            return data
+
+        result = [None] * count
+        for index, item in zip(present, data):
+            result[index] = item
+        return result
+
+
+class _RelatedNode:
+    def __init__(self, model, prefix, related):
+        field = model._meta.get_field(related.relation)
+        self.model = field.related_model
+        if field.many_to_many and not field.auto_created:
+            self.lookup = field.related_query_name()
+        else:
+            self.lookup = field.field.name
+
+        self.parent_key = _join(prefix, "pk")
+        self.child = _GroupNode(self.model, "", related.fields)
+        self.ordering = self.model._meta.ordering or ["pk"]
+
+    def columns(self):
+        return [self.parent_key]
+
+    def render(self, rows):
+        parent_ids = {row[self.parent_key] for row in rows} - {None}
+        by_parent = {parent_id: [] for parent_id in parent_ids}
+        if parent_ids:
+            related_rows = list(
+                self.model._default_manager.filter(**{f"{self.lookup}__in": parent_ids})
+                .order_by(*self.ordering)
+                .values(*dict.fromkeys([self.lookup, *self.child.columns()]))
+            )
+            for related_row, item in zip(related_rows, self.child.render(related_rows)):
+                by_parent[related_row[self.lookup]].append(item)
+
+        return [by_parent.get(row[self.parent_key], []) for row in rows]
+
+
+def _compile(model, prefix, field):
+    if isinstance(field, str):
+        field = Column(field)
+
+    if isinstance(field, Column):
+        return _ColumnNode(model, prefix, field)
+    if isinstance(field, Computed):
+        return _ComputedNode(model, prefix, field)
+    if isinstance(field, Group):
+        return _GroupNode(model, prefix, field.fields, field.relation)
+    if isinstance(field, Related):
+        return _RelatedNode(model, prefix, field)
+
+    raise TypeError(f"{field!r} is not a read model field.")
+
+
+class ReadModel:
+    """
+    Read-only projection of a model to plain dicts, for listings that only show a few
+    columns of every row.
+
+    The fields are declared as a dict of output names to columns ("status__step"),
+    groups of fields, related rows and computed values. The projection selects only
+    those columns with "values()", fetches every relation of the page with one more
+    query, and builds the dicts directly, without making model instances or running
+    the fields of a serializer for every row. Values are formatted the way the
+    ModelSerializer of the model would format them, so that a ReadModel can stand in for
+    a serializer without changing the response.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self._root = None
+
+    @property
+    def root(self):
+        if self._root is None:
+            self._root = _GroupNode(self.model, "", self.fields)
+
+        return self._root
+
+    def only(self, *names):
+        """
+        Returns a read model limited to the fields named in "names".
+        """
+
+        return ReadModel(self.model, {name: field for name, field in self.fields.items() if name in names})
+
+    def values(self, queryset, *columns):
+        """
+        Returns "queryset" as rows of the columns needed by "render", and of "columns",
+        such as the ones a paginator needs.
+        """
+
+        return queryset.values(*dict.fromkeys([*self.root.columns(), *columns]))
+
+    def render(self, rows):
+        return self.root.render(list(rows))
+
+    def serialize(self, queryset):
+        return self.render(self.values(queryset))
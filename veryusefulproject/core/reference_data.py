@@ -0,0 +1,141 @@
+import threading
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+_tables = []
+
+
+class ReferenceTable:
+    """
+    In-process copy of a small table that hardly ever changes, such as currencies or
+    order statuses, keyed by one of its fields.
+
+    The rows are loaded with a single query the first time they are needed and are then
+    served from memory. Every table has a version stored in the cache (Redis), which is
+    replaced whenever a row is saved or deleted in any process. Each process compares
+    its own version against it at most once every "check_interval" seconds, and reloads
+    the rows when they differ.
+
+    Rows are shared by every thread of a process, so they must be treated as read-only.
+    """
+
+    def __init__(self, model, key, queryset=None, check_interval=5):
+        self.model = model
+        self.key = key
+        self.queryset = queryset
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._rows = None
+        self._version = None
+        self._checked_at = 0
+        self._uncommitted = False
+        self._derived = {}
+
+        _tables.append(self)
+
+    @property
+    def version_key(self):
+        return f"reference-data:{self.model._meta.label_lower}:version"
+
+    def _get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+
+        return self.model._default_manager.all()
+
+    def _shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid4().hex, timeout=None)
+            version = cache.get(self.version_key)
+
+        return version
+
+    def _load(self):
+        now = time.monotonic()
+        rows = self._rows
+        if rows is not None and now - self._checked_at < self.check_interval:
+            return rows
+
+        with self._lock:
+            if self._rows is not None and now - self._checked_at < self.check_interval:
+                return self._rows
+
+            if self._uncommitted and not transaction.get_connection().in_atomic_block:
+                # The transaction that changed the table is over, whichever way it ended.
+                self._uncommitted = False
+
+            version = self._shared_version()
+            if self._rows is None or version is None or version != self._version:
+                self._rows = {getattr(row, self.key): row for row in self._get_queryset()}
+                self._derived = {}
+                # Rows read before a change of this process is committed might be rolled
+                # back, so keep them only until the next check.
+                self._version = None if self._uncommitted else version
+
+            self._checked_at = now
+            return self._rows
+
+    def get(self, value):
+        """
+        Returns the row whose key field equals "value", and raises DoesNotExist of the
+        model otherwise, just like the "get" method of a manager does.
+        """
+
+        try:
+            return self._load()[value]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f"{self.model._meta.object_name} matching {self.key}={value!r} does not exist."
+            )
+
+    def all(self):
+        return list(self._load().values())
+
+    def derived(self, name, build):
+        """
+        Returns "build(rows)" for the current rows, such as an index over another field,
+        computing it again only after the rows have been reloaded.
+        """
+
+        rows = self._load()
+        derived = self._derived
+        if name not in derived:
+            derived[name] = build(list(rows.values()))
+
+        return derived[name]
+
+    def clear(self):
+        """
+        Drops the rows held by this process, without telling the other processes.
+        """
+
+        with self._lock:
+            self._rows = None
+            self._version = None
+            self._derived = {}
+
+    def invalidate(self, using=None):
+        """
+        Drops the rows held by this process right away, and makes every other process
+        reload them once the current transaction has been committed. Bumping the version
+        any earlier would let another process load the rows as they were before the
+        change and keep them under the new version.
+        """
+
+        self.clear()
+        self._uncommitted = True
+        transaction.on_commit(self._publish_version, using=using)
+
+    def _publish_version(self):
+        cache.set(self.version_key, uuid4().hex, timeout=None)
+        self._uncommitted = False
+
+
+def clear_reference_tables():
+    for table in _tables:
+        table.clear()
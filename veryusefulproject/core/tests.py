@@ -1,3 +1,460 @@
-from django.test import TestCase
+import json
+import time
+from base64 import urlsafe_b64encode
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from veryusefulproject.core import centrifugo as centrifugo_module
+from veryusefulproject.core import counts
+from veryusefulproject.core.centrifugo import CentrifugoPublisher, build_command
+from veryusefulproject.core.fakes import FakeCentrifugoServer, FakeParserServer
+from veryusefulproject.core.mixins import DynamicFieldsSerializerMixin, PaginationHandlerMixin
+from veryusefulproject.core.paginations import BasicPagination, KeysetPagination
+from veryusefulproject.core.parser import Endpoint, ParserBusy, ParserClient, ParserError, ParserUnavailable
+from veryusefulproject.core.query_plans import supports_plans
+from veryusefulproject.core.reference_data import ReferenceTable
+from veryusefulproject.core.utils import enqueue_command_payload_on_commit
+from veryusefulproject.currencies.models import FiatCurrency
+from veryusefulproject.orders.models import Order, OrderStatus
+
+
+@pytest.fixture
+def centrifugo():
+    with FakeCentrifugoServer() as server:
+        yield server
+
+
+@pytest.fixture
+def publisher(centrifugo):
+    return CentrifugoPublisher(centrifugo.api_url, centrifugo.api_key)
+
+
+@pytest.fixture
+def shared_publisher(publisher, monkeypatch):
+    monkeypatch.setattr(centrifugo_module, "_publisher", publisher)
+    return publisher
+
+
+class TestCentrifugoPublisher:
+    def test_publish(self, centrifugo, publisher):
+        assert publisher.publish("user#user", {"current_status": "1"}) == {"result": {}}
+        assert centrifugo.commands == [build_command("publish", {"current_status": "1"}, "user#user")]
+
+    def test_connection_is_reused(self, centrifugo, publisher):
+        for step in range(5):
+            publisher.publish("user#user", {"current_status": str(step)})
+
+        assert len(centrifugo.requests) == 5
+        assert len(centrifugo.connections) == 1
+
+    def test_batch_is_one_request(self, centrifugo, publisher):
+        commands = [build_command("publish", {"n": n}, "user#user") for n in range(10)]
+
+        replies = publisher.batch(commands)
+
+        assert len(replies) == 10
+        assert len(centrifugo.requests) == 1
+        assert centrifugo.commands == commands
+
+    def test_broadcast(self, centrifugo, publisher):
+        publisher.broadcast(["a#a", "b#b"], {"x": 1})
+
+        assert centrifugo.commands == [
+            {"method": "broadcast", "params": {"channels": ["a#a", "b#b"], "data": {"x": 1}}}
+        ]
+
+    def test_enqueue_is_coalesced(self, centrifugo, publisher):
+        commands = [build_command("publish", {"n": n}, "user#user") for n in range(50)]
+        for command in commands:
+            publisher.enqueue(command)
+
+        publisher.flush(timeout=5)
+
+        assert centrifugo.commands == commands
+        assert len(centrifugo.requests) < len(commands)
+
+    def test_enqueue_survives_server_errors(self, centrifugo):
+        publisher = CentrifugoPublisher(centrifugo.api_url, "wrong-key")
+
+        publisher.enqueue(build_command("publish", {}, "user#user"))
+        publisher.flush(timeout=5)
+
+        assert centrifugo.commands == []
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEnqueueOnCommit:
+    def test_delivered_after_commit(self, centrifugo, shared_publisher):
+        with transaction.atomic():
+            enqueue_command_payload_on_commit("publish", {"current_status": "1"}, "user#user")
+            enqueue_command_payload_on_commit("publish", {"current_status": "2"}, "user#user")
+            shared_publisher.flush(timeout=5)
+            assert centrifugo.commands == []
+
+        shared_publisher.flush(timeout=5)
+        assert [command["params"]["data"] for command in centrifugo.commands] == [
+            {"current_status": "1"},
+            {"current_status": "2"},
+        ]
+
+    def test_dropped_on_rollback(self, centrifugo, shared_publisher):
+        with transaction.atomic():
+            enqueue_command_payload_on_commit("publish", {"current_status": "1"}, "user#user")
+            with transaction.atomic():
+                enqueue_command_payload_on_commit("publish", {"current_status": "2"}, "user#user")
+                transaction.set_rollback(True)
+
+        shared_publisher.flush(timeout=5)
+        assert [command["params"]["data"] for command in centrifugo.commands] == [{"current_status": "1"}]
+
+
+@pytest.mark.django_db
+class TestReferenceTable:
+    @pytest.fixture
+    def table(self):
+        return ReferenceTable(FiatCurrency, "ticker")
+
+    def test_get_is_served_from_memory(self, table, django_assert_num_queries):
+        FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+        table.get("USD")
+
+        with django_assert_num_queries(0):
+            assert table.get("USD").name == "Dollar"
+
+    def test_missing_row(self, table):
+        with pytest.raises(FiatCurrency.DoesNotExist):
+            table.get("USD")
+
+    def test_invalidate_reloads(self, table):
+        assert table.all() == []
+
+        FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+        table.invalidate()
+
+        assert table.get("USD").name == "Dollar"
+
+    def test_version_change_of_another_process_reloads(self, table):
+        currency = FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+        table.check_interval = 0
+        table.get("USD")
+
+        FiatCurrency.objects.filter(ticker="USD").update(name="US Dollar")
+        table._publish_version()
+
+        assert table.get("USD").name == "US Dollar"
+        assert currency.name == "Dollar"
+
+
+@pytest.fixture
+def parser():
+    with FakeParserServer() as server:
+        yield server
+
+
+@pytest.fixture
+def parser_client(parser):
+    return ParserClient(parser.url, max_retries=3, backoff=0.01, failure_threshold=3, reset_timeout=60)
+
+
+PRODUCT = {"body": {"productName": "Item", "price": "$19.99", "options": {}}}
+
+
+class TestParserClient:
+    def test_get_product_info(self, parser, parser_client):
+        parser.script("POST", "/", PRODUCT)
+
+        assert parser_client.get_product_info("https://www.amazon.com/dp/B012345678") == PRODUCT["body"]
+        assert parser.requests == [("POST", "/", {"url": "https://www.amazon.com/dp/B012345678"})]
+
+    def test_connection_is_reused(self, parser, parser_client):
+        parser.script("POST", "/getCryptoCurrencyData/", {"body": {"rate": "20000"}})
+
+        for _ in range(5):
+            parser_client.get_crypto_currency_data("Bitcoin", "BTC")
+
+        assert len(parser.connections) == 1
+
+    def test_server_errors_are_retried(self, parser, parser_client):
+        parser.script("POST", "/", {"status": 500, "body": {}}, {"status": 502, "body": {}}, PRODUCT)
+
+        assert parser_client.get_product_info("https://www.amazon.com/dp/B012345678") == PRODUCT["body"]
+        assert len(parser.requests) == 3
+        assert parser_client.metrics["product"].failures == 2
+
+    def test_busy_parser_is_backed_off(self, parser, parser_client):
+        parser.script("POST", "/", FakeParserServer.BUSY, FakeParserServer.BUSY, PRODUCT)
+
+        assert parser_client.get_product_info("https://www.amazon.com/dp/B012345678") == PRODUCT["body"]
+        assert parser_client.metrics["product"].busy == 2
+        assert not parser_client.breaker.is_open
+
+    def test_busy_after_every_retry(self, parser, parser_client):
+        parser.script("POST", "/", FakeParserServer.BUSY)
+
+        with pytest.raises(ParserBusy):
+            parser_client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        assert len(parser.requests) == 4
+
+    def test_client_errors_are_not_retried(self, parser, parser_client):
+        parser.script("POST", "/", {"status": 400, "body": {}})
+
+        with pytest.raises(ParserError):
+            parser_client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        assert len(parser.requests) == 1
+
+    def test_breaker_opens_after_repeated_failures(self, parser, parser_client):
+        parser.script("POST", "/", {"status": 500, "body": {}})
+
+        with pytest.raises(ParserUnavailable):
+            parser_client.get_product_info("https://www.amazon.com/dp/B012345678")
+        with pytest.raises(ParserUnavailable):
+            parser_client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        assert len(parser.requests) == 3
+
+    def test_timeout_is_a_failure(self, parser):
+        client = ParserClient(parser.url, max_retries=0, endpoints={"product": Endpoint("POST", "/", (1, 0.1))})
+        parser.script("POST", "/", {"delay": 0.5, "body": {}})
+
+        with pytest.raises(ParserError):
+            client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        assert client.metrics["product"].failures == 1
+
+    def test_retries_stop_at_the_deadline(self, parser):
+        client = ParserClient(
+            parser.url, max_retries=10, backoff=0.01, failure_threshold=100, deadline=1.5,
+            endpoints={"product": Endpoint("POST", "/", (0.5, 5))}
+        )
+        parser.script("POST", "/", {"delay": 0.4, "status": 500, "body": {}})
+
+        start = time.monotonic()
+        with pytest.raises(ParserError):
+            client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        # Attempts stop once less than the connect timeout is left
+        assert time.monotonic() - start < 1.5
+        assert 1 <= len(parser.requests) < 11
+
+    def test_read_timeout_is_cut_to_the_deadline(self, parser):
+        client = ParserClient(
+            parser.url, max_retries=0, deadline=0.8, endpoints={"product": Endpoint("POST", "/", (0.5, 5))}
+        )
+        parser.script("POST", "/", {"delay": 1, "body": {}})
+
+        start = time.monotonic()
+        with pytest.raises(ParserError):
+            client.get_product_info("https://www.amazon.com/dp/B012345678")
+
+        assert time.monotonic() - start < 0.8
+
+
+class ItemSerializer(DynamicFieldsSerializerMixin, serializers.Serializer):
+    name = serializers.CharField()
+    price = serializers.DecimalField(max_digits=5, decimal_places=2)
+    url = serializers.CharField()
+
+
+class TestDynamicFieldsSerializerMixin:
+    def test_fields_and_fields_exclude(self):
+        assert list(ItemSerializer(fields=["name", "url"]).fields) == ["name", "url"]
+        assert list(ItemSerializer(fields_exclude=["price"]).fields) == ["name", "url"]
+        assert list(ItemSerializer(fields=["name", "url"], fields_exclude=["url"]).fields) == ["name"]
+
+    def test_instances_get_fields_of_their_own(self):
+        first, second = ItemSerializer(fields=["name"]), ItemSerializer(fields=["name"])
+
+        assert first.fields["name"] is not second.fields["name"]
+        assert first.fields["name"].parent is first
+
+    def test_nested_serializer_is_reused(self):
+        parent = ItemSerializer()
+
+        assert parent.serialize_nested(ItemSerializer, {"name": "a", "price": 1, "url": "u"}, fields=["name"]) == {
+            "name": "a"
+        }
+        parent.serialize_nested(ItemSerializer, {"name": "b"}, fields=["name"])
+
+        assert len(parent._nested_serializers) == 1
+
+
+def make_request(**params):
+    return Request(APIRequestFactory().get("/orders/", params))
+
+
+def cursor_of(link):
+    return parse_qs(urlsplit(link).query)["cursor"][0]
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    @pytest.fixture
+    def orders(self):
+        status = OrderStatus.objects.create(name="finding-intermediary", step=1, desc="")
+        Order.objects.bulk_create([Order(status=status) for _ in range(25)])
+        # Ties on "created_at" are broken by "id".
+        Order.objects.filter(id__lte=Order.objects.order_by("id")[10].id).update(created_at=timezone.now())
+        return Order.objects.all()
+
+    @pytest.fixture
+    def paginator(self):
+        paginator = KeysetPagination()
+        paginator.page_size = 10
+        return paginator
+
+    def test_walks_every_row_once(self, orders, paginator, django_assert_num_queries):
+        seen = []
+        request = make_request()
+        while True:
+            with django_assert_num_queries(1):
+                page = paginator.paginate_queryset(orders, request)
+            seen.extend(order.id for order in page)
+
+            next_link = paginator.get_next_link()
+            if next_link is None:
+                break
+            request = make_request(cursor=cursor_of(next_link))
+
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        assert seen == expected
+
+    def test_previous_page(self, orders, paginator):
+        first = [order.id for order in paginator.paginate_queryset(orders, make_request())]
+        assert paginator.get_previous_link() is None
+
+        paginator.paginate_queryset(orders, make_request(cursor=cursor_of(paginator.get_next_link())))
+        previous = paginator.paginate_queryset(orders, make_request(cursor=cursor_of(paginator.get_previous_link())))
+
+        assert [order.id for order in previous] == first
+        assert paginator.get_previous_link() is None
+
+    def test_values_rows(self, orders, paginator):
+        page = paginator.paginate_queryset(orders.values("url_id", "created_at", "id"), make_request())
+
+        assert paginator.get_next_link()
+        assert len(page) == 10
+
+    @pytest.mark.parametrize("cursor", [
+        "not-a-cursor",
+        ["2024-01-01T00:00:00+00:00", "abc", 0],
+        ["2024-01-01T00:00:00+00:00", 1],
+        ["2024-01-01T00:00:00+00:00", 1, 0, 0],
+        {"a": 1, "b": 2, "c": 3},
+        [None, 1, 0],
+        ["2024-13-01T00:00:00+00:00", 1, 0],
+        ["2024-01-01T00:00:00+00:00", 1, "yes"],
+    ])
+    def test_invalid_cursor(self, orders, paginator, cursor):
+        if not isinstance(cursor, str):
+            cursor = urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+        with pytest.raises(NotFound):
+            list(paginator.paginate_queryset(orders, make_request(cursor=cursor)))
+
+    def test_count_is_optional_and_cached(self, orders, paginator, django_assert_num_queries):
+        cache.clear()
+        paginator.paginate_queryset(orders, make_request())
+        assert "count" not in paginator.get_paginated_response([]).data
+
+        request = make_request(count=1)
+        paginator.paginate_queryset(orders, request)
+        with django_assert_num_queries(1):
+            assert paginator.get_paginated_response([]).data["count"] == 25
+        with django_assert_num_queries(0):
+            data = paginator.get_paginated_response([]).data
+        assert data["count"] == 25
+        assert data["approximate"] is False
+
+
+class TenPerPage(BasicPagination):
+    page_size = 10
+
+
+class PaginatedView(PaginationHandlerMixin):
+    pagination_class = TenPerPage
+
+    def __init__(self, request):
+        self.request = request
+
+
+@pytest.mark.django_db
+class TestPaginationHandlerMixin:
+    def test_missing_page_is_the_first_page(self):
+        FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+
+        page = PaginatedView(make_request()).paginate_queryset(FiatCurrency.objects.order_by("ticker"))
+
+        assert [currency.ticker for currency in page] == ["USD"]
+
+    def test_deep_pages_are_refused(self):
+        view = PaginatedView(make_request(page=1001))
+
+        assert view.paginate_queryset(FiatCurrency.objects.order_by("ticker")) is None
+
+
+@pytest.mark.django_db
+class TestCountRows:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def status(self):
+        return OrderStatus.objects.create(name="finding-intermediary", step=1, desc="")
+
+    def test_counts_are_cached_per_filter(self, status, django_assert_num_queries):
+        Order.objects.bulk_create([Order(status=status) for _ in range(3)])
+        first = Order.objects.order_by("id").first()
+
+        assert counts.count_rows(Order.objects.all()) == (3, False)
+        assert counts.count_rows(Order.objects.filter(id=first.id)) == (1, False)
+        with django_assert_num_queries(0):
+            assert counts.count_rows(Order.objects.all()) == (3, False)
+            assert counts.count_rows(Order.objects.filter(id=first.id)) == (1, False)
+
+    def test_saving_a_row_invalidates_counts(self, status, django_capture_on_commit_callbacks):
+        assert counts.count_rows(Order.objects.filter(status__step=1)) == (0, False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Order.objects.create(status=status)
+
+        assert counts.count_rows(Order.objects.filter(status__step=1)) == (1, False)
+
+    def test_estimate_when_over_budget(self, status, monkeypatch):
+        monkeypatch.setattr(counts, "_exact_count", lambda queryset, budget: None)
+        monkeypatch.setattr(counts, "_estimated_count", lambda queryset: 42)
+
+        assert counts.count_rows(Order.objects.all()) == (42, True)
+
+    def test_paginator_reports_approximate_counts(self, status, monkeypatch):
+        monkeypatch.setattr(counts, "_exact_count", lambda queryset, budget: None)
+        monkeypatch.setattr(counts, "_estimated_count", lambda queryset: 42)
+        Order.objects.create(status=status)
+
+        pagination = TenPerPage()
+        pagination.paginate_queryset(Order.objects.order_by("id"), make_request())
+        data = pagination.get_paginated_response([]).data
+
+        assert data["count"] == 42
+        assert data["approximate"] is True
+
+    @pytest.mark.skipif(not supports_plans(), reason="Statement timeouts need PostgreSQL")
+    def test_budget_does_not_outlive_the_count(self, status):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            before = cursor.fetchone()[0]
+
+            assert counts.count_rows(Order.objects.all(), budget=100) == (0, False)
+
+            cursor.execute("SHOW statement_timeout")
+            assert cursor.fetchone()[0] == before
@@ -2,23 +2,67 @@ import requests
 import shutil
 import sys
 
-from django.conf import settings
-from json import dumps
-import requests
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+
+from .centrifugo import build_command, get_publisher
+
 
 def create_command_payload_and_send(method, data, channel):
-    headers  = {'Content-type': 'application/json', 'Authorization': 'apikey ' + settings.CENTRIFUGO_API_KEY}
-    command = {
-        "method": method,
-        "params": {
-            "channel": channel,
-            "data": data
-        }
-    }
-
-    payload = dumps(command)
-    resp = requests.post("http://centrifugo:8000/api", data=payload, headers=headers) 
-    return resp.json()
+    """
+    Sends a command to Centrifugo and waits for its reply.
+    """
+
+    return get_publisher().send(build_command(method, data, channel))
+
+
+def enqueue_command_payload(method, data, channel):
+    """
+    Queues a command for Centrifugo without waiting for it to be delivered. Queued
+    commands are coalesced into batch requests by the publisher in the background.
+    """
+
+    get_publisher().enqueue(build_command(method, data, channel))
+
+
+def enqueue_command_payload_on_commit(method, data, channel, using=None):
+    """
+    Holds a command for Centrifugo back until the current transaction commits, so
+    clients never hear about rows that are still locked or that end up rolled back.
+    Commands registered inside a transaction or savepoint that is rolled back are
+    dropped together with it. Outside of a transaction the command is queued at once.
+    """
+
+    command = build_command(method, data, channel)
+    transaction.on_commit(lambda: get_publisher().enqueue(command), using=using)
+
+
+# Deletes KEYS[1] only while it still holds ARGV[1].
+_COMPARE_AND_DELETE = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def release_cache_lock(key, token, alias=DEFAULT_CACHE_ALIAS):
+    """
+    Deletes a lock taken with cache.add(key, token), unless it has expired and been
+    taken by someone else since. On Redis the check and the deletion are one atomic
+    script; other backends, which are only used in development, check then delete.
+    """
+
+    backend = caches[alias]
+    if isinstance(backend, RedisCache):
+        key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(key, write=True)
+        return bool(client.eval(_COMPARE_AND_DELETE, 1, key, backend._cache._serializer.dumps(token)))
+
+    if backend.get(key) == token:
+        return backend.delete(key)
+    return False
 
 
 def captcha_uploader(link):
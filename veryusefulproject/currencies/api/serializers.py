@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from veryusefulproject.core.mixins import DynamicFieldsSerializerMixin
+from ..history import crypto_rate_history
 from ..models import CryptoCurrency, FiatCurrency, CryptoCurrencyRate, FiatCurrencyRate
 
 class CryptoCurrencyRateSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -33,7 +34,8 @@ class CryptoCurrencySerializer(DynamicFieldsSerializerMixin, serializers.ModelSe
         if not context:
             return None
 
-        order_creation_time = context.pop("created_at", None)
-        obj = obj.cryptocurrencyrate_set.filter(created_at__lte=order_creation_time).order_by("created_at").last()
-        serializer = CryptoCurrencyRateSerializer(obj, **context)
-        return serializer.data
+        # The context is shared by every cryptocurrency, so it mustn't be changed here.
+        order_creation_time = context.get("created_at", None)
+        kwargs = {key: value for key, value in context.items() if key != "created_at"}
+        obj = crypto_rate_history.rate_object_at(obj.ticker, order_creation_time)
+        return self.serialize_nested(CryptoCurrencyRateSerializer, obj, **kwargs)
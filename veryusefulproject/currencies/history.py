@@ -0,0 +1,196 @@
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CryptoCurrencyRate
+
+
+class _Series:
+    """
+    Rates of one cryptocurrency in ascending order of time, with the timestamps in a
+    compact array of their own so that they can be searched with bisect.
+    """
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.ids = array("q")
+        self.rates = []
+
+    def append(self, timestamp, id, rate):
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            # Rates are created in order, but two processes can commit them out of order.
+            index = bisect_right(self.timestamps, timestamp)
+            self.timestamps.insert(index, timestamp)
+            self.ids.insert(index, id)
+            self.rates.insert(index, rate)
+            return
+
+        self.timestamps.append(timestamp)
+        self.ids.append(id)
+        self.rates.append(rate)
+
+    def index_at(self, timestamp):
+        return bisect_right(self.timestamps, timestamp) - 1
+
+
+def to_timestamp(when) -> float:
+    if when is None:
+        return timezone.now().timestamp()
+    if isinstance(when, str):
+        when = parse_datetime(when)
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+
+    return when.timestamp()
+
+
+class CryptoRateHistory:
+    """
+    In-process copy of the rate history of every cryptocurrency in one fiat currency,
+    which answers the rate as of any moment, such as the creation of an order, with a
+    binary search instead of a query.
+
+    The history is loaded with a single query the first time it is needed. After that,
+    only the rates stamped at most "settle_time" seconds before the latest one seen are
+    fetched, and the ones seen already are skipped. Rates are ingested in parallel, so
+    one can commit after a later one, or one with a greater ID, has been read; the
+    overlap picks it up all the same. The history is only trusted up to "settle_time"
+    seconds before its last refresh, since a rate stamped earlier might not have been
+    committed yet; a lookup of any later moment refreshes it first, but no more than
+    once every "min_refresh_interval" seconds.
+    """
+
+    def __init__(self, fiat_currency="USD", settle_time=60, min_refresh_interval=1):
+        self.fiat_currency = fiat_currency
+        self.settle_time = settle_time
+        self.min_refresh_interval = min_refresh_interval
+
+        self._lock = threading.Lock()
+        self._series = {}
+        self._latest = None
+        # IDs of the rates stamped within "settle_time" of the latest one, by timestamp
+        self._recent_ids = {}
+        self._complete_until = float("-inf")
+        self._refreshed_at = float("-inf")
+
+    def clear(self):
+        with self._lock:
+            self._series = {}
+            self._latest = None
+            self._recent_ids = {}
+            self._complete_until = float("-inf")
+            self._refreshed_at = float("-inf")
+
+    def refresh(self):
+        """
+        Fetches the rates committed since the last refresh.
+        """
+
+        with self._lock:
+            started_at = timezone.now().timestamp()
+            queryset = CryptoCurrencyRate.objects.filter(fiat_currency_id=self.fiat_currency)
+            if self._latest is not None:
+                queryset = queryset.filter(created_at__gte=self._latest - timedelta(seconds=self.settle_time))
+
+            rows = queryset.order_by("created_at", "id").values_list("id", "cryptocurrency_id", "created_at", "rate")
+            for id, ticker, created_at, rate in rows.iterator():
+                if id in self._recent_ids:
+                    continue
+
+                series = self._series.get(ticker)
+                if series is None:
+                    series = self._series[ticker] = _Series()
+                series.append(created_at.timestamp(), id, rate)
+                self._recent_ids[id] = created_at.timestamp()
+                if self._latest is None or created_at > self._latest:
+                    self._latest = created_at
+
+            if self._latest is not None:
+                cutoff = self._latest.timestamp() - self.settle_time
+                self._recent_ids = {id: stamp for id, stamp in self._recent_ids.items() if stamp >= cutoff}
+
+            self._complete_until = started_at - self.settle_time
+            self._refreshed_at = time.monotonic()
+
+    def _ensure_complete_until(self, timestamp):
+        if timestamp <= self._complete_until:
+            return
+        if time.monotonic() - self._refreshed_at < self.min_refresh_interval:
+            return
+
+        self.refresh()
+
+    def _find(self, ticker, timestamp):
+        series = self._series.get(ticker)
+        if series is None:
+            return None, None
+
+        index = series.index_at(timestamp)
+        if index < 0:
+            return None, None
+
+        return series, index
+
+    def rate_at(self, ticker: str, when) -> Optional[Decimal]:
+        """
+        Returns the latest rate of a cryptocurrency at or before "when", a datetime or
+        an ISO 8601 string, or None if there was none yet. A "when" of None means now.
+        """
+
+        return self.rates_at([(ticker, when)])[0]
+
+    def rates_at(self, lookups: Iterable[tuple]) -> list:
+        """
+        Looks up the rates of many (ticker, when) pairs at once, refreshing the history
+        at most once for all of them.
+        """
+
+        lookups = [(ticker, to_timestamp(when)) for ticker, when in lookups]
+        if not lookups:
+            return []
+
+        self._ensure_complete_until(max(timestamp for ticker, timestamp in lookups))
+
+        rates = []
+        with self._lock:
+            for ticker, timestamp in lookups:
+                series, index = self._find(ticker, timestamp)
+                rates.append(series.rates[index] if series else None)
+
+        return rates
+
+    def rate_object_at(self, ticker: str, when) -> Optional[CryptoCurrencyRate]:
+        """
+        Returns the rate as of "when" as an unsaved CryptoCurrencyRate, for serializers.
+        Rates are never modified, so "modified_at" is the time of creation.
+        """
+
+        timestamp = to_timestamp(when)
+        self._ensure_complete_until(timestamp)
+
+        with self._lock:
+            series, index = self._find(ticker, timestamp)
+            if series is None:
+                return None
+            id, rate, timestamp = series.ids[index], series.rates[index], series.timestamps[index]
+
+        created_at = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+        return CryptoCurrencyRate(
+            id=id,
+            cryptocurrency_id=ticker,
+            fiat_currency_id=self.fiat_currency,
+            rate=rate,
+            created_at=created_at,
+            modified_at=created_at,
+        )
+
+
+crypto_rate_history = CryptoRateHistory()
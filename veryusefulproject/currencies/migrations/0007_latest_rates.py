@@ -0,0 +1,87 @@
+# Generated by Django 4.1.9 on 2026-10-18 20:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_latest_rates(apps, schema_editor):
+    FiatCurrencyRate = apps.get_model("currencies", "FiatCurrencyRate")
+    CryptoCurrencyRate = apps.get_model("currencies", "CryptoCurrencyRate")
+    LatestFiatCurrencyRate = apps.get_model("currencies", "LatestFiatCurrencyRate")
+    LatestCryptoCurrencyRate = apps.get_model("currencies", "LatestCryptoCurrencyRate")
+
+    latest_fiat_rates = {}
+    for fiat_currency_id, rate in FiatCurrencyRate.objects.order_by("created_at", "id").values_list(
+        "fiat_currency_id", "rate"
+    ).iterator():
+        latest_fiat_rates[fiat_currency_id] = rate
+
+    LatestFiatCurrencyRate.objects.bulk_create([
+        LatestFiatCurrencyRate(fiat_currency_id=fiat_currency_id, rate=rate)
+        for fiat_currency_id, rate in latest_fiat_rates.items()
+    ])
+
+    latest_crypto_rates = {}
+    for cryptocurrency_id, fiat_currency_id, rate in CryptoCurrencyRate.objects.order_by("created_at", "id").values_list(
+        "cryptocurrency_id", "fiat_currency_id", "rate"
+    ).iterator():
+        latest_crypto_rates[(cryptocurrency_id, fiat_currency_id)] = rate
+
+    LatestCryptoCurrencyRate.objects.bulk_create([
+        LatestCryptoCurrencyRate(cryptocurrency_id=cryptocurrency_id, fiat_currency_id=fiat_currency_id, rate=rate)
+        for (cryptocurrency_id, fiat_currency_id), rate in latest_crypto_rates.items()
+    ])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("currencies", "0006_cryptocurrencyrate_currencies__created_a9d9cf_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestCryptoCurrencyRate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rate", models.DecimalField(decimal_places=10, max_digits=19)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LatestFiatCurrencyRate",
+            fields=[
+                (
+                    "fiat_currency",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="currencies.fiatcurrency",
+                    ),
+                ),
+                ("rate", models.DecimalField(decimal_places=10, max_digits=19)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="fiatcurrencyrate",
+            index=models.Index(fields=["fiat_currency", "created_at"], name="currencies__fiat_cu_b777f1_idx"),
+        ),
+        migrations.AddField(
+            model_name="latestcryptocurrencyrate",
+            name="cryptocurrency",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="currencies.cryptocurrency"),
+        ),
+        migrations.AddField(
+            model_name="latestcryptocurrencyrate",
+            name="fiat_currency",
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="currencies.fiatcurrency"),
+        ),
+        migrations.AddConstraint(
+            model_name="latestcryptocurrencyrate",
+            constraint=models.UniqueConstraint(
+                fields=("cryptocurrency", "fiat_currency"), name="unique_latest_crypto_rate"
+            ),
+        ),
+        migrations.RunPython(fill_latest_rates, migrations.RunPython.noop),
+    ]
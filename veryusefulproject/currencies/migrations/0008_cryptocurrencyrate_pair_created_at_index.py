@@ -0,0 +1,18 @@
+# Generated by Django 4.1.9 on 2026-10-18 20:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("currencies", "0007_latest_rates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cryptocurrencyrate",
+            index=models.Index(
+                fields=["cryptocurrency", "fiat_currency", "created_at"], name="currencies__cryptoc_1cd1da_idx"
+            ),
+        ),
+    ]
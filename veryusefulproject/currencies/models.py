@@ -26,6 +26,11 @@ class FiatCurrencyRate(BaseModel):
     fiat_currency = models.ForeignKey(FiatCurrency, on_delete=models.CASCADE)
     rate = models.DecimalField(max_digits=19, decimal_places=10)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['fiat_currency', 'created_at'])
+        ]
+
 
 class CryptoCurrency(BaseModel):
     ticker: models.CharField = models.CharField(
@@ -41,5 +46,38 @@ class CryptoCurrencyRate(BaseModel):
 
     class Meta:
         indexes = [
-            models.Index(fields=['created_at'])
+            models.Index(fields=['created_at']),
+            models.Index(fields=['cryptocurrency', 'fiat_currency', 'created_at']),
+        ]
+
+
+class LatestFiatCurrencyRate(models.Model):
+    """
+    The latest rate of every fiat currency against the dollar, kept next to the history
+    in FiatCurrencyRate by the rate tasks so that conversions don't search the history.
+    """
+
+    fiat_currency = models.OneToOneField(FiatCurrency, on_delete=models.CASCADE, primary_key=True)
+    rate = models.DecimalField(max_digits=19, decimal_places=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class LatestCryptoCurrencyRate(models.Model):
+    """
+    The latest rate of every cryptocurrency in a fiat currency, kept next to the history
+    in CryptoCurrencyRate by the rate tasks.
+    """
+
+    cryptocurrency = models.ForeignKey(CryptoCurrency, on_delete=models.CASCADE)
+    fiat_currency = models.ForeignKey(FiatCurrency, on_delete=models.CASCADE)
+    rate = models.DecimalField(max_digits=19, decimal_places=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cryptocurrency', 'fiat_currency'], name='unique_latest_crypto_rate')
         ]
+
+    @property
+    def pair(self):
+        return (self.cryptocurrency_id, self.fiat_currency_id)
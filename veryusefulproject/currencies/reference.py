@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from veryusefulproject.core.reference_data import ReferenceTable
+
+from .models import CryptoCurrency, FiatCurrency, LatestCryptoCurrencyRate, LatestFiatCurrencyRate
+
+fiat_currencies = ReferenceTable(FiatCurrency, "ticker")
+crypto_currencies = ReferenceTable(CryptoCurrency, "ticker")
+latest_fiat_rates = ReferenceTable(LatestFiatCurrencyRate, "fiat_currency_id")
+latest_crypto_rates = ReferenceTable(LatestCryptoCurrencyRate, "pair")
+
+
+def get_fiat_currency(ticker: str) -> FiatCurrency:
+    return fiat_currencies.get(ticker)
+
+
+def get_crypto_currency(ticker: str) -> CryptoCurrency:
+    return crypto_currencies.get(ticker)
+
+
+def get_latest_fiat_rate(ticker: str) -> Decimal:
+    """
+    Returns the latest rate of a fiat currency against the dollar.
+    """
+
+    return latest_fiat_rates.get(ticker).rate
+
+
+def get_latest_crypto_rate(ticker: str, fiat_ticker: str = "USD") -> Decimal:
+    """
+    Returns the latest rate of a cryptocurrency in a fiat currency.
+    """
+
+    return latest_crypto_rates.get((ticker, fiat_ticker)).rate
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CryptoCurrency, FiatCurrency, LatestCryptoCurrencyRate, LatestFiatCurrencyRate
+from .reference import crypto_currencies, fiat_currencies, latest_crypto_rates, latest_fiat_rates
+
+
+@receiver([post_save, post_delete], sender=FiatCurrency)
+def invalidate_fiat_currencies(sender, using=None, **kwargs):
+    fiat_currencies.invalidate(using=using)
+
+
+@receiver([post_save, post_delete], sender=CryptoCurrency)
+def invalidate_crypto_currencies(sender, using=None, **kwargs):
+    crypto_currencies.invalidate(using=using)
+
+
+@receiver([post_save, post_delete], sender=LatestFiatCurrencyRate)
+def invalidate_latest_fiat_rates(sender, using=None, **kwargs):
+    latest_fiat_rates.invalidate(using=using)
+
+
+@receiver([post_save, post_delete], sender=LatestCryptoCurrencyRate)
+def invalidate_latest_crypto_rates(sender, using=None, **kwargs):
+    latest_crypto_rates.invalidate(using=using)
@@ -1,32 +1,73 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from config import celery_app
-from django.db import transaction
+from django.conf import settings
 
-from veryusefulproject.currencies.models import CryptoCurrency, CryptoCurrencyRate, FiatCurrency, FiatCurrencyRate
+from veryusefulproject.currencies.history import crypto_rate_history
+from veryusefulproject.currencies.models import CryptoCurrencyRate
+from veryusefulproject.core.parser import get_parser_client
+from veryusefulproject.currencies.reference import crypto_currencies, get_fiat_currency
+from veryusefulproject.currencies.utils import ingest_fiat_currency_rates, store_latest_crypto_rates
 
-import requests
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
+
 @celery_app.task()
 def update_currency_info():
-    resp = requests.get("http://parser:3000/getCurrencyData/")
-    json = resp.json()
+    json = get_parser_client().get_currency_data()
+    count = ingest_fiat_currency_rates(json)
+
+    print(f"Rates of {count} of {len(json)} fiat currencies changed and were updated!")
+
+
+def fetch_crypto_currency_rates(currencies, max_workers=None):
+    """
+    Fetches the dollar rates of the given cryptocurrencies from the parser concurrently.
+    Returns the rates by ticker, and the errors by ticker for the ones that failed.
+    """
+
+    client = get_parser_client()
+    rates, errors = {}, {}
+    if not currencies:
+        return rates, errors
+
+    # The client's connection pool is as large as the parser lets a single client be.
+    max_workers = max_workers or min(len(currencies), settings.PARSER_POOL_SIZE)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(client.get_crypto_currency_data, currency.name, currency.ticker): currency
+            for currency in currencies
+        }
+        for future in as_completed(futures):
+            currency = futures[future]
+            try:
+                rates[currency.ticker] = Decimal(future.result()["rate"])
+            except Exception as e:
+                errors[currency.ticker] = e
+
+    return rates, errors
 
-    for currency in json:
-        try:
-            fiat_currency, created = FiatCurrency.objects.get_or_create(ticker=currency["ticker"], desc="", name=currency["name"])
-            currency_rate = FiatCurrencyRate.objects.create(fiat_currency=fiat_currency, rate=Decimal(currency["rateAgainstDollar"]))
-        except Exception as e:
-            print("Error occurred at {}".format(currency))
-            print(e)
 
 @celery_app.task()
 def update_crypto_currency_info():
-    with transaction.atomic():
-        for currency in CryptoCurrency.objects.all():
-            resp = requests.post("http://parser:3000/getCryptoCurrencyData/", json={"name": currency.name, "ticker": currency.ticker})
-            json = resp.json()
-            
-            print(f"Price of {currency.ticker} is ${json['rate']}")
-            CryptoCurrencyRate.objects.create(cryptocurrency=currency, fiat_currency=FiatCurrency.objects.get(ticker="USD"), rate=Decimal(json['rate']))
-
-    print("Price Successfully Updated!")
+    currencies = crypto_currencies.all()
+    rates, errors = fetch_crypto_currency_rates(currencies)
+
+    for ticker, error in errors.items():
+        logger.warning("Failed to update the price of %s: %s", ticker, error, exc_info=error)
+
+    # Every rate is written at once after the fetches, so no transaction is held open
+    # while waiting on the parser.
+    usd = get_fiat_currency("USD")
+    CryptoCurrencyRate.objects.bulk_create([
+        CryptoCurrencyRate(cryptocurrency=currency, fiat_currency=usd, rate=rates[currency.ticker])
+        for currency in currencies
+        if currency.ticker in rates
+    ])
+    store_latest_crypto_rates(rates, usd)
+    crypto_rate_history.refresh()
+
+    logger.info("Prices of %d of %d cryptocurrencies successfully updated.", len(rates), len(currencies))
@@ -1,3 +1,199 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from veryusefulproject.core import parser as parser_module
+from veryusefulproject.core.fakes import FakeParserServer
+from veryusefulproject.core.parser import ParserClient
+from veryusefulproject.currencies.models import (
+    CryptoCurrency,
+    CryptoCurrencyRate,
+    FiatCurrency,
+    FiatCurrencyRate,
+    LatestFiatCurrencyRate,
+)
+from veryusefulproject.currencies.history import CryptoRateHistory
+from veryusefulproject.currencies.reference import get_latest_crypto_rate
+from veryusefulproject.currencies.tasks import update_crypto_currency_info
+from veryusefulproject.currencies.utils import convert_price_to_dollar, ingest_fiat_currency_rates
+from veryusefulproject.orders.models import Business, BusinessUrl
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    with FakeParserServer() as server:
+        monkeypatch.setattr(parser_module, "_client", ParserClient(server.url, max_retries=0))
+        yield server
+
+
+@pytest.fixture
+def cryptocurrencies():
+    FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+    return [
+        CryptoCurrency.objects.create(ticker=ticker, name=name, desc="")
+        for ticker, name in [("BTC", "Bitcoin"), ("ETH", "Ethereum"), ("XMR", "Monero"), ("LTC", "Litecoin")]
+    ]
+
+
+class TestUpdateCryptoCurrencyInfo:
+    def test_rates_are_created(self, parser, cryptocurrencies):
+        parser.script("POST", "/getCryptoCurrencyData/", {"body": {"rate": "20000.5"}})
+
+        update_crypto_currency_info()
+
+        assert CryptoCurrencyRate.objects.count() == 4
+        assert CryptoCurrencyRate.objects.get(cryptocurrency="BTC").rate == 20000.5
+        assert get_latest_crypto_rate("BTC") == Decimal("20000.5")
+
+    def test_failed_ticker_is_skipped(self, parser, cryptocurrencies, monkeypatch, caplog):
+        fetch = parser_module._client.get_crypto_currency_data
+
+        def get_crypto_currency_data(name, ticker):
+            if ticker == "XMR":
+                raise parser_module.ParserError("The parser responded with 500")
+            return fetch(name, ticker)
+
+        monkeypatch.setattr(parser_module._client, "get_crypto_currency_data", get_crypto_currency_data)
+        parser.script("POST", "/getCryptoCurrencyData/", {"body": {"rate": "1"}})
+
+        update_crypto_currency_info()
+
+        assert set(CryptoCurrencyRate.objects.values_list("cryptocurrency", flat=True)) == {"BTC", "ETH", "LTC"}
+        assert [record.getMessage() for record in caplog.records if record.levelname == "WARNING"] == [
+            "Failed to update the price of XMR: The parser responded with 500"
+        ]
+
+    def test_fetches_run_concurrently(self, parser, cryptocurrencies, django_assert_num_queries):
+        parser.script("POST", "/getCryptoCurrencyData/", {"delay": 0.3, "body": {"rate": "1"}})
+
+        with django_assert_num_queries(5):
+            update_crypto_currency_info()
+
+        assert parser.max_in_flight > 1
+        assert len(parser.requests) == len(cryptocurrencies)
+
+
+def make_fiat_rates(count, rate="1.5"):
+    tickers = [a + b + c for a in "ABCDEFGH" for b in "ABCDEFGH" for c in "ABCDEFGH"][:count]
+    return [{"ticker": ticker, "name": f"Currency {ticker}", "rateAgainstDollar": rate} for ticker in tickers]
+
+
+class TestIngestFiatCurrencyRates:
+    def test_missing_currencies_are_created(self):
+        FiatCurrency.objects.create(ticker="AAA", name="Existing", desc="")
+
+        assert ingest_fiat_currency_rates(make_fiat_rates(3)) == 3
+
+        assert FiatCurrency.objects.count() == 3
+        assert FiatCurrency.objects.get(ticker="AAA").name == "Existing"
+        assert FiatCurrencyRate.objects.get(fiat_currency="AAB").rate == Decimal("1.5")
+
+    def test_unchanged_rates_are_skipped(self):
+        ingest_fiat_currency_rates(make_fiat_rates(3))
+
+        rows = make_fiat_rates(3, rate="1.50001")
+        rows[1]["rateAgainstDollar"] = "1.6"
+
+        assert ingest_fiat_currency_rates(rows) == 1
+        assert FiatCurrencyRate.objects.count() == 4
+
+    def test_malformed_rows_are_skipped(self):
+        rows = make_fiat_rates(2)
+        rows[0]["rateAgainstDollar"] = "N/A"
+
+        assert ingest_fiat_currency_rates(rows) == 1
+
+    def test_query_count_of_170_currencies(self, django_assert_max_num_queries):
+        ingest_fiat_currency_rates(make_fiat_rates(170))
+
+        with django_assert_max_num_queries(4):
+            ingest_fiat_currency_rates(make_fiat_rates(170, rate="2"))
+
+        assert FiatCurrencyRate.objects.count() == 340
+
+
+class TestLatestRates:
+    def test_latest_rate_follows_ingestion(self):
+        ingest_fiat_currency_rates(make_fiat_rates(2))
+        ingest_fiat_currency_rates(make_fiat_rates(1, rate="2"))
+
+        assert dict(LatestFiatCurrencyRate.objects.values_list("fiat_currency", "rate")) == {
+            "AAA": Decimal("2"),
+            "AAB": Decimal("1.5"),
+        }
+
+    def test_conversion_is_served_from_memory(self, django_assert_num_queries):
+        ingest_fiat_currency_rates([{"ticker": "EUR", "name": "Euro", "rateAgainstDollar": "0.8"}])
+        business = Business.objects.create(ticker="AMZN", name="Amazon", desc="")
+        amazon = BusinessUrl.objects.create(
+            business=business, currency=FiatCurrency.objects.get(ticker="EUR"), url="https://www.amazon.de/", desc=""
+        )
+        convert_price_to_dollar(amazon, Decimal("8"))
+
+        with django_assert_num_queries(0):
+            assert Decimal(convert_price_to_dollar(amazon, Decimal("8"))) == 10
+
+
+class TestCryptoRateHistory:
+    @pytest.fixture
+    def now(self):
+        return timezone.now()
+
+    @pytest.fixture
+    def history(self, cryptocurrencies, now):
+        for hours, rate in [(3, "100"), (2, "200"), (1, "300")]:
+            self.add_rate("BTC", rate, now - timedelta(hours=hours))
+        return CryptoRateHistory()
+
+    def add_rate(self, ticker, rate, created_at, id=None):
+        row = CryptoCurrencyRate.objects.create(
+            id=id, cryptocurrency_id=ticker, fiat_currency_id="USD", rate=Decimal(rate)
+        )
+        CryptoCurrencyRate.objects.filter(id=row.id).update(created_at=created_at)
+
+    def test_rate_at(self, history, now):
+        assert history.rate_at("BTC", now - timedelta(hours=4)) is None
+        assert history.rate_at("BTC", now - timedelta(hours=3)) == Decimal("100")
+        assert history.rate_at("BTC", now - timedelta(minutes=150)) == Decimal("100")
+        assert history.rate_at("BTC", (now - timedelta(minutes=90)).isoformat()) == Decimal("200")
+        assert history.rate_at("ETH", now) is None
+
+    def test_batch_lookup_is_served_from_memory(self, history, now, django_assert_num_queries):
+        history.refresh()
+        lookups = [("BTC", now - timedelta(minutes=minutes)) for minutes in range(30, 180, 10)]
+
+        with django_assert_num_queries(0):
+            rates = history.rates_at(lookups)
+
+        assert rates[0] == Decimal("300")
+        assert rates[-1] == Decimal("100")
+
+    def test_new_rates_are_fetched_incrementally(self, history, now):
+        history.rate_at("BTC", now - timedelta(hours=2))
+        self.add_rate("BTC", "400", now + timedelta(seconds=1))
+        history.min_refresh_interval = 0
+
+        with CaptureQueriesContext(connection) as queries:
+            assert history.rate_at("BTC", now + timedelta(seconds=2)) == Decimal("400")
+
+        assert len(queries) == 1
+        assert '"created_at" >=' in queries[0]["sql"]
+        assert len(history._series["BTC"].rates) == 4
+
+    def test_rates_committed_out_of_order_are_fetched(self, history, now):
+        history.min_refresh_interval = 0
+        self.add_rate("BTC", "500", now, id=1000)
+        assert history.rate_at("BTC", now + timedelta(seconds=5)) == Decimal("500")
+
+        # Stamped before the rate above and with a lower ID, but committed after it was read
+        self.add_rate("BTC", "450", now - timedelta(seconds=10), id=999)
+        history.refresh()
+
+        assert history.rate_at("BTC", now - timedelta(seconds=5)) == Decimal("450")
+        assert list(history._series["BTC"].ids).count(1000) == 1
@@ -1,9 +1,16 @@
 import re
+from decimal import Decimal, InvalidOperation
 
-from django.db.models import Q
+from django.conf import settings
 
-from .models import CryptoCurrency, FiatCurrency, FiatCurrencyRate
-from veryusefulproject.orders.utils import get_businessUrl_amazon
+from .history import crypto_rate_history
+from .models import FiatCurrency, FiatCurrencyRate, LatestCryptoCurrencyRate, LatestFiatCurrencyRate
+from .reference import (
+    fiat_currencies,
+    get_latest_fiat_rate,
+    latest_crypto_rates,
+    latest_fiat_rates,
+)
 
 def convert_european_notation_to_american_notation(price):
     commaIndex = 0
@@ -27,23 +34,125 @@ def convert_european_notation_to_american_notation(price):
     return price
 
 
-def convert_price_to_dollar(url, price):
-    businessUrl = get_businessUrl_amazon(url)
-    if businessUrl.currency.ticker == "USD":
-        return None
+def convert_price_to_dollar(businessUrl, price):
+    """
+    Converts a price in the currency of a business URL to dollars. Returns None if the
+    price already is in dollars.
+    """
 
-    if businessUrl:
-        conversion_rate_against_dollar = FiatCurrencyRate.objects.filter(fiat_currency=businessUrl.currency).order_by("created_at").last().rate
-        return str(price / conversion_rate_against_dollar)
+    if not businessUrl or not businessUrl.currency or businessUrl.currency.ticker == "USD":
+        return None
 
-    return None
+    conversion_rate_against_dollar = get_latest_fiat_rate(businessUrl.currency.ticker)
+    return str(price / conversion_rate_against_dollar)
 
 
 
 def get_orders_cryptocurrency_rate(datetime_str, cryptocurrency_ticker):
-    cryptocurrency = CryptoCurrency.objects.get(ticker=cryptocurrency_ticker)
-    cryptocurrency_rate = cryptocurrency.cryptocurrencyrate_set.filter(
-       Q(created_at__lte=datetime_str) 
-    ).order_by("-created_at").only("rate").first()
+    """
+    Returns the dollar rate of a cryptocurrency at the time an order was created, or
+    None if there was no rate yet.
+    """
+
+    rate = crypto_rate_history.rate_at(cryptocurrency_ticker, datetime_str)
+    return float(rate) if rate is not None else None
+
+
+def rate_has_changed(previous, rate, tolerance):
+    """
+    Tells whether "rate" differs from the previous rate of a currency by more than
+    "tolerance", relative to the previous rate.
+    """
+
+    if previous is None:
+        return True
+
+    return abs(rate - previous) > abs(previous) * tolerance
+
+
+def ingest_fiat_currency_rates(rows, tolerance=None):
+    """
+    Stores the rates against the dollar scraped by the parser, given as dicts with
+    "ticker", "name" and "rateAgainstDollar". Missing currencies are created, and a rate
+    is only added for currencies whose rate moved by more than "tolerance" (relative)
+    since their latest one. Returns the number of rates added.
+    """
+
+    if tolerance is None:
+        tolerance = Decimal(str(settings.FIAT_RATE_CHANGE_TOLERANCE))
+
+    rates = {}
+    names = {}
+    for row in rows:
+        try:
+            rates[row["ticker"]] = Decimal(row["rateAgainstDollar"])
+            names[row["ticker"]] = row["name"]
+        except (KeyError, TypeError, InvalidOperation) as e:
+            print("Error occurred at {}".format(row))
+            print(e)
+
+    known = {currency.ticker for currency in fiat_currencies.all()}
+    missing = [
+        FiatCurrency(ticker=ticker, name=names[ticker], desc="")
+        for ticker in rates
+        if ticker not in known
+    ]
+    if missing:
+        # Rows inserted in bulk don't send post_save, so the registry is refreshed here.
+        FiatCurrency.objects.bulk_create(missing, ignore_conflicts=True)
+        fiat_currencies.invalidate()
+
+    latest_rates = {row.fiat_currency_id: row.rate for row in latest_fiat_rates.all()}
+    changed = {
+        ticker: rate
+        for ticker, rate in rates.items()
+        if rate_has_changed(latest_rates.get(ticker), rate, tolerance)
+    }
+
+    FiatCurrencyRate.objects.bulk_create([
+        FiatCurrencyRate(fiat_currency_id=ticker, rate=rate)
+        for ticker, rate in changed.items()
+    ])
+    store_latest_fiat_rates(changed)
+
+    return len(changed)
+
+
+def store_latest_fiat_rates(rates):
+    """
+    Replaces the latest rates of the given fiat currencies, given by ticker, with a
+    single upsert.
+    """
+
+    if not rates:
+        return
+
+    LatestFiatCurrencyRate.objects.bulk_create(
+        [LatestFiatCurrencyRate(fiat_currency_id=ticker, rate=rate) for ticker, rate in rates.items()],
+        update_conflicts=True,
+        unique_fields=["fiat_currency"],
+        update_fields=["rate", "updated_at"],
+    )
+    # Rows upserted in bulk don't send post_save either.
+    latest_fiat_rates.invalidate()
+
+
+def store_latest_crypto_rates(rates, fiat_currency):
+    """
+    Replaces the latest rates of the given cryptocurrencies, given by ticker, in a fiat
+    currency with a single upsert.
+    """
+
+    if not rates:
+        return
 
-    return float(cryptocurrency_rate.rate)
+    LatestCryptoCurrencyRate.objects.bulk_create(
+        [
+            LatestCryptoCurrencyRate(cryptocurrency_id=ticker, fiat_currency=fiat_currency, rate=rate)
+            for ticker, rate in rates.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["cryptocurrency", "fiat_currency"],
+        update_fields=["rate", "updated_at"],
+    )
+    latest_crypto_rates.invalidate()
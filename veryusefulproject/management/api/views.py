@@ -8,6 +8,8 @@ from rest_framework.viewsets import GenericViewSet
 from veryusefulproject.users.api.serializers import UserSerializer
 from veryusefulproject.users.api.authentication import JWTAuthentication
 
+from ..read_models import ADMIN_USER_LIST
+
 User = get_user_model()
 
 
@@ -38,19 +40,9 @@ class AdminUsersViewSet(ListModelMixin, UpdateModelMixin, RetrieveModelMixin, Ge
         return data
 
     def list(self, request, *args, **kwargs):
-        fields = (
-            "username",
-            "email",
-            "date_joined",
-            "is_staff"
-        )
-        serializer = self.get_serializer_class()(
-            self.get_queryset().only(*fields),
-            fields=fields,
-            many=True
-        )
+        data = ADMIN_USER_LIST.serialize(self.get_queryset())
 
-        return Response(data=serializer.data, status=status.HTTP_200_OK)
+        return Response(data=data, status=status.HTTP_200_OK)
 
     def retrieve(self, request, *args, **kwargs):
         serializer = self.get_serializer_class()(
@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+
+from veryusefulproject.core.read_models import ReadModel
+
+User = get_user_model()
+
+
+# Same shape as UserSerializer with the fields the admin list of users shows.
+ADMIN_USER_LIST = ReadModel(User, {
+    "username": "username",
+    "email": "email",
+    "date_joined": "date_joined",
+    "is_staff": "is_staff",
+})
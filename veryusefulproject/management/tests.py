@@ -1,3 +1,32 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from veryusefulproject.users.api.serializers import UserSerializer
+
+from .api.views import AdminUsersViewSet
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+class TestAdminUsersViewSet:
+    def test_list_has_the_same_output_as_user_serializer(self):
+        for index in range(3):
+            User.objects.create(
+                username=f"user{index}", nickname=f"user{index}", email=f"user{index}@example.com",
+                second_password="x", is_staff=index == 0
+            )
+        admin = User.objects.get(username="user0")
+
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=admin)
+        response = AdminUsersViewSet.as_view({"get": "list"})(request)
+
+        fields = ("username", "email", "date_joined", "is_staff")
+        expected = UserSerializer(User.objects.all(), many=True, fields=fields).data
+        assert json.loads(JSONRenderer().render(response.data)) == json.loads(JSONRenderer().render(expected))
@@ -3,14 +3,18 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Q
 
 from veryusefulproject.core.mixins import PaginationHandlerMixin
 from veryusefulproject.users.api.authentication import JWTAuthentication
 
+from ..counters import apply_counts, clear_unread, read_counts
 from ..paginations import NotificationPagination
-from ..models import Notification
-from ..utils import return_affected_entities_unique_identifiers
+from ..push import push_unread_total
+from ..models import Notification, NotificationInboxItem
+from ..read_models import NOTIFICATION_LIST, RECENT_NOTIFICATION_LIST
 
 
 class MarkNotificationAsReadView(UpdateAPIView):
@@ -25,7 +29,12 @@ class MarkNotificationAsReadView(UpdateAPIView):
 
         with transaction.atomic():
             if not notification_identifier:
-                number_of_notifications_updated = Notification.objects.filter(
+                number_of_notifications_updated = NotificationInboxItem.objects.filter(
+                    user=request.user
+                ).update(read=True)
+                clear_unread(request.user.id)
+                push_unread_total(request.user)
+                Notification.objects.filter(
                     notifiers__username=request.user.get_username()
                 ).update(read=True)
 
@@ -41,6 +50,11 @@ class MarkNotificationAsReadView(UpdateAPIView):
                 )
                 notification.read = True
                 notification.save()
+                if NotificationInboxItem.objects.filter(
+                    user=request.user, notification=notification, read=False
+                ).update(read=True):
+                    apply_counts([request.user.id], 0, -1)
+                    push_unread_total(request.user)
                 return Response(status=status.HTTP_200_OK)
             except Notification.DoesNotExist:
                 return Response(
@@ -66,44 +80,18 @@ class RetrieveAllNotificationsView(PaginationHandlerMixin, RetrieveAPIView):
         notification.
         """
 
-        defer = [
-            "modified_at",
-            "notification_object__created_at",
-            "notification_object__modified_at",
-            "notification_object__action__created_at",
-            "notification_object__action__modified_at",
-        ]
-
         return_data = {"notifications": []}
 
         user = request.user
-        notifications = Notification.objects.select_related(
-            "notification_object__action"
-        ).prefetch_related(
-            "notificationobjectactor_set",
-            "notificationobjectaffected_set",
-            "notificationobjectinvolved_set",
-        ).filter(
-            notifiers__username=user.get_username()
-        ).order_by('-created_at').defer(*defer)
-
-        return_data["unread_total"] = Notification.objects.filter(
-            notifiers__username=user.get_username(), 
-            read=False
-        ).count()
-
-        page = self.paginate_queryset(notifications)
+        notifications = NotificationInboxItem.objects.filter(user=user)
+
+        _, return_data["unread_total"] = read_counts(user.id)
+
+        page = self.paginate_queryset(
+            NOTIFICATION_LIST.values(notifications, *self.paginator.key_fields)
+        )
         if page is not None:
-            for notification in page:
-                return_data["notifications"].append(
-                    {
-                        "id": str(notification.identifier),
-                        "notification": notification.notification_object.stringify(),
-                        "action": notification.notification_object.action.code,
-                        "created_at": notification.created_at,
-                        "read": notification.read,
-                    }
-                )
+            return_data["notifications"] = NOTIFICATION_LIST.render(page)
 
             response = self.get_paginated_response(return_data)
             response.status_code = status.HTTP_200_OK
@@ -125,49 +113,65 @@ class RetrieveNotificationsView(RetrieveAPIView):
 
         last_notification_identifier = request.query_params.get("id", None)
 
-        defer = [
-            "modified_at",
-            "notification_object__created_at",
-            "notification_object__modified_at",
-            "notification_object__action__created_at",
-            "notification_object__action__modified_at",
-        ]
-
         return_data = {"notifications": []}
 
         user = request.user
-        notifications = Notification.objects.select_related(
-            "notification_object__action"
-        ).prefetch_related(
-            "notification_object__notificationobjectactor_set",
-            "notification_object__notificationobjectaffectedentity_set",
-            "notification_object__notificationobjectinvolvedentity_set",
-        ).filter(
-            notifiers__username=user.get_username()
-        ).order_by('-created_at').defer(*defer)[:3]
-
-        return_data["total"] = Notification.objects.filter(
-            notifiers__username=user.get_username()
-        ).count()
-        return_data["unread_total"] = Notification.objects.filter(
-            notifiers__username=user.get_username(), read=False
-        ).count()
-
-        for notification in notifications:
-            if notification.identifier == last_notification_identifier:
+        notifications = NotificationInboxItem.objects.filter(user=user).order_by('-created_at', '-id')
+
+        return_data["total"], return_data["unread_total"] = read_counts(user.id)
+
+        # Only the notifications newer than the last one the user has seen are rendered.
+        rows = []
+        for row in RECENT_NOTIFICATION_LIST.values(notifications)[:3]:
+            if str(row["identifier"]) == last_notification_identifier:
                 break
+            rows.append(row)
+
+        return_data["notifications"] = RECENT_NOTIFICATION_LIST.render(rows)
+
+        return Response(data=return_data, status=status.HTTP_200_OK)
+
+
+class ResyncNotificationsView(RetrieveAPIView):
+    permission_classes = (IsAuthenticated,)
+    authentication_classes = (JWTAuthentication,)
+    limit = 50
 
-            return_data["notifications"].append(
-                {
-                    "action": notification.notification_object.action.code,
-                    "created_at": notification.created_at,
-                    "id": str(notification.identifier),
-                    "notification": notification.notification_object.stringify(),
-                    "read": notification.read,
-                    "affected": return_affected_entities_unique_identifiers(
-                        notification
-                    ),
-                }
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns what a client subscribed to the personal channel of the user has missed
+        while it was disconnected: the notifications newer than the one whose uuid is
+        given as "id", newest first, and the current counts. "complete" is false when
+        more notifications than "limit" were missed, or the given one is unknown, in
+        which case the client should reload its notifications instead.
+        """
+
+        last_notification_identifier = request.query_params.get("id", None)
+
+        return_data = {}
+
+        user = request.user
+        notifications = NotificationInboxItem.objects.filter(user=user).order_by('-created_at', '-id')
+
+        return_data["total"], return_data["unread_total"] = read_counts(user.id)
+
+        last = None
+        if last_notification_identifier:
+            try:
+                last = notifications.filter(identifier=last_notification_identifier).first()
+            except ValidationError:
+                return Response(
+                    status=status.HTTP_400_BAD_REQUEST,
+                    data={"reason": "Invalid notification id."}
+                )
+
+        if last is not None:
+            notifications = notifications.filter(
+                Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id)
             )
 
+        rows = list(RECENT_NOTIFICATION_LIST.values(notifications)[:self.limit + 1])
+        return_data["complete"] = last is not None and len(rows) <= self.limit
+        return_data["notifications"] = RECENT_NOTIFICATION_LIST.render(rows[:self.limit])
+
         return Response(data=return_data, status=status.HTTP_200_OK)
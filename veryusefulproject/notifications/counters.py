@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from .models import NotificationCounter, NotificationInboxItem
+
+
+def apply_counts(user_ids, total, unread, using=None):
+    """
+    Adds "total" and "unread", either of which may be negative, to the notification
+    counters of the given users. The counters are changed in the database rather than
+    read and written back, so that concurrent deliveries and reads don't overwrite each
+    other, and never go below zero.
+    """
+
+    user_ids = list(user_ids)
+    if not user_ids or not (total or unread):
+        return
+
+    with transaction.atomic(using=using):
+        if total > 0 or unread > 0:
+            NotificationCounter.objects.using(using).bulk_create(
+                [NotificationCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+            )
+        NotificationCounter.objects.using(using).filter(user_id__in=user_ids).update(
+            total=Greatest(F("total") + total, 0),
+            unread=Greatest(F("unread") + unread, 0),
+        )
+
+
+def clear_unread(user_id, using=None):
+    NotificationCounter.objects.using(using).filter(user_id=user_id).update(unread=0)
+
+
+def read_counts(user_id, using=None):
+    """
+    Returns the number of notifications in the inbox of a user, and how many of them are
+    unread.
+    """
+
+    counts = NotificationCounter.objects.using(using).filter(user_id=user_id).values_list("total", "unread").first()
+    return counts or (0, 0)
+
+
+def rebuild_notification_counters(using=None):
+    """
+    Recomputes the notification counters of every user from their inbox. Returns the
+    number of users who have notifications.
+    """
+
+    with transaction.atomic(using=using):
+        # Deliveries and reads change the counters in their own transactions, so they wait
+        # until the rebuild commits instead of being overwritten with an older count.
+        connection = transaction.get_connection(using)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"LOCK TABLE {NotificationCounter._meta.db_table} IN EXCLUSIVE MODE")
+
+        totals = NotificationInboxItem.objects.using(using).values("user").annotate(
+            total=Count("id"),
+            unread=Count("id", filter=Q(read=False)),
+        ).order_by()
+
+        counters = [
+            NotificationCounter(user_id=row["user"], total=row["total"], unread=row["unread"])
+            for row in totals
+        ]
+
+        NotificationCounter.objects.using(using).bulk_create(
+            counters,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["total", "unread", "modified_at"],
+        )
+        NotificationCounter.objects.using(using).exclude(
+            user__in=NotificationInboxItem.objects.using(using).values("user")
+        ).delete()
+
+    return len(counters)
@@ -1,24 +1,92 @@
-from .models import Notification, NotificationObjectActor, NotificationObjectAffectedEntity, NotificationObjectInvolvedEntity, NotificationAction, NotificationObject, User, EntityType
+from django.db import transaction
+
+from veryusefulproject.core.counts import invalidate_counts
 from veryusefulproject.orders.models import Order
 
+from .inbox import fan_out_on_commit
+from .models import (
+    Notification,
+    NotificationObject,
+    NotificationObjectActor,
+    NotificationObjectAffectedEntity,
+    NotificationObjectInvolvedEntity,
+    User,
+)
+from .reference import get_entity_type, get_notification_action
+
+# Number of notifier rows written per insert
+NOTIFIER_BATCH_SIZE = 1000
+
+
+def entity_rows(model, notification_object, entities):
+    return [
+        model(
+            notification_object=notification_object,
+            entity_type=get_entity_type(entity._meta.object_name),
+            entity_id=entity.pk
+        )
+        for entity in entities
+    ]
+
+
+def create_notifications(action_code, recipients, actors=(), affected=(), involved=(), using=None):
+    """
+    Creates a single notification of an event for every one of "recipients", which are
+    users or their IDs. "actors", "affected" and "involved" are the model instances the
+    placeholders of the action of the event take their values from, in order.
+
+    Every kind of row is written with one insert, and the notifiers in batches of
+    NOTIFIER_BATCH_SIZE, so the number of queries doesn't depend on the number of
+    recipients. A bulk insert of notifiers sends no m2m_changed signal, so the delivery
+    to their inboxes is queued here instead, once the transaction commits.
+    """
+
+    user_ids = list(dict.fromkeys(
+        recipient.pk if isinstance(recipient, User) else recipient for recipient in recipients
+    ))
+    action = get_notification_action(action_code)
+
+    with transaction.atomic(using=using):
+        notification_object = NotificationObject.objects.using(using).create(action=action)
+        for model, entities in (
+            (NotificationObjectActor, actors),
+            (NotificationObjectAffectedEntity, affected),
+            (NotificationObjectInvolvedEntity, involved),
+        ):
+            if entities:
+                model.objects.using(using).bulk_create(entity_rows(model, notification_object, entities))
+
+        notification = Notification.objects.using(using).create(notification_object=notification_object)
+
+        through = Notification.notifiers.through
+        through.objects.using(using).bulk_create(
+            [through(notification_id=notification.id, user_id=user_id) for user_id in user_ids],
+            batch_size=NOTIFIER_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        invalidate_counts(through, using=using)
+        fan_out_on_commit(notification.id, user_ids, using=using)
+
+    return notification
+
+
+def create_notifications_on_commit(action_code, recipients, actors=(), affected=(), involved=(), using=None):
+    """
+    Holds the creation of a notification back until the current transaction commits,
+    so that recipients are never told about rows that end up rolled back.
+    """
+
+    transaction.on_commit(
+        lambda: create_notifications(action_code, recipients, actors, affected, involved, using=using),
+        using=using
+    )
+
 
 # Utility functions for creating a notification in response to events on behalf of other functions
 def create_notification_for_successful_order_creation(order, user):
-    if type(order) != Order:
+    if not isinstance(order, Order):
         raise Exception("Invalid order object.")
-    if type(user) != User:
+    if not isinstance(user, User):
         raise Exception("Invalid user object.")
 
-    action = NotificationAction.objects.get(code="order:created")
-    notification_object = NotificationObject.objects.create(action=action)
-    NotificationObjectAffectedEntity.objects.create(
-        notification_object=notification_object,
-        entity_type=EntityType.objects.get(entity_name="Order"),
-        entity_id=order.id
-    )
-    notification = Notification.objects.create(
-        notification_object=notification_object
-    )
-    notification.notifiers.add(user)
-
-    return notification
+    return create_notifications("order:created", [user], affected=[order])
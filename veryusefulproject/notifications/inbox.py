@@ -0,0 +1,128 @@
+from django.db import transaction
+
+from veryusefulproject.core.counts import invalidate_counts
+
+from .counters import apply_counts
+from .models import Notification, NotificationInboxItem
+from .push import push_notifications
+from .rendering import render_notifications
+
+# Number of notifiers whose inboxes a single task writes to
+FAN_OUT_BATCH_SIZE = 500
+
+
+def build_inbox_items(notifications, user_ids_by_notification):
+    """
+    Renders every notification once, and returns an unsaved, unread inbox item for each
+    of its notifiers. The notifications must come with their notification object and
+    action.
+    """
+
+    rendered = render_notifications(
+        (notification.notification_object_id, notification.notification_object.action.action)
+        for notification in notifications
+    )
+
+    return [
+        NotificationInboxItem(
+            user_id=user_id,
+            notification_id=notification.id,
+            identifier=notification.identifier,
+            action=notification.notification_object.action.code,
+            text=text,
+            affected=[str(identifier) for identifier in affected],
+            read=False,
+            created_at=notification.created_at,
+        )
+        for notification, (text, affected) in zip(notifications, rendered)
+        for user_id in user_ids_by_notification[notification.id]
+    ]
+
+
+def deliver_to_inboxes(notification_id, user_ids, using=None):
+    """
+    Writes a notification into the inboxes of the given users, skipping the ones who
+    already have it, and pushes it to them.
+    """
+
+    with transaction.atomic(using=using):
+        # Deliveries of the same notification wait for each other on its row, so the users
+        # who already have it are known for sure and nobody is counted twice.
+        notification = Notification.objects.using(using).select_related(
+            "notification_object__action"
+        ).select_for_update(of=("self",)).filter(id=notification_id).first()
+        if notification is None:
+            return 0
+
+        delivered_already = set(
+            NotificationInboxItem.objects.using(using).filter(
+                notification=notification, user_id__in=user_ids
+            ).values_list("user_id", flat=True)
+        )
+        user_ids = [user_id for user_id in user_ids if user_id not in delivered_already]
+
+        items = build_inbox_items([notification], {notification.id: user_ids})
+        NotificationInboxItem.objects.using(using).bulk_create(items)
+        apply_counts(user_ids, 1, 1, using=using)
+        invalidate_counts(NotificationInboxItem, using=using)
+        push_notifications(items, using=using)
+    return len(items)
+
+
+def fan_out_on_commit(notification_id, user_ids, using=None):
+    """
+    Queues the delivery of a notification to the inboxes of its notifiers once the
+    current transaction commits, in batches of FAN_OUT_BATCH_SIZE notifiers per task.
+    """
+
+    from .tasks import deliver_notification
+
+    user_ids = sorted(user_ids)
+    for start in range(0, len(user_ids), FAN_OUT_BATCH_SIZE):
+        batch = user_ids[start:start + FAN_OUT_BATCH_SIZE]
+        transaction.on_commit(
+            lambda batch=batch: deliver_notification.delay(notification_id, batch),
+            using=using
+        )
+
+
+def rebuild_inboxes(batch_size=1000, using=None):
+    """
+    Writes every notification into the inboxes of its notifiers that don't have it yet.
+    The notification counters are left as they are, to be rebuilt afterwards.
+    """
+
+    through = Notification.notifiers.through
+    notifications = Notification.objects.using(using).select_related("notification_object__action").order_by("id")
+
+    delivered = 0
+    last_id = 0
+    while True:
+        batch = list(notifications.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return delivered
+
+        user_ids_by_notification = {notification.id: [] for notification in batch}
+        with transaction.atomic(using=using):
+            # Takes the same locks as deliver_to_inboxes, so the two never write the same item.
+            list(Notification.objects.using(using).select_for_update().filter(
+                id__in=user_ids_by_notification
+            ).values_list("id", flat=True))
+            delivered_already = set(
+                NotificationInboxItem.objects.using(using).filter(
+                    notification_id__in=user_ids_by_notification
+                ).values_list("notification_id", "user_id")
+            )
+            rows = through.objects.using(using).filter(notification_id__in=user_ids_by_notification).values_list(
+                "notification_id", "user_id"
+            )
+            for notification_id, user_id in rows:
+                if (notification_id, user_id) not in delivered_already:
+                    user_ids_by_notification[notification_id].append(user_id)
+
+            undelivered = [notification for notification in batch if user_ids_by_notification[notification.id]]
+            items = build_inbox_items(undelivered, user_ids_by_notification)
+            NotificationInboxItem.objects.using(using).bulk_create(items)
+            invalidate_counts(NotificationInboxItem, using=using)
+        delivered += len(items)
+        last_id = batch[-1].id
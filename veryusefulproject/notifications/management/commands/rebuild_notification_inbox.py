@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from veryusefulproject.notifications.counters import rebuild_notification_counters
+from veryusefulproject.notifications.inbox import rebuild_inboxes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delivers every notification to the inboxes of its notifiers that don't have it yet, "
+        "and recomputes the notification counters of every user from their inbox."
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild_inboxes()
+        self.stdout.write(f"Delivered {count} notifications to inboxes.")
+        count = rebuild_notification_counters()
+        self.stdout.write(f"Rebuilt the notification counters of {count} users.")
@@ -0,0 +1,47 @@
+# Generated by Django 4.1.9 on 2026-10-18 21:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0005_notification_identifier"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationInboxItem",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("identifier", models.UUIDField()),
+                ("action", models.CharField(max_length=128)),
+                ("text", models.TextField()),
+                ("affected", models.JSONField(default=list)),
+                ("read", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "notification",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="notifications.notification"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_inbox",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notificationinboxitem",
+            index=models.Index(fields=["user", "-created_at", "-id"], name="inbox_user_created_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="notificationinboxitem",
+            constraint=models.UniqueConstraint(fields=("user", "notification"), name="unique_inbox_notification"),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.1.9 on 2026-10-18 21:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_notification_counters(apps, schema_editor):
+    NotificationInboxItem = apps.get_model("notifications", "NotificationInboxItem")
+    NotificationCounter = apps.get_model("notifications", "NotificationCounter")
+
+    totals = NotificationInboxItem.objects.values("user").annotate(
+        total=models.Count("id"),
+        unread=models.Count("id", filter=models.Q(read=False)),
+    ).order_by()
+
+    NotificationCounter.objects.bulk_create([
+        NotificationCounter(user_id=row["user"], total=row["total"], unread=row["unread"])
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_remove_role_users_user_roles"),
+        ("notifications", "0006_notificationinboxitem"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("unread", models.PositiveIntegerField(default=0)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_notification_counters, migrations.RunPython.noop),
+    ]
@@ -93,3 +93,41 @@ class Notification(BaseModel):
         return self.actor
 
 
+class NotificationInboxItem(models.Model):
+    """
+    A notification as one of its notifiers sees it, rendered when it was delivered, so
+    that reading the notifications of a user is a range scan of a single table.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notification_inbox")
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE)
+    identifier = models.UUIDField()
+    action = models.CharField(max_length=128)
+    text = models.TextField()
+    affected = models.JSONField(default=list)
+    read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "notification"], name="unique_inbox_notification"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="inbox_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return "NotificationInboxItem: {}".format(self.id)
+
+
+class NotificationCounter(models.Model):
+    """
+    Running totals of the notifications in the inbox of a user, and of the unread ones
+    among them. Deliveries, removals and reads keep them up to date, so that the
+    notification badge doesn't count the inbox of the user on each poll.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    total = models.PositiveIntegerField(default=0)
+    unread = models.PositiveIntegerField(default=0)
+    modified_at = models.DateTimeField(auto_now=True)
@@ -1,5 +1,5 @@
-from veryusefulproject.core.paginations import BasicPagination
+from veryusefulproject.core.paginations import KeysetPagination
 
 
-class NotificationPagination(BasicPagination):
+class NotificationPagination(KeysetPagination):
     page_size = 20
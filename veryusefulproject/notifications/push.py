@@ -0,0 +1,68 @@
+from rest_framework.utils.encoders import JSONEncoder
+
+from veryusefulproject.core.utils import enqueue_command_payload_on_commit
+
+from .models import NotificationCounter
+
+_encoder = JSONEncoder()
+
+
+def personal_channel(username):
+    return "{}#{}".format(username, username)
+
+
+def inbox_item_payload(item):
+    """
+    Returns an inbox item in the shape RetrieveNotificationsView gives notifications in,
+    encoded the way its responses are.
+    """
+
+    return {
+        "action": item.action,
+        "created_at": _encoder.default(item.created_at),
+        "id": str(item.identifier),
+        "notification": item.text,
+        "affected": item.affected,
+        "read": item.read,
+    }
+
+
+def push_notifications(items, using=None):
+    """
+    Publishes every new inbox item, together with the unread count of its user, to the
+    personal channel of the user once the current transaction commits.
+    """
+
+    if not items:
+        return
+
+    counters = {
+        user_id: (username, unread)
+        for user_id, username, unread in NotificationCounter.objects.using(using).filter(
+            user_id__in={item.user_id for item in items}
+        ).values_list("user_id", "user__username", "unread")
+    }
+
+    for item in items:
+        username, unread = counters[item.user_id]
+        enqueue_command_payload_on_commit(
+            "publish",
+            {"notification": inbox_item_payload(item), "unread_total": unread},
+            personal_channel(username),
+            using=using
+        )
+
+
+def push_unread_total(user, using=None):
+    """
+    Publishes the unread count of a user to their personal channel once the current
+    transaction commits.
+    """
+
+    unread = NotificationCounter.objects.using(using).filter(user=user).values_list("unread", flat=True).first()
+    enqueue_command_payload_on_commit(
+        "publish",
+        {"unread_total": unread or 0},
+        personal_channel(user.get_username()),
+        using=using
+    )
@@ -0,0 +1,23 @@
+from veryusefulproject.core.read_models import Column, ReadModel
+
+from .models import NotificationInboxItem
+
+# Same shape as the dicts RetrieveAllNotificationsView has always built by hand, read
+# from the inbox of the user, where every notification is stored already rendered.
+NOTIFICATION_LIST = ReadModel(NotificationInboxItem, {
+    "id": "identifier",
+    "notification": Column("text", raw=True),
+    "action": Column("action", raw=True),
+    "created_at": Column("created_at", raw=True),
+    "read": "read",
+})
+
+# Same shape as the dicts RetrieveNotificationsView has always built by hand.
+RECENT_NOTIFICATION_LIST = ReadModel(NotificationInboxItem, {
+    "action": Column("action", raw=True),
+    "created_at": Column("created_at", raw=True),
+    "id": "identifier",
+    "notification": Column("text", raw=True),
+    "affected": Column("affected", raw=True),
+    "read": "read",
+})
@@ -0,0 +1,18 @@
+from veryusefulproject.core.reference_data import ReferenceTable
+
+from .models import EntityType, NotificationAction
+
+notification_actions = ReferenceTable(
+    NotificationAction,
+    "code",
+    queryset=NotificationAction.objects.select_related("entity_type")
+)
+entity_types = ReferenceTable(EntityType, "entity_name")
+
+
+def get_notification_action(code: str) -> NotificationAction:
+    return notification_actions.get(code)
+
+
+def get_entity_type(entity_name: str) -> EntityType:
+    return entity_types.get(entity_name)
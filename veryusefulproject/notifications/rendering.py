@@ -0,0 +1,137 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple
+
+from .models import NotificationObjectActor, NotificationObjectAffectedEntity, NotificationObjectInvolvedEntity
+from .utils import MODEL_MAP, MODEL_UNIQUE_IDENTIFIER_FIELD_MAP, check_placeholder_substring
+
+PLACEHOLDER_REGEX = re.compile(r"\{[^{}]*\}")
+
+ENTITY_MODELS = {
+    "actor": NotificationObjectActor,
+    "affected": NotificationObjectAffectedEntity,
+    "involved": NotificationObjectInvolvedEntity,
+}
+
+
+class Placeholder(NamedTuple):
+    role: str
+    name: str
+    field: str
+
+
+class RenderedNotification(NamedTuple):
+    text: str
+    affected: list
+
+
+@lru_cache(maxsize=1024)
+def compile_template(action_string):
+    """
+    Splits the "action" of a notification action into its literal parts and its
+    placeholders, such as "{actor:User:username}", once per process.
+    """
+
+    tokens = []
+    position = 0
+    for match in PLACEHOLDER_REGEX.finditer(action_string):
+        if match.start() > position:
+            tokens.append(action_string[position:match.start()])
+        tokens.append(Placeholder(*check_placeholder_substring(match.group())))
+        position = match.end()
+
+    if position < len(action_string):
+        tokens.append(action_string[position:])
+
+    return tuple(tokens)
+
+
+def fetch_entity_references(notification_object_ids):
+    """
+    Returns the entities of every notification object by role, in the order they were
+    added, as (entity name, entity ID) pairs. There is one query per role for all the
+    notification objects.
+    """
+
+    references = defaultdict(lambda: {role: [] for role in ENTITY_MODELS})
+    for role, model in ENTITY_MODELS.items():
+        rows = model.objects.filter(notification_object_id__in=notification_object_ids).order_by("id").values_list(
+            "notification_object_id", "entity_type__entity_name", "entity_id"
+        )
+        for notification_object_id, entity_name, entity_id in rows:
+            references[notification_object_id][role].append((entity_name, entity_id))
+
+    return references
+
+
+def fetch_entities(wanted):
+    """
+    Fetches the fields wanted of every entity with one query per model. "wanted" maps
+    every model name to the IDs and the fields wanted of it.
+    """
+
+    entities = {}
+    for name, (ids, fields) in wanted.items():
+        model = MODEL_MAP[name]
+        pk = model._meta.pk
+        rows = model.objects.only(*fields).in_bulk({pk.to_python(id) for id in ids})
+        for id in ids:
+            entities[name, id] = rows.get(pk.to_python(id))
+
+    return entities
+
+
+def render_notifications(items):
+    """
+    Renders the text and the identifiers of the affected entities of many notifications
+    at once. "items" are (notification object ID, action string) pairs.
+
+    The entities named by every notification are collected first and fetched together,
+    so a page of notifications costs a query per role and a query per kind of entity,
+    however many notifications and placeholders it has.
+    """
+
+    items = [(notification_object_id, compile_template(action)) for notification_object_id, action in items]
+    references = fetch_entity_references({notification_object_id for notification_object_id, tokens in items})
+
+    # Placeholders of a role take the entities of that role in turn.
+    wanted = defaultdict(lambda: (set(), set()))
+    resolved = []
+    for notification_object_id, tokens in items:
+        entities = references[notification_object_id]
+        taken = defaultdict(int)
+        parts = []
+        for token in tokens:
+            if isinstance(token, Placeholder):
+                entity_name, entity_id = entities[token.role][taken[token.role]]
+                taken[token.role] += 1
+                wanted[token.name][0].add(entity_id)
+                wanted[token.name][1].add(token.field)
+                token = (token.name, entity_id, token.field)
+            parts.append(token)
+
+        affected = []
+        for entity_name, entity_id in entities["affected"]:
+            field = MODEL_UNIQUE_IDENTIFIER_FIELD_MAP[entity_name]
+            wanted[entity_name][0].add(entity_id)
+            wanted[entity_name][1].add(field)
+            affected.append((entity_name, entity_id, field))
+
+        resolved.append((parts, affected))
+
+    entities = fetch_entities(wanted)
+
+    def value_of(name, entity_id, field):
+        entity = entities[name, entity_id]
+        if entity is None:
+            raise MODEL_MAP[name].DoesNotExist(f"{name} matching id={entity_id!r} does not exist.")
+        return getattr(entity, field)
+
+    return [
+        RenderedNotification(
+            "".join(part if isinstance(part, str) else str(value_of(*part)) for part in parts),
+            [value_of(*reference) for reference in affected],
+        )
+        for parts, affected in resolved
+    ]
@@ -0,0 +1,59 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from veryusefulproject.core.counts import invalidate_counts
+
+from .counters import apply_counts
+from .inbox import fan_out_on_commit
+from .models import EntityType, Notification, NotificationAction, NotificationInboxItem
+from .reference import entity_types, notification_actions
+
+
+@receiver([post_save, post_delete], sender=NotificationAction)
+@receiver([post_save, post_delete], sender=EntityType)
+def invalidate_notification_actions(sender, using=None, **kwargs):
+    notification_actions.invalidate(using=using)
+
+
+@receiver([post_save, post_delete], sender=EntityType)
+def invalidate_entity_types(sender, using=None, **kwargs):
+    entity_types.invalidate(using=using)
+
+
+@receiver(m2m_changed, sender=Notification.notifiers.through)
+@receiver([post_save, post_delete], sender=Notification)
+def invalidate_notification_counts(sender, using=None, action=None, **kwargs):
+    if action is None or action.startswith("post_"):
+        invalidate_counts(sender, using=using)
+
+
+@receiver(m2m_changed, sender=Notification.notifiers.through)
+def update_notification_inboxes(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    """
+    Delivers a notification to the inboxes of the notifiers added to it, and takes it out
+    of the inboxes of the ones removed from it.
+    """
+
+    if action == "post_add":
+        if reverse:
+            for notification_id in pk_set:
+                fan_out_on_commit(notification_id, [instance.pk], using=using)
+        else:
+            fan_out_on_commit(instance.pk, pk_set, using=using)
+    elif action in ("post_remove", "post_clear"):
+        items = NotificationInboxItem.objects.using(using)
+        if reverse:
+            items = items.filter(user=instance)
+            if pk_set is not None:
+                items = items.filter(notification_id__in=pk_set)
+        else:
+            items = items.filter(notification=instance)
+            if pk_set is not None:
+                items = items.filter(user_id__in=pk_set)
+        items.delete()
+        invalidate_counts(NotificationInboxItem, using=using)
+
+
+@receiver(post_delete, sender=NotificationInboxItem)
+def remove_from_notification_counter(sender, instance, using=None, **kwargs):
+    apply_counts([instance.user_id], -1, 0 if instance.read else -1, using=using)
@@ -0,0 +1,23 @@
+from config import celery_app
+
+from .counters import rebuild_notification_counters
+from .inbox import deliver_to_inboxes
+
+
+@celery_app.task()
+def deliver_notification(notification_id, user_ids):
+    """
+    Writes a notification into the inboxes of a batch of its notifiers.
+    """
+
+    return deliver_to_inboxes(notification_id, user_ids)
+
+
+@celery_app.task()
+def reconcile_notification_counters():
+    """
+    Recomputes the notification counters of every user from their inbox, in case any
+    change to an inbox has been missed by them.
+    """
+
+    return rebuild_notification_counters()
@@ -1,3 +1,546 @@
-from django.test import TestCase
+import json
+import time
 
-# Create your tests here.
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from config import celery_app
+from veryusefulproject.core import centrifugo as centrifugo_module
+from veryusefulproject.core.centrifugo import CentrifugoPublisher
+from veryusefulproject.core.fakes import FakeCentrifugoServer
+from veryusefulproject.orders.models import Order, OrderStatus
+
+from .api.views import (
+    MarkNotificationAsReadView,
+    ResyncNotificationsView,
+    RetrieveAllNotificationsView,
+    RetrieveNotificationsView,
+)
+from .counters import read_counts, rebuild_notification_counters
+from .generate_notifications import (
+    create_notification_for_successful_order_creation,
+    create_notifications,
+    create_notifications_on_commit,
+)
+from .inbox import FAN_OUT_BATCH_SIZE, rebuild_inboxes
+from .models import (
+    EntityType,
+    Notification,
+    NotificationAction,
+    NotificationCounter,
+    NotificationInboxItem,
+    NotificationObject,
+    NotificationObjectActor,
+    NotificationObjectAffectedEntity,
+    NotificationObjectInvolvedEntity,
+)
+from .rendering import Placeholder, compile_template, render_notifications
+from .tasks import deliver_notification
+from .utils import return_affected_entities_unique_identifiers
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def recipient():
+    return User.objects.create(username="recipient", nickname="recipient", second_password="x")
+
+
+@pytest.fixture(autouse=True)
+def eager_tasks(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+
+
+@pytest.fixture(scope="module")
+def centrifugo_server():
+    with FakeCentrifugoServer() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def centrifugo(centrifugo_server, monkeypatch):
+    publisher = CentrifugoPublisher(centrifugo_server.api_url, centrifugo_server.api_key)
+    monkeypatch.setattr(centrifugo_module, "_publisher", publisher)
+    yield centrifugo_server
+    publisher.flush()
+    centrifugo_server.requests.clear()
+
+
+def published(centrifugo):
+    centrifugo_module.get_publisher().flush()
+    return [(command["params"]["channel"], command["params"]["data"]) for command in centrifugo.commands]
+
+
+@pytest.fixture
+def notify(recipient, django_capture_on_commit_callbacks):
+    user_type = EntityType.objects.create(entity_name="User")
+    order_type = EntityType.objects.create(entity_name="Order")
+    action = NotificationAction.objects.create(
+        entity_type=order_type,
+        action="{actor:User:username} applied to {affected:Order:url_id}",
+        code="applied",
+        desc="",
+    )
+    status = OrderStatus.objects.create(name="finding-intermediary", step=1, desc="")
+
+    def notify(actor):
+        order = Order.objects.create(status=status)
+        notification_object = NotificationObject.objects.create(action=action)
+        NotificationObjectActor.objects.create(
+            notification_object=notification_object, entity_type=user_type, entity_id=actor.id
+        )
+        NotificationObjectAffectedEntity.objects.create(
+            notification_object=notification_object, entity_type=order_type, entity_id=order.id
+        )
+        notification = Notification.objects.create(notification_object=notification_object)
+        with django_capture_on_commit_callbacks(execute=True):
+            notification.add_notifier(recipient)
+        return notification
+
+    return notify
+
+
+def retrieve(user, **params):
+    request = APIRequestFactory().get("/", params)
+    force_authenticate(request, user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = RetrieveNotificationsView.as_view()(request)
+
+    return response, len(queries)
+
+
+class TestRetrieveNotificationsView:
+    def test_same_output_as_before(self, recipient, notify):
+        actors = [
+            User.objects.create(username=f"actor{index}", nickname=f"actor{index}", second_password="x")
+            for index in range(4)
+        ]
+        for actor in actors:
+            notify(actor)
+
+        response, _ = retrieve(recipient)
+
+        # The dicts the view used to build from model instances
+        expected = [
+            {
+                "action": notification.notification_object.action.code,
+                "created_at": notification.created_at,
+                "id": str(notification.identifier),
+                "notification": notification.notification_object.stringify(),
+                "read": notification.read,
+                "affected": [
+                    str(identifier) for identifier in return_affected_entities_unique_identifiers(notification)
+                ],
+            }
+            for notification in Notification.objects.order_by("-created_at")[:3]
+        ]
+        assert response.data["notifications"] == expected
+        assert response.data["notifications"][0]["notification"].startswith("actor3 applied to ")
+        assert response.data["total"] == 4
+        assert response.data["unread_total"] == 4
+
+    def test_stops_at_the_last_seen_notification(self, recipient, notify):
+        seen = notify(recipient)
+        notify(recipient)
+
+        response, _ = retrieve(recipient, id=str(seen.identifier))
+
+        assert len(response.data["notifications"]) == 1
+
+    def test_query_count_does_not_grow_with_the_page(self, recipient, notify):
+        notify(recipient)
+        _, single = retrieve(recipient)
+
+        notify(recipient)
+        notify(recipient)
+        _, page = retrieve(recipient)
+
+        assert page == single
+
+
+class TestRetrieveAllNotificationsView:
+    def test_pages(self, recipient, notify):
+        for _ in range(3):
+            notify(recipient)
+
+        request = APIRequestFactory().get("/", {"count": 1})
+        force_authenticate(request, user=recipient)
+        view = RetrieveAllNotificationsView.as_view(pagination_class=type(
+            "TwoPerPage", (RetrieveAllNotificationsView.pagination_class,), {"page_size": 2}
+        ))
+        response = view(request)
+
+        assert response.status_code == 200
+        assert response.data["count"] == 3
+        assert response.data["results"]["unread_total"] == 3
+        notifications = response.data["results"]["notifications"]
+        assert [notification["id"] for notification in notifications] == [
+            str(identifier) for identifier in Notification.objects.order_by("-created_at", "-id")
+            .values_list("identifier", flat=True)[:2]
+        ]
+        assert notifications[0]["notification"].startswith("recipient applied to ")
+        assert response.data["next"]
+
+
+def mark_as_read(user, **data):
+    request = APIRequestFactory().patch("/", data, format="json")
+    force_authenticate(request, user=user)
+    return MarkNotificationAsReadView.as_view()(request)
+
+
+class TestNotificationInbox:
+    def test_delivered_once_rendered(self, recipient, notify):
+        notification = notify(recipient)
+
+        item = NotificationInboxItem.objects.get(user=recipient)
+        assert item.notification == notification
+        assert item.identifier == notification.identifier
+        assert item.action == "applied"
+        assert item.text == notification.notification_object.stringify()
+        assert item.created_at == notification.created_at
+        assert not item.read
+
+    def test_fans_out_in_batches(self, recipient, notify, django_capture_on_commit_callbacks, monkeypatch):
+        notification = notify(recipient)
+        batches = []
+        delay = deliver_notification.delay
+        monkeypatch.setattr(deliver_notification, "delay", lambda *args: batches.append(args[1]) or delay(*args))
+        users = User.objects.bulk_create(
+            User(username=f"user{index}", nickname=f"user{index}", second_password="x")
+            for index in range(FAN_OUT_BATCH_SIZE + 1)
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            notification.notifiers.add(*User.objects.filter(username__startswith="user"))
+
+        assert [len(batch) for batch in batches] == [FAN_OUT_BATCH_SIZE, 1]
+        assert NotificationInboxItem.objects.filter(notification=notification).count() == len(users) + 1
+
+    def test_added_from_the_user_side(self, recipient, notify, django_capture_on_commit_callbacks):
+        notification = notify(recipient)
+        other = User.objects.create(username="other", nickname="other", second_password="x")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            other.notification_as_notifiers.add(notification)
+
+        assert NotificationInboxItem.objects.filter(user=other, notification=notification).exists()
+
+    def test_unread_for_new_notifiers(self, recipient, notify, django_capture_on_commit_callbacks):
+        notification = notify(recipient)
+        mark_as_read(recipient, id=str(notification.identifier))
+        other = User.objects.create(username="other", nickname="other", second_password="x")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            notification.notifiers.add(other)
+
+        assert not NotificationInboxItem.objects.get(user=other).read
+        assert read_counts(other.id) == (1, 1)
+
+    def test_removed_notifiers_lose_it(self, recipient, notify):
+        notification = notify(recipient)
+
+        notification.remove_notifier(recipient)
+
+        assert not NotificationInboxItem.objects.filter(user=recipient).exists()
+
+    def test_rebuild(self, recipient, notify):
+        notify(recipient)
+        notify(recipient)
+        NotificationInboxItem.objects.all().delete()
+
+        assert rebuild_inboxes(batch_size=1) == 2
+        assert rebuild_inboxes() == 0
+        assert NotificationInboxItem.objects.filter(user=recipient).count() == 2
+
+    def test_mark_as_read(self, recipient, notify):
+        first = notify(recipient)
+        notify(recipient)
+
+        assert mark_as_read(recipient, id=str(first.identifier)).status_code == 200
+        read = NotificationInboxItem.objects.filter(read=True).values_list("notification", flat=True)
+        assert list(read) == [first.id]
+
+        response = mark_as_read(recipient)
+        assert response.data["message"] == 2
+        assert not NotificationInboxItem.objects.filter(read=False).exists()
+
+
+class TestNotificationCounters:
+    def test_counted_on_delivery(self, recipient, notify):
+        notification = notify(recipient)
+        notify(recipient)
+
+        assert read_counts(recipient.id) == (2, 2)
+
+        # Delivering it again changes nothing
+        deliver_notification(notification.id, [recipient.id])
+        assert read_counts(recipient.id) == (2, 2)
+
+    def test_counts_only_new_deliveries(self, recipient, notify):
+        notification = notify(recipient)
+        other = User.objects.create(username="other", nickname="other", second_password="x")
+
+        assert deliver_notification(notification.id, [recipient.id, other.id]) == 1
+        assert read_counts(recipient.id) == (1, 1)
+        assert read_counts(other.id) == (1, 1)
+
+    def test_counted_down_on_read(self, recipient, notify):
+        first = notify(recipient)
+        notify(recipient)
+        notify(recipient)
+
+        mark_as_read(recipient, id=str(first.identifier))
+        mark_as_read(recipient, id=str(first.identifier))
+        assert read_counts(recipient.id) == (3, 2)
+
+        mark_as_read(recipient)
+        assert read_counts(recipient.id) == (3, 0)
+
+    def test_counted_down_on_removal(self, recipient, notify):
+        read = notify(recipient)
+        notify(recipient)
+        mark_as_read(recipient, id=str(read.identifier))
+
+        read.remove_notifier(recipient)
+
+        assert read_counts(recipient.id) == (1, 1)
+
+    def test_rebuild(self, recipient, notify):
+        notify(recipient)
+        notify(recipient)
+        NotificationCounter.objects.update(total=7, unread=0)
+        other = User.objects.create(username="other", nickname="other", second_password="x")
+        NotificationCounter.objects.create(user=other, total=3, unread=3)
+
+        assert rebuild_notification_counters() == 1
+        assert read_counts(recipient.id) == (2, 2)
+        assert not NotificationCounter.objects.filter(user=other).exists()
+
+    def test_counts_cost_a_single_query(self, recipient, notify):
+        notify(recipient)
+        _, queries = retrieve(recipient, id=str(Notification.objects.get().identifier))
+
+        # The user is authenticated already, so the counters and the page
+        assert queries == 2
+
+
+def resync(user, **params):
+    request = APIRequestFactory().get("/", params)
+    force_authenticate(request, user=user)
+    return ResyncNotificationsView.as_view()(request)
+
+
+class TestNotificationPush:
+    def test_pushed_with_the_unread_count(self, recipient, notify, centrifugo):
+        notify(recipient)
+        response, _ = retrieve(recipient)
+
+        [(channel, data)] = published(centrifugo)
+        assert channel == "recipient#recipient"
+        assert data["unread_total"] == 1
+        assert data["notification"] == json.loads(JSONRenderer().render(response.data["notifications"][0]))
+
+    def test_unread_count_pushed_on_read(self, recipient, notify, centrifugo, django_capture_on_commit_callbacks):
+        notification = notify(recipient)
+        notify(recipient)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_as_read(recipient, id=str(notification.identifier))
+        with django_capture_on_commit_callbacks(execute=True):
+            mark_as_read(recipient)
+
+        assert published(centrifugo)[-2:] == [
+            ("recipient#recipient", {"unread_total": 1}),
+            ("recipient#recipient", {"unread_total": 0}),
+        ]
+
+    def test_resync(self, recipient, notify):
+        seen = notify(recipient)
+        missed = [notify(recipient), notify(recipient)]
+
+        response = resync(recipient, id=str(seen.identifier))
+
+        assert response.data["complete"]
+        assert response.data["total"] == 3
+        assert response.data["unread_total"] == 3
+        assert [notification["id"] for notification in response.data["notifications"]] == [
+            str(notification.identifier) for notification in reversed(missed)
+        ]
+
+    def test_resync_missed_too_many(self, recipient, notify, monkeypatch):
+        monkeypatch.setattr(ResyncNotificationsView, "limit", 1)
+        seen = notify(recipient)
+        notify(recipient)
+        notify(recipient)
+
+        response = resync(recipient, id=str(seen.identifier))
+
+        assert not response.data["complete"]
+        assert len(response.data["notifications"]) == 1
+
+    @pytest.mark.parametrize("identifier", ["not-a-uuid", "00000000-0000-0000-0000-000000000000", None])
+    def test_resync_from_unknown_notification(self, recipient, notify, identifier):
+        notify(recipient)
+
+        response = resync(recipient, **({"id": identifier} if identifier else {}))
+
+        if identifier == "not-a-uuid":
+            assert response.status_code == 400
+        else:
+            assert not response.data["complete"]
+            assert len(response.data["notifications"]) == 1
+
+
+class TestCreateNotifications:
+    @pytest.fixture
+    def order(self, notify):
+        # The fixture creates the entity types, the action and the order status
+        return Order.objects.create(status=OrderStatus.objects.get())
+
+    def test_created_for_every_recipient(self, recipient, order, django_capture_on_commit_callbacks):
+        other = User.objects.create(username="other", nickname="other", second_password="x")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            notification = create_notifications(
+                "applied", [recipient, other.id, recipient], actors=[other], affected=[order]
+            )
+
+        assert set(notification.notifiers.all()) == {recipient, other}
+        assert notification.notification_object.stringify() == f"other applied to {order.url_id}"
+        assert read_counts(recipient.id) == (1, 1)
+        assert read_counts(other.id) == (1, 1)
+
+    def test_on_commit(self, recipient, order, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            create_notifications_on_commit("applied", [recipient], actors=[recipient], affected=[order])
+
+        assert not Notification.objects.exists()
+        for callback in callbacks:
+            callback()
+        assert Notification.objects.get().notifiers.get() == recipient
+
+    def test_order_creation(self, recipient, order):
+        NotificationAction.objects.create(
+            entity_type=EntityType.objects.get(entity_name="Order"),
+            action="Order {affected:Order:url_id} was created",
+            code="order:created",
+            desc="",
+        )
+
+        notification = create_notification_for_successful_order_creation(order, recipient)
+
+        assert notification.notifiers.get() == recipient
+        with pytest.raises(Exception):
+            create_notification_for_successful_order_creation(order.id, recipient)
+
+    def notify_many(self, recipient, order, count, django_capture_on_commit_callbacks):
+        """
+        Notifies as many new users of an event, and returns the notification with the
+        queries and seconds its creation and its delivery took.
+        """
+
+        users = User.objects.bulk_create(
+            User(username=f"user{index}", nickname=f"user{index}", second_password="x") for index in range(count)
+        )
+        create_notifications("applied", [recipient], actors=[recipient], affected=[order])
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks() as callbacks:
+            notification = create_notifications("applied", users, actors=[recipient], affected=[order])
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as delivery, django_capture_on_commit_callbacks(execute=True):
+            for callback in callbacks:
+                callback()
+        delivery_elapsed = time.perf_counter() - start
+
+        return notification, (queries, elapsed), (delivery, delivery_elapsed)
+
+    @pytest.mark.parametrize("count", [10, 1000])
+    def test_query_count_of_many_recipients(self, recipient, order, count, django_capture_on_commit_callbacks):
+        notification, (queries, _), (delivery, _) = self.notify_many(
+            recipient, order, count, django_capture_on_commit_callbacks
+        )
+
+        assert notification.notifiers.count() == count
+        # SQLite splits the notifiers into inserts of at most 499 rows
+        assert len(queries) <= 7 + 2
+        assert len(delivery) <= 25 * -(-count // FAN_OUT_BATCH_SIZE)
+        assert NotificationInboxItem.objects.filter(notification=notification).count() == count
+
+    @pytest.mark.benchmark
+    def test_many_recipients(self, recipient, order, django_capture_on_commit_callbacks):
+        """
+        Benchmark of an event with a thousand recipients.
+        """
+
+        _, (queries, elapsed), (delivery, delivery_elapsed) = self.notify_many(
+            recipient, order, 1000, django_capture_on_commit_callbacks
+        )
+
+        assert elapsed < delivery_elapsed, (
+            f"1000 recipients: {len(queries)} queries in {elapsed * 1000:.1f}ms, "
+            f"delivered with {len(delivery)} queries in {delivery_elapsed * 1000:.1f}ms"
+        )
+
+    def test_compile_template(self):
+        assert compile_template("{actor:User:username} applied to {affected:Order:url_id}.") == (
+            Placeholder("actor", "User", "username"),
+            " applied to ",
+            Placeholder("affected", "Order", "url_id"),
+            ".",
+        )
+
+    def test_invalid_placeholder(self):
+        with pytest.raises(Exception):
+            compile_template("{nobody:User:username} did something")
+
+    def test_placeholders_of_a_role_take_its_entities_in_turn(self, recipient):
+        user_type = EntityType.objects.create(entity_name="User")
+        action = NotificationAction.objects.create(
+            entity_type=user_type,
+            action="{involved:User:username} and {involved:User:nickname} met {actor:User:username}",
+            code="met",
+            desc="",
+        )
+        first = User.objects.create(username="first", nickname="First", second_password="x")
+        second = User.objects.create(username="second", nickname="Second", second_password="x")
+        notification_object = NotificationObject.objects.create(action=action)
+        for user in (first, second):
+            NotificationObjectInvolvedEntity.objects.create(
+                notification_object=notification_object, entity_type=user_type, entity_id=user.id
+            )
+        NotificationObjectActor.objects.create(
+            notification_object=notification_object, entity_type=user_type, entity_id=recipient.id
+        )
+
+        rendered = render_notifications([(notification_object.id, action.action)])
+
+        assert rendered[0].text == "first and Second met recipient"
+        assert rendered[0].affected == []
+
+    @pytest.mark.parametrize("count", [1, 20])
+    def test_page_costs_a_query_per_role_and_model(self, recipient, notify, django_assert_num_queries, count):
+        notifications = [notify(recipient) for _ in range(count)]
+        items = [
+            (notification.notification_object_id, notification.notification_object.action.action)
+            for notification in notifications
+        ]
+
+        # A query per role, then the users and the orders
+        with django_assert_num_queries(5):
+            rendered = render_notifications(items)
+
+        for notification, (text, affected) in zip(notifications, rendered):
+            affected_entity = notification.notification_object.notificationobjectaffectedentity_set.get()
+            order = Order.objects.get(id=affected_entity.entity_id)
+            assert text == f"recipient applied to {order.url_id}"
+            assert affected == [order.url_id]
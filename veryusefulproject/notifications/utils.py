@@ -29,8 +29,17 @@ def return_affected_entities_unique_identifiers(notification):
     Returns a list of unique identifiers of the affected entities of a notification.
     """
 
+    return return_notification_object_affected_unique_identifiers(notification.notification_object)
+
+
+def return_notification_object_affected_unique_identifiers(notification_object):
+    """
+    Returns a list of unique identifiers of the affected entities of a notification 
+    object.
+    """
+
     result = []
-    affected_entities = notification.notification_object.notificationobjectaffectedentity_set.all()
+    affected_entities = notification_object.notificationobjectaffectedentity_set.all()
 
     for affected_entity in affected_entities:
         field = MODEL_UNIQUE_IDENTIFIER_FIELD_MAP[affected_entity.entity_type.entity_name]
@@ -99,55 +108,14 @@ def stringify_notification(notification_object):
     """
     Returns a string representation of a notification.
 
-    How does it work?
-    1. Fetch the action object of a notification.
-    2. Parse the "action" property of the action object by identifying all the 
-    placeholder substrings (strings that start and end with curly braces) and seeing
-    what models need to be queried, in order to compose a string representation of the 
-    notification.
-    3. Query the necessary models, and compose the string representation.
-    4. Return the string representation.
+    The "action" property of the action object of the notification is compiled once into
+    its literal parts and placeholders (strings that start and end with curly braces),
+    which are replaced by the fields of the entities they name. Pages of notifications
+    should be rendered with "rendering.render_notifications" instead, which fetches the
+    entities of every notification of the page together.
     """
-    
-    replacement_strings = []
-
-    actor_count = 0
-    affected_count = 0
-    involved_count = 0
-
-    actor = notification_object.notificationobjectactor_set.all()
-    affected = notification_object.notificationobjectaffectedentity_set.all()
-    involved = notification_object.notificationobjectinvolvedentity_set.all()
-
-    action_string = notification_object.action.action
-    action_string_parsed_result = parse_action_string(action_string)
-    for item in action_string_parsed_result:
-        if item["role"] == "actor":
-            actor = MODEL_MAP[item["name"]].objects.get(id=actor[actor_count].entity_id)
-            value_for_replacement = getattr(actor, item["field"])
-            replacement_strings.append(str(value_for_replacement))
-            actor_count += 1
-
-        elif item["role"] == "affected":
-            affected = MODEL_MAP[item["name"]].objects.get(id=affected[affected_count].entity_id)
-            value_for_replacement = getattr(affected, item["field"])
-            replacement_strings.append(str(value_for_replacement))
-            affected_count += 1
-
-        elif item["role"] == "involved":
-            involved = MODEL_MAP[item["name"]].objects.get(id=involved[involved_count].entity_id)
-            value_for_replacement = getattr(involved, item["field"])
-            replacement_strings.append(str(value_for_replacement))
-            involved_count += 1
-        else:
-            raise Exception("Invalid role.")
-    
-    while action_string.find("{") != -1:
-        action_string = action_string.replace(
-            action_string[
-                action_string.find("{"):action_string.find("}") + 1
-            ],
-            replacement_strings.pop(0)
-        )
-   
-    return action_string
+
+    # The rendering engine needs the models, which need this module.
+    from .rendering import render_notifications
+
+    return render_notifications([(notification_object.id, notification_object.action.action)])[0].text
@@ -36,8 +36,7 @@ class OrderAddressLinkSerializer(DynamicFieldsSerializerMixin, serializers.Model
     def get_address(self, obj):
         addr_obj = obj.address
         context = self.context.get("address", {})
-        serializer = OrderAddressSerializer(addr_obj, **context)
-        return serializer.data
+        return self.serialize_nested(OrderAddressSerializer, addr_obj, **context)
 
 
 class OrderCustomerLinkSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -50,8 +49,7 @@ class OrderCustomerLinkSerializer(DynamicFieldsSerializerMixin, serializers.Mode
     def get_customer(self, obj):
         customer_obj = obj.customer
         context = self.context.get("customer", {})
-        serializer = UserSerializer(customer_obj, **context)
-        return serializer.data
+        return self.serialize_nested(UserSerializer, customer_obj, **context)
 
 
 class OrderIntermediaryLinkSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -63,9 +61,8 @@ class OrderIntermediaryLinkSerializer(DynamicFieldsSerializerMixin, serializers.
 
     def get_intermediary(self, obj):
         intermediary_obj = obj.intermediary
-        context = self.context.get("user", {})
-        serializer = UserSerializer(intermediary_obj, **context)
-        return serializer.data
+        context = self.context.get("intermediary", {})
+        return self.serialize_nested(UserSerializer, intermediary_obj, **context)
 
 
 class OrderDisputeMessageSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -91,8 +88,7 @@ class OrderIntermediaryCandidateSerializer(DynamicFieldsSerializerMixin, seriali
 
     def get_user(self, obj):
         context = self.context.get("user", {})
-        serializer = UserSerializer(obj.user, context=self.context, **context)
-        return serializer.data
+        return self.serialize_nested(UserSerializer, obj.user, context=self.context, **context)
 
 
 class OrderItemSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -110,8 +106,7 @@ class OrderReviewSerializer(DynamicFieldsSerializerMixin, serializers.ModelSeria
     
     def get_user(self, obj):
         context = self.context.get("order_reviews__user", {})
-        serializer = UserSerializer(obj.user, **context)
-        return serializer.data
+        return self.serialize_nested(UserSerializer, obj.user, **context)
 
     
 class OrderStatusSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -146,8 +141,7 @@ class OrderPaymentLinkSerializer(DynamicFieldsSerializerMixin, serializers.Model
     def get_payment(self, obj):
         payment_obj = obj.payment
         context = self.context.get("payment", {})
-        serializer = OrderPaymentSerializer(payment_obj, context=self.context, **context)
-        return serializer.data
+        return self.serialize_nested(OrderPaymentSerializer, payment_obj, context=self.context, **context)
 
 
 class OrderSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer):
@@ -168,72 +162,72 @@ class OrderSerializer(DynamicFieldsSerializerMixin, serializers.ModelSerializer)
 
     def get_orderintermediarycandidate_set(self, obj):
         context = self.context.get("orderintermediarycandidate_set", {})
-        serializer = OrderIntermediaryCandidateSerializer(
+        return self.serialize_nested(
+            OrderIntermediaryCandidateSerializer,
             obj.orderintermediarycandidate_set, 
             many=True, 
             context=self.context,
             **context
         )
-        return serializer.data 
 
     def get_order_items(self, obj):
         context = self.context.get("order_items", {})
-        serializer = OrderItemSerializer(
+        return self.serialize_nested(
+            OrderItemSerializer,
             obj.order_items.all(), 
             many=True, 
             **context
         )
-        return serializer.data
 
     def get_order_reviews(self, obj):
         context = self.context.get("order_reviews", {})
-        serializer = OrderReviewSerializer(
+        return self.serialize_nested(
+            OrderReviewSerializer,
             obj.order_reviews.all(), 
             many=True, 
             **context
         )
-        return serializer.data
 
     def get_address(self, obj):
         if not hasattr(obj, "orderaddresslink"):
             return None
 
-        serializer = OrderAddressLinkSerializer(
+        return self.serialize_nested(
+            OrderAddressLinkSerializer,
             obj.orderaddresslink, 
             fields=["address"], 
             context=self.context
         )
-        return serializer.data
 
     def get_customer(self, obj):
         if not hasattr(obj, "ordercustomerlink"):
             return None
 
-        serializer = OrderCustomerLinkSerializer(
+        return self.serialize_nested(
+            OrderCustomerLinkSerializer,
             obj.ordercustomerlink, 
             fields=['customer'], 
             context=self.context
         )
-        return serializer.data
 
     def get_intermediary(self, obj):
         if not hasattr(obj, "orderintermediarylink"):
             return None
 
-        serializer = OrderIntermediaryLinkSerializer(
+        return self.serialize_nested(
+            OrderIntermediaryLinkSerializer,
             obj.orderintermediarylink, 
             fields=["intermediary"], 
             context=self.context
         )
-        return serializer.data
 
     def get_payment(self, obj):
         if not hasattr(obj, "orderpaymentlink"):
             return None
         
-        serializer = OrderPaymentLinkSerializer(
+        return self.serialize_nested(
+            OrderPaymentLinkSerializer,
             obj.orderpaymentlink, 
             fields=["payment"], 
             context=self.context
         )
-        return serializer.data
@@ -4,7 +4,9 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
+from ..details import get_order_detail, get_order_detail_version
 from ..paginations import ListOrderPagination
+from ..read_models import CUSTOMER_ORDER_LIST, INTERMEDIARY_ORDER_LIST, USER_ORDER_LIST
 from ..tasks import get_product_info, create_order
 from ..utils import return_data_for_finding_intermediary, return_data_for_deposit_status, update_order_additional_info, update_order_intermediary
 
@@ -15,6 +17,7 @@ from veryusefulproject.users.api.authentication import JWTAuthentication
 
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from django.utils.http import parse_etags, quote_etag
 
 
 User = get_user_model()
@@ -79,25 +82,25 @@ class OrderRetrieveView(RetrieveAPIView):
                 data={"reason": "Please provide the ID of an order."}
             )
 
-        order_qs = Order.objects.select_related("status").filter(url_id=order_id).only("status__step")
-        if not order_qs.exists():
+        version = get_order_detail_version(order_id)
+        if version is None:
             return Response(
                 status=status.HTTP_400_BAD_REQUEST, 
                 data={"reason": "There is no order with the provided ID. Please provide the valid ID of an order."}
             )
 
-        status_id = order_qs.first().status.step
+        # Clients polling the status of an order get a 304 until anything shown changes.
+        step, etag = version
+        etag = quote_etag(etag)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = [tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))]
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-        if status_id == 1:
-            data = return_data_for_finding_intermediary(order_id)
-            if not data:
-                return Response(status=status.HTTP_404_NOT_FOUND)
-            return Response(status=status.HTTP_200_OK, data=data)
-        else:
-            data = return_data_for_finding_intermediary(order_id)
-            if not data:
-                return Response(status=status.HTTP_404_NOT_FOUND)
-            return Response(status=status.HTTP_200_OK, data=data)
+        data = get_order_detail(order_id, step)
+        if not data:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_200_OK, data=data, headers=headers)
 
 
 class OrderUpdateView(UpdateAPIView):
@@ -156,10 +159,22 @@ class ListUserOrderView(PaginationHandlerMixin, APIView):
     """
 
     pagination_class = ListOrderPagination
-    serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    def list_orders(self, orders, read_model):
+        """
+        This method returns a page of the given orders, as the given read model lays them
+        out.
+        """
+
+        # It is used to paginate the queryset.
+        page = self.paginate_queryset(read_model.values(orders, *self.paginator.key_fields))
+        if page is not None:
+            return self.get_paginated_response(read_model.render(page)).data
+
+        return read_model.serialize(orders)
+
     def get_user_all_orders(self):
         """
         This method returns all orders of the user.
@@ -168,65 +183,12 @@ class ListUserOrderView(PaginationHandlerMixin, APIView):
         user = self.request.user
         
         # The following queryset selects all orders of the user.
-        orders = Order.objects.select_related(
-            "status", 
-            "orderintermediarylink__intermediary", 
-            "ordercustomerlink__customer"
-        ).prefetch_related(
-            "order_items"
-        ).filter(
+        orders = Order.objects.filter(
             Q(ordercustomerlink__customer__username=user.get_username()) | 
             Q(orderintermediarylink__intermediary__username=user.get_username())
-        ).only(
-            "status__step", 
-            "ordercustomerlink__customer__username", 
-            "orderintermediarylink__intermediary__username", 
-            "url_id", 
-            "created_at"
         )
-        
-        # It is used to paginate the queryset.
-        page = self.paginate_queryset(orders)
-        if page is not None:
-            serializer = self.get_paginated_response(
-                self.serializer_class(
-                    page, 
-                    many=True, 
-                    fields=[
-                        "status", 
-                        "customer", 
-                        "intermediary", 
-                        "order_items", 
-                        "url_id", 
-                        "created_at"
-                    ], 
-                    context={
-                        "intermediary": {"fields": ["username"]}, 
-                        "customer": {"fields": ["username"]}, 
-                        "order_items": {"fields": ['name']}
-                    }
-                ).data
-            )
 
-        else:
-            serializer = self.serializer_class(
-                orders, 
-                many=True, 
-                fields=[
-                    "status", 
-                    "customer", 
-                    "intermediary", 
-                    "order_items", 
-                    "url_id", 
-                    "created_at"
-                ], 
-                context={
-                    "intermediary": {"fields": ["username"]}, 
-                    "customer": {"fields": ["username"]}, 
-                    "order_items": {"fields": ["name"]}}
-            )
-
-        return serializer.data
+        return self.list_orders(orders, USER_ORDER_LIST)
 
     def get_user_customer_orders(self):
         """
@@ -236,58 +198,11 @@ class ListUserOrderView(PaginationHandlerMixin, APIView):
         user = self.request.user
         
         # The following queryset selects all orders of the user as a customer.
-        orders = Order.objects.select_related(
-            "status", 
-            "ordercustomerlink__customer"
-        ).prefetch_related(
-            "order_items"
-        ).filter(
+        orders = Order.objects.filter(
             ordercustomerlink__customer__username=user.get_username()
-        ).only(
-            "status__step", 
-            "ordercustomerlink__customer__username", 
-            "url_id", 
-            "created_at"
         )
-        
-        # It is used to paginate the queryset.
-        page = self.paginate_queryset(orders)
-        if page is not None:
-            serializer = self.get_paginated_response(
-                self.serializer_class(
-                    page, 
-                    many=True, 
-                    fields=[
-                        "status", 
-                        "customer", 
-                        "order_items", 
-                        "url_id", 
-                        "created_at"
-                    ], 
-                    context={
-                        "customer": {"fields": ["username"]}, 
-                        "order_items": {"fields": ["name"]}
-                    }
-                ).data
-            )
-        else:
-            serializer = self.serializer_class(
-                orders, 
-                many=True, 
-                fields=[
-                    "status", 
-                    "customer", 
-                    "order_items", 
-                    "url_id", 
-                    "created_at"
-                ], 
-                context={
-                    "customer": {"fields": ["username"]}, 
-                    "order_items": {"fields": ["name"]}
-                }
-            )
 
-        return serializer.data
+        return self.list_orders(orders, CUSTOMER_ORDER_LIST)
 
     def get_user_intermediary_orders(self):
         """
@@ -297,58 +212,11 @@ class ListUserOrderView(PaginationHandlerMixin, APIView):
         user = self.request.user
         
         # The following queryset selects all orders of the user as an intermediary.
-        orders = Order.objects.select_related(
-            "status", 
-            "orderintermediarylink__intermediary"
-        ).prefetch_related(
-            "order_items"
-        ).filter(
+        orders = Order.objects.filter(
             orderintermediarylink__intermediary__username=user.get_username()
-        ).only(
-            "status__step", 
-            "orderintermediarylink__intermediary__username", 
-            "url_id", 
-            "created_at"
         )
-        
-        # It is used to paginate the queryset.
-        page = self.paginate_queryset(orders)
-        if page is not None:
-            serializer = self.get_paginated_response(
-                self.serializer_class(
-                    page, 
-                    many=True, 
-                    fields=[
-                        "status", 
-                        "intermediary", 
-                        "order_items", 
-                        "url_id", 
-                        "created_at"
-                    ], 
-                    context={
-                        "intermediary": {"fields": ["username"]}, 
-                        "order_items": {"fields": ['name']}
-                    }
-                ).data
-            )
-        else:
-            serializer = self.serializer_class(
-                orders, 
-                many=True, 
-                fields=[
-                    "status", 
-                    "intermediary", 
-                    "order_items", 
-                    "url_id", 
-                    "created_at"
-                ], 
-                context={
-                    "intermediary": {"fields": ["username"]}, 
-                    "order_items": {"fields": ['name']}
-                }
-            )
 
-        return serializer.data
+        return self.list_orders(orders, INTERMEDIARY_ORDER_LIST)
 
     def get(self, request):
         """
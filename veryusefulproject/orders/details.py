@@ -0,0 +1,44 @@
+from hashlib import blake2b
+
+from django.db.models import Max
+
+from .models import Order
+from .utils import return_data_for_deposit_status, return_data_for_finding_intermediary
+
+# What an order looks like at each step of its status. Orders past the steps listed
+# here are shown like orders waiting for their deposit.
+ORDER_DETAIL_PROJECTIONS = {
+    1: return_data_for_finding_intermediary,
+}
+DEFAULT_ORDER_DETAIL_PROJECTION = return_data_for_deposit_status
+
+
+def get_order_detail_version(order_id):
+    """
+    Returns the status step of an order and the ETag of its detail with a single small
+    query, or None if there is no such order.
+
+    The ETag covers the order, whose "modified_at" is bumped by every change to the
+    rows shown with it, and the ratings of its candidates, which change on their own.
+    """
+
+    row = Order.objects.filter(url_id=order_id).annotate(
+        ratings_modified_at=Max("orderintermediarycandidate__user__reputation__modified_at")
+    ).values_list("status__step", "modified_at", "ratings_modified_at").first()
+
+    if row is None:
+        return None
+
+    step, modified_at, ratings_modified_at = row
+    projection = ORDER_DETAIL_PROJECTIONS.get(step, DEFAULT_ORDER_DETAIL_PROJECTION)
+    version = f"{order_id}:{step}:{projection.__name__}:{modified_at.isoformat()}:{ratings_modified_at}"
+    return step, blake2b(version.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_order_detail(order_id, step):
+    """
+    Serializes an order with the projection of its status step.
+    """
+
+    projection = ORDER_DETAIL_PROJECTIONS.get(step, DEFAULT_ORDER_DETAIL_PROJECTION)
+    return projection(order_id)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from veryusefulproject.orders.reputation import rebuild_user_reputations
+
+
+class Command(BaseCommand):
+    help = "Recomputes the rating totals and averages of every user from their order reviews."
+
+    def handle(self, *args, **options):
+        count = rebuild_user_reputations()
+        self.stdout.write(f"Rebuilt the reputation of {count} users.")
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.9 on 2026-10-18 20:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_user_reputations(apps, schema_editor):
+    OrderReview = apps.get_model("orders", "OrderReview")
+    UserReputation = apps.get_model("orders", "UserReputation")
+
+    totals = OrderReview.objects.values("user").annotate(
+        rating_sum=models.Sum("rating"),
+        rating_count=models.Count("id"),
+    ).order_by()
+
+    UserReputation.objects.bulk_create([
+        UserReputation(
+            user_id=row["user"],
+            rating_sum=row["rating_sum"],
+            rating_count=row["rating_count"],
+            average_rating=row["rating_sum"] / row["rating_count"],
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0002_remove_role_users_user_roles"),
+        ("orders", "0022_alter_ordertrackingnumber_order_item"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserReputation",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="reputation",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("rating_sum", models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ("rating_count", models.PositiveIntegerField(default=0)),
+                ("average_rating", models.DecimalField(decimal_places=4, default=None, max_digits=7, null=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_user_reputations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.1.9 on 2026-10-18 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0023_userreputation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["status", "-created_at", "-id"], name="order_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ordercustomerlink",
+            index=models.Index(fields=["customer", "order"], name="order_customer_link_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="orderintermediarylink",
+            index=models.Index(fields=["intermediary", "order"], name="order_intermediary_link_idx"),
+        ),
+    ]
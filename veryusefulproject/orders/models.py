@@ -74,7 +74,10 @@ class Order(BaseModel):
 
     class Meta:
         indexes = [
-            models.Index(fields=['url_id'])
+            models.Index(fields=['url_id']),
+            # Lists of the orders at one step, newest first, such as the open orders of the
+            # marketplace, read only the part of the index of that step.
+            models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
         ]
 
 
@@ -183,6 +186,20 @@ class OrderReview(BaseModel):
         self.content = escape(content)
 
 
+class UserReputation(models.Model):
+    """
+    Running totals of the ratings a user has received in order reviews. The signals of
+    OrderReview keep them up to date, so that listings read the average rating of a
+    user instead of averaging every review of the user on each request.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="reputation")
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=7, decimal_places=4, null=True, default=None)
+    modified_at = models.DateTimeField(auto_now=True)
+
+
 class OrderAddressLink(BaseModel):
     order = models.OneToOneField(Order, on_delete=models.CASCADE)
     address = models.ForeignKey(OrderAddress, on_delete=models.CASCADE)
@@ -197,7 +214,19 @@ class OrderCustomerLink(BaseModel):
     order = models.OneToOneField(Order, on_delete=models.CASCADE)
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # The orders of a customer are found from the index alone.
+            models.Index(fields=['customer', 'order'], name='order_customer_link_idx'),
+        ]
+
 
 class OrderIntermediaryLink(BaseModel):
     order = models.OneToOneField(Order, on_delete=models.CASCADE)
     intermediary = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            # The orders of an intermediary are found from the index alone.
+            models.Index(fields=['intermediary', 'order'], name='order_intermediary_link_idx'),
+        ]
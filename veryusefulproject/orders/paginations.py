@@ -1,5 +1,5 @@
-from veryusefulproject.core.paginations import BasicPagination
+from veryusefulproject.core.paginations import KeysetPagination
 
 
-class ListOrderPagination(BasicPagination):
+class ListOrderPagination(KeysetPagination):
     page_size = 20
@@ -0,0 +1,22 @@
+from veryusefulproject.core.read_models import Group, ReadModel, Related
+
+from .models import Order
+
+# Same shape as OrderSerializer with the "customer", "intermediary" and "order_items"
+# contexts that ListUserOrderView has always passed.
+USER_ORDER_LIST = ReadModel(Order, {
+    "status": "status__step",
+    "customer": Group({
+        "customer": Group({"username": "username"}, relation="customer"),
+    }, relation="ordercustomerlink"),
+    "intermediary": Group({
+        "intermediary": Group({"username": "username"}, relation="intermediary"),
+    }, relation="orderintermediarylink"),
+    "order_items": Related("order_items", {"name": "name"}),
+    "url_id": "url_id",
+    "created_at": "created_at",
+})
+
+CUSTOMER_ORDER_LIST = USER_ORDER_LIST.only("status", "customer", "order_items", "url_id", "created_at")
+
+INTERMEDIARY_ORDER_LIST = USER_ORDER_LIST.only("status", "intermediary", "order_items", "url_id", "created_at")
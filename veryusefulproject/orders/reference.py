@@ -0,0 +1,18 @@
+from veryusefulproject.core.reference_data import ReferenceTable
+
+from .models import BusinessUrl, OrderStatus
+
+order_statuses = ReferenceTable(OrderStatus, "step")
+business_urls = ReferenceTable(
+    BusinessUrl,
+    "id",
+    queryset=BusinessUrl.objects.select_related("business", "currency")
+)
+
+
+def get_order_status(step: int) -> OrderStatus:
+    return order_statuses.get(step)
+
+
+def get_business_urls() -> list[BusinessUrl]:
+    return business_urls.all()
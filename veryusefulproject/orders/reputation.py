@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import OrderReview, UserReputation
+
+
+def apply_rating(user_id, rating_sum, rating_count, using=None):
+    """
+    Adds "rating_sum" and "rating_count", either of which may be negative, to the
+    reputation of a user. The row is locked while it is changed, so that concurrent
+    reviews of the same user don't overwrite each other.
+    """
+
+    with transaction.atomic(using=using):
+        reputation, _ = UserReputation.objects.using(using).select_for_update().get_or_create(user_id=user_id)
+        reputation.rating_sum += rating_sum
+        reputation.rating_count += rating_count
+        reputation.average_rating = (
+            reputation.rating_sum / reputation.rating_count if reputation.rating_count > 0 else None
+        )
+        reputation.save(using=using)
+
+
+def rebuild_user_reputations(using=None):
+    """
+    Recomputes the reputation of every user from their reviews. Returns the number of
+    users who have been reviewed.
+    """
+
+    totals = OrderReview.objects.using(using).values("user").annotate(
+        rating_sum=Sum("rating"),
+        rating_count=Count("id"),
+    ).order_by()
+
+    reputations = [
+        UserReputation(
+            user_id=row["user"],
+            rating_sum=row["rating_sum"],
+            rating_count=row["rating_count"],
+            average_rating=Decimal(row["rating_sum"]) / row["rating_count"],
+        )
+        for row in totals
+    ]
+
+    with transaction.atomic(using=using):
+        UserReputation.objects.using(using).all().delete()
+        UserReputation.objects.using(using).bulk_create(reputations, batch_size=1000)
+
+    return len(reputations)
@@ -0,0 +1,150 @@
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from .models import BusinessUrl
+from .reference import business_urls
+
+
+class Retailer(NamedTuple):
+    """
+    A kind of business whose item links can be recognized. "link_regex" must capture the
+    ID of an item in a group named "item_id", and "option_params" names the parameters
+    of the query string that select an option of the item, if the item ID doesn't.
+    """
+
+    name: str
+    link_regex: re.Pattern
+    option_params: tuple = ()
+
+
+class Route(NamedTuple):
+    retailer: str
+    business_url: BusinessUrl
+    item_id: str
+    options: tuple = ()
+
+    @property
+    def currency(self):
+        return self.business_url.currency
+
+
+AMAZON_LINK_REGEX = re.compile(
+    r"^(?:https?://)?(?:[a-zA-Z0-9\-]+\.)?(?:amazon|amzn){1}\.(com\.au|"
+    r"com|co\.uk|co\.jp|de|fr|es|in)\/(gp/(?:product|offer-listing|customer-media/"
+    r"product-gallery)/|exec/obidos/tg/detail/-/|o/ASIN/|dp/|(?:[A-Za-z0-9\-]+)/dp/"
+    r")?(?P<item_id>[0-9A-Za-z]{10})"
+)
+EBAY_LINK_REGEX = re.compile(
+    r"^(?:https?://)?(?:[a-zA-Z0-9\-]+\.)?ebay\.(?:com|co\.uk|de|fr|es|it|com\.au)"
+    r"\/itm\/(?:[^/?#]+\/)?(?P<item_id>\d+)"
+)
+
+RETAILERS = [
+    # Every variation of an item on Amazon has an ASIN of its own.
+    Retailer("amazon", AMAZON_LINK_REGEX),
+    Retailer("ebay", EBAY_LINK_REGEX, ("var",)),
+]
+
+
+def register_retailer(name, link_regex, option_params=()):
+    """
+    Makes the links of another retailer resolvable. Its business URLs still have to
+    exist in the database.
+    """
+
+    RETAILERS.append(Retailer(name, re.compile(link_regex), tuple(option_params)))
+
+
+def normalize_hostname(hostname):
+    hostname = (hostname or "").lower().rstrip(".")
+    if hostname.startswith("www."):
+        hostname = hostname[4:]
+
+    return hostname
+
+
+def hostname_of(url):
+    if "://" not in url:
+        url = "https://" + url
+
+    try:
+        return normalize_hostname(urlsplit(url).hostname)
+    except ValueError:
+        return ""
+
+
+def get_selected_options(url, option_params):
+    if not option_params:
+        return ()
+
+    query = urlsplit(url if "://" in url else "https://" + url).query
+    return tuple(sorted(
+        (name, value) for name, value in parse_qsl(query) if name in option_params
+    ))
+
+
+def build_hostname_index(rows):
+    """
+    Maps the hostname of every business URL to the business URL. When several share a
+    hostname, the one whose currency ticker comes last wins, as it always has.
+    """
+
+    index = {}
+    for businessUrl in sorted(
+        rows,
+        key=lambda businessUrl: businessUrl.currency.ticker if businessUrl.currency else ""
+    ):
+        hostname = hostname_of(businessUrl.url)
+        if hostname:
+            index[hostname] = businessUrl
+
+    return index
+
+
+def get_hostname_index():
+    return business_urls.derived("hostname_index", build_hostname_index)
+
+
+def find_business_url(hostname, index=None):
+    """
+    Looks up the business URL of a hostname, dropping one subdomain at a time, so that
+    e.g. "smile.amazon.co.uk" resolves to the business URL of "amazon.co.uk".
+    """
+
+    if index is None:
+        index = get_hostname_index()
+
+    hostname = normalize_hostname(hostname)
+    while hostname:
+        if hostname in index:
+            return index[hostname]
+        hostname = hostname.partition(".")[2]
+
+    return None
+
+
+def resolve_url(url) -> Optional[Route]:
+    """
+    Returns the retailer, the business URL, the item ID and the selected options of a
+    link to an item, or None if the link doesn't point to an item of any known business.
+    """
+
+    if not url:
+        return None
+
+    for retailer in RETAILERS:
+        result = retailer.link_regex.search(url)
+        if not result:
+            continue
+
+        businessUrl = find_business_url(hostname_of(url))
+        if businessUrl:
+            return Route(
+                retailer.name,
+                businessUrl,
+                result.group("item_id"),
+                get_selected_options(url, retailer.option_params)
+            )
+
+    return None
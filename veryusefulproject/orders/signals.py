@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from veryusefulproject.core.counts import invalidate_counts
+from veryusefulproject.currencies.models import FiatCurrency
+from veryusefulproject.payments.models import OrderPaymentInvoice
+
+from .models import (
+    Business,
+    BusinessUrl,
+    Order,
+    OrderAddressLink,
+    OrderCustomerLink,
+    OrderIntermediaryCandidate,
+    OrderIntermediaryLink,
+    OrderItem,
+    OrderPaymentLink,
+    OrderReview,
+    OrderStatus,
+)
+from .reference import business_urls, order_statuses
+from .reputation import apply_rating
+from .utils import touch_order
+
+
+@receiver([post_save, post_delete], sender=OrderStatus)
+def invalidate_order_statuses(sender, using=None, **kwargs):
+    order_statuses.invalidate(using=using)
+
+
+# Business URLs are kept together with their business and currency.
+@receiver([post_save, post_delete], sender=BusinessUrl)
+@receiver([post_save, post_delete], sender=Business)
+@receiver([post_save, post_delete], sender=FiatCurrency)
+def invalidate_business_urls(sender, using=None, **kwargs):
+    business_urls.invalidate(using=using)
+
+
+# The lists of orders are filtered by these rows.
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=OrderCustomerLink)
+@receiver([post_save, post_delete], sender=OrderIntermediaryLink)
+def invalidate_order_counts(sender, using=None, **kwargs):
+    invalidate_counts(sender, using=using)
+
+
+@receiver(pre_save, sender=OrderReview)
+def remember_previous_rating(sender, instance, raw=False, using=None, **kwargs):
+    instance._previous_rating = None
+    if raw or instance.pk is None:
+        return
+
+    instance._previous_rating = sender.objects.using(using).filter(pk=instance.pk).values_list(
+        "user_id", "rating"
+    ).first()
+
+
+@receiver(post_save, sender=OrderReview)
+def add_rating_to_reputation(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+
+    rating = Decimal(str(instance.rating))
+    previous = getattr(instance, "_previous_rating", None)
+    if previous:
+        previous_user_id, previous_rating = previous
+        if previous_user_id == instance.user_id and previous_rating == rating:
+            return
+        apply_rating(previous_user_id, -previous_rating, -1, using=using)
+
+    apply_rating(instance.user_id, rating, 1, using=using)
+
+
+@receiver(post_delete, sender=OrderReview)
+def remove_rating_from_reputation(sender, instance, using=None, **kwargs):
+    apply_rating(instance.user_id, -Decimal(str(instance.rating)), -1, using=using)
+
+
+# The detail of an order shows these rows, so changing them changes the order.
+@receiver([post_save, post_delete], sender=OrderItem)
+@receiver([post_save, post_delete], sender=OrderIntermediaryCandidate)
+@receiver([post_save, post_delete], sender=OrderAddressLink)
+@receiver([post_save, post_delete], sender=OrderPaymentLink)
+@receiver([post_save, post_delete], sender=OrderCustomerLink)
+@receiver([post_save, post_delete], sender=OrderIntermediaryLink)
+def touch_order_of_related_row(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        touch_order(instance.order_id, using=using)
+
+
+@receiver([post_save, post_delete], sender=OrderPaymentInvoice)
+def touch_order_of_invoice(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+
+    order_id = Order.objects.using(using).filter(orderpaymentlink__payment_id=instance.payment_id).values_list(
+        "id", flat=True
+    ).first()
+    if order_id:
+        touch_order(order_id, using=using)
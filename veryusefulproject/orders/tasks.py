@@ -1,41 +1,51 @@
 import re
-import requests
 import json
 from decimal import Decimal
+from uuid import uuid4
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import transaction
 
 from config import celery_app
-from veryusefulproject.currencies.models import CryptoCurrency, FiatCurrency
 
-from .models import Order, OrderAddress, OrderStatus, OrderAddressLink, OrderCustomerLink, OrderPaymentLink
-from .utils import add_order_item, check_if_valid_url, generate_hash_hex, verify_item_hash
+from .models import Order, OrderAddress, OrderAddressLink, OrderCustomerLink, OrderPaymentLink
+from .reference import get_order_status
+from .routing import resolve_url
+from .utils import add_order_items, generate_hash_hex, verify_item_hash
 
-from veryusefulproject.core.utils import create_command_payload_and_send
+from veryusefulproject.core.parser import get_parser_client
+from veryusefulproject.core.utils import enqueue_command_payload, enqueue_command_payload_on_commit, release_cache_lock
+from veryusefulproject.currencies.reference import get_crypto_currency, get_fiat_currency
 from veryusefulproject.currencies.utils import convert_european_notation_to_american_notation, convert_price_to_dollar
 from veryusefulproject.notifications.generate_notifications import create_notification_for_successful_order_creation
 from veryusefulproject.payments.models import OrderPayment
 
 User = get_user_model()
 
+# Seconds a request waits before checking again whether a running scrape has finished
+PRODUCT_INFO_WAIT_COUNTDOWN = 1
 
-@celery_app.task()
-def get_product_info(url, username):
+
+def product_info_cache_key(route):
     """
-    This function gets the product information from the URL and sends it to the user
-    via WebSocket.
+    Builds the key of the cached information of a product from the business, the ID of
+    the item and the options selected through the link, so that everyone pasting a link
+    to the same product shares one scrape.
     """
 
-    ## TODO: At every stage, send the information to a user via Websocket of the current 
-    ## process of the parsing of a product.
+    options = "&".join(f"{name}={value}" for name, value in route.options)
+    return f"product-info:{route.business_url.id}:{route.item_id}:{options}"
 
-    businessUrl = check_if_valid_url(url)
-    if not businessUrl:
-        raise Exception("This URL is invalid")
 
-    resp = requests.post("http://parser:3000/", json={"url": url})
-    json_data = resp.json()
+def scrape_product_info(url, businessUrl):
+    """
+    Scrapes the information of a product through the parser, and returns it without
+    the fields specific to a single request of a user.
+    """
+
+    json_data = get_parser_client().get_product_info(url)
 
     ## TODO: Separate the following code excerpt from this into new functions in .utils, 
     ## since the code below is only catering to the parsing information of Amazon 
@@ -60,17 +70,59 @@ def get_product_info(url, username):
         if len(json_data['options'][option]) < 1:
             json_data['options'].pop(option)
 
-    price_in_dollar = convert_price_to_dollar(url, price)
+    price_in_dollar = convert_price_to_dollar(businessUrl, price)
     if price_in_dollar:
         json_data["price_in_dollar"] = price_in_dollar
     elif not price_in_dollar and currency_symbol.group() != "$":
         raise Exception("Failed to convert the price of an item to dollar")
 
+    return json_data
+
+
+@celery_app.task(bind=True, max_retries=None)
+def get_product_info(self, url, username):
+    """
+    This function gets the product information from the URL and sends it to the user
+    via WebSocket.
+
+    The information is cached per product for PRODUCT_INFO_CACHE_TIMEOUT seconds. While
+    a product is being scraped, other requests for the same product don't start a scrape
+    of their own, but retry until the result of the running one is in the cache.
+    """
+
+    ## TODO: At every stage, send the information to a user via Websocket of the current 
+    ## process of the parsing of a product.
+
+    route = resolve_url(url)
+    if not route:
+        raise Exception("This URL is invalid")
+    businessUrl = route.business_url
+
+    cache_key = product_info_cache_key(route)
+    json_data = cache.get(cache_key)
+
+    if json_data is None:
+        lock_key = f"{cache_key}:lock"
+        token = uuid4().hex
+        if not cache.add(lock_key, token, timeout=settings.PRODUCT_INFO_SCRAPE_TIMEOUT):
+            if self.request.retries * PRODUCT_INFO_WAIT_COUNTDOWN >= settings.PRODUCT_INFO_SCRAPE_TIMEOUT:
+                raise Exception("Timed out waiting for the information of the product")
+            raise self.retry(countdown=PRODUCT_INFO_WAIT_COUNTDOWN)
+
+        try:
+            json_data = scrape_product_info(url, businessUrl)
+            cache.set(cache_key, json_data, timeout=settings.PRODUCT_INFO_CACHE_TIMEOUT)
+        finally:
+            # The lock may have expired and been taken by another scrape in the meantime.
+            release_cache_lock(lock_key, token)
+
+    # The link is part of the hash, and may differ from the one the product was cached with
+    json_data['url'] = url
     json_data["hash"] = generate_hash_hex(json.dumps(json_data).encode("utf-8"))
     json_data["amount"] = 1
 
     channel_name = "{}#{}".format(username, username)
-    create_command_payload_and_send("publish", {"item": json_data}, channel_name)
+    enqueue_command_payload("publish", {"item": json_data}, channel_name)
 
 
 @celery_app.task()
@@ -81,14 +133,23 @@ def create_order(data, username):
     """
     user = User.objects.get(username=username)
     channel_name = "{}#{}".format(username, username)
-    create_command_payload_and_send(
+    enqueue_command_payload(
         "publish", 
         {"current_status": "0"}, 
         channel_name
     )
 
     if not data['value']:
-        create_command_payload_and_send(
+        enqueue_command_payload(
+            "publish", 
+            {"current_status": "-1"}, 
+            channel_name
+        )
+        return
+
+    # Check if the data of any item is tampered with before touching the database
+    if not all(verify_item_hash(item.copy()) for item in data['value']):
+        enqueue_command_payload(
             "publish", 
             {"current_status": "-1"}, 
             channel_name
@@ -98,11 +159,11 @@ def create_order(data, username):
     addr = data['shippingAddress']
     with transaction.atomic():
         payment = OrderPayment(
-            fiat_currency=FiatCurrency.objects.get(ticker="USD"),
+            fiat_currency=get_fiat_currency("USD"),
             additional_cost=Decimal(data['additionalCost'])
         )
         payment.save()
-        payment.payment_methods.add(CryptoCurrency.objects.get(ticker="BTC"))
+        payment.payment_methods.add(get_crypto_currency("BTC"))
 
         shipping_address, created = OrderAddress.objects.get_or_create(
             name=addr["recipient_name"],
@@ -114,7 +175,7 @@ def create_order(data, username):
             country=addr["country"]
         )
         order = Order.objects.create(
-            status=OrderStatus.objects.get(step=1),
+            status=get_order_status(1),
             additional_request=data['additionalRequest'],
         )
 
@@ -128,25 +189,16 @@ def create_order(data, username):
         )
         OrderPaymentLink.objects.create(order=order, payment=payment)
 
-        create_command_payload_and_send(
+        # Status updates made inside the transaction are only delivered once it commits.
+        enqueue_command_payload_on_commit(
             "publish", 
             {"current_status": "1"}, 
             channel_name
         )
 
-        for item in data['value']:
-            # Check if the data of each item is tampered with
-            if verify_item_hash(item.copy()):
-                add_order_item(order, item)
-            else:
-                create_command_payload_and_send(
-                    "publish", 
-                    {"current_status": "-1"}, 
-                    channel_name
-                )
-                return
-
-        create_command_payload_and_send(
+        add_order_items(order, data['value'])
+
+        enqueue_command_payload_on_commit(
             "publish", 
             {"current_status": "2"}, 
             channel_name
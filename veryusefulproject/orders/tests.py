@@ -1,3 +1,629 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+import json
+import time
+
+import pytest
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from veryusefulproject.core.query_plans import assert_uses_indexes, supports_plans
+from veryusefulproject.currencies.models import FiatCurrency
+from veryusefulproject.orders.models import (
+    Business,
+    BusinessUrl,
+    Order,
+    OrderCustomerLink,
+    OrderIntermediaryLink,
+    OrderItem,
+    OrderIntermediaryCandidate,
+    OrderItemSeller,
+    OrderReview,
+    OrderStatus,
+    UserReputation,
+)
+from veryusefulproject.orders import tasks
+from veryusefulproject.orders.api.serializers import OrderSerializer
+from veryusefulproject.orders.api.views import ListUserOrderView, OrderRetrieveView
+from veryusefulproject.orders.read_models import CUSTOMER_ORDER_LIST, INTERMEDIARY_ORDER_LIST, USER_ORDER_LIST
+from veryusefulproject.orders.routing import resolve_url
+from veryusefulproject.orders.utils import (
+    add_order_item,
+    add_order_items,
+    return_data_for_finding_intermediary,
+    verify_item_hash,
+)
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture
+def usd():
+    return FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+
+
+@pytest.fixture
+def amazon(usd):
+    business = Business.objects.create(ticker="AMZN", name="Amazon", desc="")
+    return BusinessUrl.objects.create(business=business, currency=usd, url="https://www.amazon.com/", desc="")
+
+
+@pytest.fixture
+def order_status():
+    return OrderStatus.objects.create(name="finding-intermediary", step=1, desc="")
+
+
+@pytest.fixture
+def order(order_status):
+    return Order.objects.create(status=order_status)
+
+
+def make_cart(size):
+    return [
+        {
+            "url": f"https://www.amazon.com/dp/B0{index:08d}",
+            "brand": f"Brand {index % 5}",
+            "imageurl": "https://m.media-amazon.com/images/I/item.jpg",
+            "productName": f"Item {index}",
+            "amount": 1,
+            "price": "19.99",
+            "options": {"Color": [{"name": "Red", "selectedOption": True}, {"name": "Blue"}]},
+        }
+        for index in range(size)
+    ]
+
+
+class TestAddOrderItems:
+    def test_creates_items(self, amazon, order):
+        cart = make_cart(3)
+
+        items = add_order_items(order, cart)
+
+        assert len(items) == 3
+        assert OrderItem.objects.filter(order=order, website_domain=amazon).count() == 3
+        assert OrderItem.objects.get(name="Item 0").options == {"Color": {"name": "Red", "selectedOption": True}}
+
+    def test_reuses_existing_sellers(self, amazon, order):
+        seller = OrderItemSeller.objects.create(name="Brand 0")
+
+        add_order_items(order, make_cart(10))
+
+        assert OrderItemSeller.objects.count() == 5
+        assert OrderItem.objects.filter(seller=seller).count() == 2
+
+    def test_unknown_business(self, amazon, order):
+        cart = make_cart(1)
+        cart[0]["url"] = "https://www.example.com/item/1"
+
+        with pytest.raises(Exception):
+            add_order_items(order, cart)
+
+    def test_query_count_of_a_50_item_cart(self, amazon, order):
+        """
+        Benchmark of the bulk path against adding the items of a 50-item cart one by one.
+        """
+
+        with CaptureQueriesContext(connection) as per_item:
+            for item in make_cart(50):
+                add_order_item(order, item)
+
+        OrderItem.objects.all().delete()
+        OrderItemSeller.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as bulk:
+            add_order_items(order, make_cart(50))
+
+        assert len(per_item) >= 100
+        assert len(bulk) <= 3
+        assert sum(item.price for item in OrderItem.objects.filter(order=order)) == Decimal("19.99") * 50
+
+
+class TestResolveUrl:
+    def test_amazon_item(self, amazon):
+        route = resolve_url("https://www.amazon.com/Some-Product/dp/B012345678?th=1")
+
+        assert route.retailer == "amazon"
+        assert route.business_url == amazon
+        assert route.item_id == "B012345678"
+        assert route.currency.ticker == "USD"
+
+    def test_subdomain(self, amazon):
+        assert resolve_url("https://smile.amazon.com/dp/B012345678").business_url == amazon
+
+    def test_unknown_business(self, amazon):
+        assert resolve_url("https://www.amazon.de/dp/B012345678") is None
+        assert resolve_url("https://www.example.com/dp/B012345678") is None
+
+    def test_ebay_item(self, usd):
+        business = Business.objects.create(ticker="EBAY", name="eBay", desc="")
+        ebay = BusinessUrl.objects.create(business=business, currency=usd, url="https://www.ebay.com/", desc="")
+
+        route = resolve_url("https://www.ebay.com/itm/Some-Item/123456789012")
+
+        assert route.retailer == "ebay"
+        assert route.business_url == ebay
+        assert route.item_id == "123456789012"
+
+    def test_index_is_rebuilt_on_change(self, amazon, usd):
+        assert resolve_url("https://www.amazon.co.uk/dp/B012345678") is None
+
+        BusinessUrl.objects.create(business=amazon.business, currency=usd, url="https://www.amazon.co.uk/", desc="")
+
+        assert resolve_url("https://www.amazon.co.uk/dp/B012345678").item_id == "B012345678"
+
+    def test_resolved_in_memory(self, amazon, django_assert_num_queries):
+        resolve_url("https://www.amazon.com/dp/B012345678")
+
+        with django_assert_num_queries(0):
+            resolve_url("https://www.amazon.com/dp/B087654321")
+
+
+class TestGetProductInfo:
+    @pytest.fixture
+    def scrapes(self, monkeypatch):
+        scrapes = []
+
+        def scrape_product_info(url, businessUrl):
+            scrapes.append(url)
+            return {"productName": "Item", "price": "19.99", "currency": "USD", "url": url, "options": {}}
+
+        monkeypatch.setattr(tasks, "scrape_product_info", scrape_product_info)
+        return scrapes
+
+    @pytest.fixture
+    def published(self, monkeypatch):
+        published = []
+        monkeypatch.setattr(
+            tasks,
+            "enqueue_command_payload",
+            lambda method, data, channel: published.append((channel, data["item"]))
+        )
+        return published
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_same_product_is_scraped_once(self, amazon, scrapes, published):
+        tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first")).get()
+        tasks.get_product_info.apply(args=("https://www.amazon.com/Item/dp/B012345678?th=1", "second")).get()
+
+        assert len(scrapes) == 1
+        assert [channel for channel, item in published] == ["first#first", "second#second"]
+        assert published[1][1]["url"] == "https://www.amazon.com/Item/dp/B012345678?th=1"
+        for channel, item in published:
+            assert verify_item_hash(item.copy())
+
+    def test_other_products_are_scraped(self, amazon, scrapes, published):
+        tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first")).get()
+        tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B087654321", "first")).get()
+
+        assert len(scrapes) == 2
+
+    def test_waits_for_running_scrape(self, amazon, scrapes, published):
+        route = resolve_url("https://www.amazon.com/dp/B012345678")
+        cache.add(f"{tasks.product_info_cache_key(route)}:lock", "other")
+
+        with pytest.raises(Retry):
+            tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first"), throw=True)
+
+        assert scrapes == []
+
+    def test_gives_up_after_the_scrape_timeout(self, amazon, scrapes, published, settings):
+        settings.PRODUCT_INFO_SCRAPE_TIMEOUT = 3
+        route = resolve_url("https://www.amazon.com/dp/B012345678")
+        cache.add(f"{tasks.product_info_cache_key(route)}:lock", "other")
+
+        with pytest.raises(Retry):
+            tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first"), retries=2, throw=True)
+        with pytest.raises(Exception, match="Timed out"):
+            tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first"), retries=3, throw=True)
+
+    def test_lock_taken_over_is_kept(self, amazon, published, monkeypatch):
+        route = resolve_url("https://www.amazon.com/dp/B012345678")
+        lock_key = f"{tasks.product_info_cache_key(route)}:lock"
+
+        def scrape_product_info(url, businessUrl):
+            # The lock expires during the scrape, and another scrape takes it.
+            cache.set(lock_key, "other")
+            return {"productName": "Item", "price": "19.99", "currency": "USD", "url": url, "options": {}}
+
+        monkeypatch.setattr(tasks, "scrape_product_info", scrape_product_info)
+        tasks.get_product_info.apply(args=("https://www.amazon.com/dp/B012345678", "first")).get()
+
+        assert cache.get(lock_key) == "other"
+
+
+class TestUserReputation:
+    @pytest.fixture
+    def users(self):
+        return [
+            User.objects.create(username=username, nickname=username, second_password="x")
+            for username in ["customer", "intermediary", "other"]
+        ]
+
+    def review(self, order, user, author, rating):
+        return OrderReview.objects.create(
+            order=order, user=user, author=author, title="", content="", rating=rating, upvote=0, downvote=0
+        )
+
+    def reputation(self, user):
+        reputation = UserReputation.objects.get(user=user)
+        return reputation.rating_sum, reputation.rating_count, reputation.average_rating
+
+    def test_reviews_are_added(self, order, users):
+        customer, intermediary, _ = users
+        self.review(order, intermediary, customer, Decimal("4"))
+        self.review(order, intermediary, customer, Decimal("5"))
+
+        assert self.reputation(intermediary) == (Decimal("9"), 2, Decimal("4.5"))
+
+    def test_changed_review(self, order, users):
+        customer, intermediary, other = users
+        review = self.review(order, intermediary, customer, Decimal("4"))
+
+        review.rating = Decimal("2")
+        review.save()
+        assert self.reputation(intermediary) == (Decimal("2"), 1, Decimal("2"))
+
+        review.user = other
+        review.save()
+        assert self.reputation(intermediary) == (Decimal("0"), 0, None)
+        assert self.reputation(other) == (Decimal("2"), 1, Decimal("2"))
+
+    def test_deleted_review(self, order, users):
+        customer, intermediary, _ = users
+        self.review(order, intermediary, customer, Decimal("4"))
+        self.review(order, intermediary, customer, Decimal("1")).delete()
+
+        assert self.reputation(intermediary) == (Decimal("4"), 1, Decimal("4"))
+
+    def test_rebuild(self, order, users):
+        customer, intermediary, other = users
+        self.review(order, intermediary, customer, Decimal("4"))
+        self.review(order, other, customer, Decimal("3"))
+        self.review(order, other, customer, Decimal("4"))
+        UserReputation.objects.update(rating_sum=0, rating_count=0, average_rating=None)
+
+        call_command("rebuild_user_reputations", stdout=None)
+
+        assert self.reputation(intermediary) == (Decimal("4"), 1, Decimal("4"))
+        assert self.reputation(other) == (Decimal("7"), 2, Decimal("3.5"))
+
+
+class TestReturnDataForFindingIntermediary:
+    def create_candidates(self, order, count):
+        users = User.objects.bulk_create([
+            User(username=f"intermediary{index}", nickname=f"intermediary{index}", second_password="x")
+            for index in range(count)
+        ])
+        OrderIntermediaryCandidate.objects.bulk_create([
+            OrderIntermediaryCandidate(order=order, user=user, rate=Decimal("0.05")) for user in users
+        ])
+        UserReputation.objects.bulk_create([
+            UserReputation(user=user, rating_sum=index % 5, rating_count=1, average_rating=index % 5)
+            for index, user in enumerate(users)
+        ])
+
+    def test_candidates_with_ratings(self, order):
+        self.create_candidates(order, 3)
+        User.objects.create(username="unrated", nickname="unrated", second_password="x")
+        OrderIntermediaryCandidate.objects.create(
+            order=order, user=User.objects.get(username="unrated"), rate=Decimal("0.1")
+        )
+
+        data = return_data_for_finding_intermediary(order.url_id)
+
+        assert [candidate["user"] for candidate in data["orderintermediarycandidate_set"]] == [
+            {"username": "intermediary0", "average_rating": Decimal("0")},
+            {"username": "intermediary1", "average_rating": Decimal("1")},
+            {"username": "intermediary2", "average_rating": Decimal("2")},
+            {"username": "unrated", "average_rating": None},
+        ]
+        assert data["orderintermediarycandidate_set"][3]["rate"] == "0.100"
+
+    def test_missing_order(self, order_status):
+        assert return_data_for_finding_intermediary("00000000-0000-0000-0000-000000000000") is None
+
+    @pytest.mark.parametrize("count", [10, 500])
+    def test_query_count_of_popular_order(self, order, count):
+        """
+        Benchmark of an order that drew hundreds of applicants.
+        """
+
+        self.create_candidates(order, count)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = return_data_for_finding_intermediary(order.url_id)
+
+        assert len(data["orderintermediarycandidate_set"]) == count
+        assert len(queries) <= 5
+
+
+class TestOrderRetrieveView:
+    @pytest.fixture
+    def viewer(self):
+        return User.objects.create(username="viewer", nickname="viewer", second_password="x")
+
+    def retrieve(self, viewer, order, **headers):
+        request = APIRequestFactory().get("/", **headers)
+        force_authenticate(request, user=viewer)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = OrderRetrieveView.as_view()(request, pk=order.url_id)
+
+        return response, len(queries)
+
+    def test_finding_intermediary(self, viewer, order):
+        response, _ = self.retrieve(viewer, order)
+
+        assert response.status_code == 200
+        assert response["ETag"]
+        assert response.data["orderintermediarycandidate_set"] == []
+
+    def test_deposit_status(self, viewer, order):
+        order.status = OrderStatus.objects.create(name="waiting-deposit", step=2, desc="")
+        order.save()
+
+        response, _ = self.retrieve(viewer, order)
+
+        assert response.status_code == 200
+        assert "orderintermediarycandidate_set" in response.data
+        assert "additional_request" in response.data
+
+    def test_not_modified(self, viewer, order):
+        response, _ = self.retrieve(viewer, order)
+
+        polled, queries = self.retrieve(viewer, order, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        assert polled.status_code == 304
+        assert polled["ETag"] == response["ETag"]
+        assert queries == 1
+
+    def test_new_candidate_changes_etag(self, viewer, order):
+        response, _ = self.retrieve(viewer, order)
+        OrderIntermediaryCandidate.objects.create(order=order, user=viewer, rate=Decimal("0.05"))
+
+        polled, _ = self.retrieve(viewer, order, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        assert polled.status_code == 200
+        assert polled["ETag"] != response["ETag"]
+        assert len(polled.data["orderintermediarycandidate_set"]) == 1
+
+
+class TestListUserOrderView:
+    @pytest.fixture
+    def customer(self):
+        return User.objects.create(username="customer", nickname="customer", second_password="x")
+
+    @pytest.fixture
+    def constructed(self, monkeypatch):
+        constructed = []
+        init = BaseSerializer.__init__
+
+        def counting_init(serializer, *args, **kwargs):
+            constructed.append(type(serializer).__name__)
+            init(serializer, *args, **kwargs)
+
+        monkeypatch.setattr(BaseSerializer, "__init__", counting_init)
+        return constructed
+
+    def create_orders(self, customer, order_status, amazon, count):
+        for _ in range(count):
+            order = Order.objects.create(status=order_status)
+            OrderCustomerLink.objects.create(order=order, customer=customer)
+            add_order_items(order, make_cart(3))
+
+    def list_orders(self, customer):
+        request = APIRequestFactory().get("/", {"page": 1, "for": "customer"})
+        force_authenticate(request, user=customer)
+        return ListUserOrderView.as_view()(request)
+
+    def test_lists_orders(self, customer, order_status, amazon):
+        self.create_orders(customer, order_status, amazon, 2)
+
+        response = self.list_orders(customer)
+
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 2
+        assert response.data["results"][0]["customer"] == {"customer": {"username": "customer"}}
+        assert response.data["results"][0]["order_items"] == [{"name": f"Item {index}"} for index in range(3)]
+
+    def serialize_orders(self):
+        return OrderSerializer(
+            Order.objects.all(),
+            many=True,
+            fields=ORDER_LIST_FIELDS["customer"],
+            context=ORDER_LIST_CONTEXTS["customer"],
+        ).data
+
+    def test_serializers_are_reused_across_rows(self, customer, order_status, amazon, constructed):
+        """
+        Serializing a full page of 20 orders with OrderSerializer, as the view did before
+        it used a read model, constructs as many serializers as a single order does.
+        """
+
+        self.create_orders(customer, order_status, amazon, 1)
+        self.serialize_orders()
+        constructed.clear()
+        self.serialize_orders()
+        single_row = len(constructed)
+
+        self.create_orders(customer, order_status, amazon, 19)
+        constructed.clear()
+        self.serialize_orders()
+
+        assert len(constructed) == single_row
+
+    @pytest.mark.benchmark
+    def test_serializing_time_per_row(self, customer, order_status, amazon):
+        self.create_orders(customer, order_status, amazon, 1)
+        self.serialize_orders()
+        start = time.perf_counter()
+        self.serialize_orders()
+        single_row = time.perf_counter() - start
+
+        self.create_orders(customer, order_status, amazon, 19)
+        start = time.perf_counter()
+        self.serialize_orders()
+        per_row = (time.perf_counter() - start) / 20
+
+        assert per_row < single_row, (
+            f"20 orders: {per_row * 1000:.2f}ms per row, 1 order: {single_row * 1000:.2f}ms"
+        )
+
+    def test_read_model_constructs_no_serializers(self, customer, order_status, amazon, constructed):
+        self.create_orders(customer, order_status, amazon, 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.list_orders(customer)
+
+        # The page and its items, as the count isn't asked for
+        assert len(queries) == 2
+        assert constructed == []
+
+
+# The arguments ListUserOrderView used to pass to OrderSerializer, by "for".
+ORDER_LIST_FIELDS = {
+    "all": ["status", "customer", "intermediary", "order_items", "url_id", "created_at"],
+    "customer": ["status", "customer", "order_items", "url_id", "created_at"],
+    "intermediary": ["status", "intermediary", "order_items", "url_id", "created_at"],
+}
+ORDER_LIST_CONTEXTS = {
+    "all": {
+        "intermediary": {"fields": ["username"]},
+        "customer": {"fields": ["username"]},
+        "order_items": {"fields": ["name"]},
+    },
+    "customer": {"customer": {"fields": ["username"]}, "order_items": {"fields": ["name"]}},
+    "intermediary": {"intermediary": {"fields": ["username"]}, "order_items": {"fields": ["name"]}},
+}
+ORDER_LIST_READ_MODELS = {
+    "all": USER_ORDER_LIST,
+    "customer": CUSTOMER_ORDER_LIST,
+    "intermediary": INTERMEDIARY_ORDER_LIST,
+}
+
+
+def as_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+class TestOrderListReadModels:
+    @pytest.fixture
+    def orders(self, order_status, amazon):
+        customer = User.objects.create(username="customer", nickname="customer", second_password="x")
+        intermediary = User.objects.create(username="intermediary", nickname="intermediary", second_password="x")
+
+        # An order with an intermediary, one without, and one without items or a customer
+        orders = [Order.objects.create(status=order_status) for _ in range(3)]
+        OrderCustomerLink.objects.create(order=orders[0], customer=customer)
+        OrderCustomerLink.objects.create(order=orders[1], customer=customer)
+        OrderIntermediaryLink.objects.create(order=orders[0], intermediary=intermediary)
+        add_order_items(orders[0], make_cart(3))
+        add_order_items(orders[1], make_cart(1))
+
+        return Order.objects.order_by("id")
+
+    @pytest.mark.parametrize("target", ["all", "customer", "intermediary"])
+    def test_same_output_as_order_serializer(self, orders, target):
+        expected = OrderSerializer(
+            orders, many=True, fields=ORDER_LIST_FIELDS[target], context=ORDER_LIST_CONTEXTS[target]
+        ).data
+
+        data = ORDER_LIST_READ_MODELS[target].serialize(orders)
+
+        assert as_json(data) == as_json(expected)
+
+    def test_missing_links_are_none(self, orders):
+        data = USER_ORDER_LIST.serialize(orders)
+
+        assert data[1]["intermediary"] is None
+        assert data[2]["customer"] is None
+        assert data[2]["order_items"] == []
+
+    def customer_orders(self, order_status, count):
+        customer = User.objects.create(username="customer", nickname="customer", second_password="x")
+        for _ in range(count):
+            order = Order.objects.create(status=order_status)
+            OrderCustomerLink.objects.create(order=order, customer=customer)
+            add_order_items(order, make_cart(3))
+
+        return Order.objects.select_related("status", "ordercustomerlink__customer").prefetch_related("order_items")
+
+    def serialize_orders(self, orders):
+        return OrderSerializer(
+            orders, many=True, fields=ORDER_LIST_FIELDS["customer"], context=ORDER_LIST_CONTEXTS["customer"]
+        ).data
+
+    @pytest.mark.parametrize("count", [20, 200])
+    def test_query_count(self, order_status, amazon, count):
+        orders = self.customer_orders(order_status, count)
+
+        with CaptureQueriesContext(connection) as serializer_queries:
+            expected = self.serialize_orders(orders)
+        with CaptureQueriesContext(connection) as read_model_queries:
+            data = CUSTOMER_ORDER_LIST.serialize(orders)
+
+        assert as_json(data) == as_json(expected)
+        assert len(read_model_queries) == 2
+        assert len(read_model_queries) <= len(serializer_queries)
+
+    @pytest.mark.benchmark
+    @pytest.mark.parametrize("count", [20, 200])
+    def test_throughput(self, order_status, amazon, count):
+        """
+        Benchmark of a page of orders with OrderSerializer and with the read model.
+        """
+
+        orders = self.customer_orders(order_status, count)
+
+        start = time.perf_counter()
+        self.serialize_orders(orders)
+        serializer_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        CUSTOMER_ORDER_LIST.serialize(orders)
+        read_model_elapsed = time.perf_counter() - start
+
+        assert read_model_elapsed < serializer_elapsed, (
+            f"{count} orders: OrderSerializer {serializer_elapsed * 1000:.1f}ms, "
+            f"read model {read_model_elapsed * 1000:.1f}ms"
+        )
+
+
+@pytest.mark.skipif(not supports_plans(), reason="Query plans are only checked on PostgreSQL.")
+class TestOrderListQueryPlans:
+    @pytest.fixture
+    def user(self, order_status):
+        user = User.objects.create(username="customer", nickname="customer", second_password="x")
+        order = Order.objects.create(status=order_status)
+        OrderCustomerLink.objects.create(order=order, customer=user)
+        return user
+
+    def test_orders_of_customer(self, user):
+        orders = Order.objects.filter(ordercustomerlink__customer__username=user.username)
+
+        assert_uses_indexes(
+            CUSTOMER_ORDER_LIST.values(orders, "created_at", "id").order_by("-created_at", "-id")[:21],
+            ["orders_ordercustomerlink", "users_user"]
+        )
+
+    def test_orders_of_intermediary(self, user):
+        orders = Order.objects.filter(orderintermediarylink__intermediary__username=user.username)
+
+        assert_uses_indexes(
+            INTERMEDIARY_ORDER_LIST.values(orders, "created_at", "id").order_by("-created_at", "-id")[:21],
+            ["orders_orderintermediarylink", "users_user"]
+        )
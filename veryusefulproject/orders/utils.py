@@ -3,24 +3,28 @@ import re
 import json
 from hashlib import blake2b
 
-from veryusefulproject.currencies.models import FiatCurrency
-from veryusefulproject.orders.models import BusinessUrl, OrderItem, OrderItemSeller, Order, OrderIntermediaryCandidate, OrderAddress, OrderIntermediaryLink, OrderStatus
-from veryusefulproject.orders.api.serializers import OrderSerializer
+from veryusefulproject.currencies.reference import get_fiat_currency
+from veryusefulproject.orders.models import OrderItem, OrderItemSeller, Order, OrderIntermediaryCandidate, OrderAddress, OrderIntermediaryLink
+from veryusefulproject.orders.api.serializers import OrderIntermediaryCandidateSerializer, OrderSerializer
+from veryusefulproject.orders.reference import get_order_status
+from veryusefulproject.orders.routing import (
+    AMAZON_LINK_REGEX,
+    EBAY_LINK_REGEX,
+    find_business_url,
+    hostname_of,
+    resolve_url,
+)
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Avg, Prefetch
+from django.utils import timezone
 from django.utils.html import escape
 
 from rest_framework import status
 from rest_framework.response import Response
 
-AMAZON_LINK_REGEX = "^(?:https?://)?(?:[a-zA-Z0-9\-]+\.)?(?:amazon|amzn){1}\.(com\.au|" \
-        "com|co\.uk|co\.jp|de|fr|es|in)\/(gp/(?:product|offer-listing|customer-media/" \
-        "product-gallery)/|exec/obidos/tg/detail/-/|o/ASIN/|dp/|(?:[A-Za-z0-9\-]+)/dp/" \
-        ")?(?P<ASIN>[0-9A-Za-z]{10})"
-EBAY_LINK_REGEX = "(ebay\.com\/itm\/\d+)"
+AMAZON_DOMAIN_REGEX = re.compile(r"(?:amazon|amzn){1}\.(com\.au|com|co\.uk|co\.jp|de|fr|es|in)")
 SECRET_KEY_PART = settings.SECRET_KEY[:64].encode("utf-8")
 
 User = get_user_model()
@@ -40,44 +44,98 @@ def add_order_item(order, item):
         image_url=item['imageurl'],
         name=item["productName"],
         quantity=item['amount'],
-        currency=FiatCurrency.objects.get(ticker="USD"),
+        currency=get_fiat_currency("USD"),
         price=Decimal(item['price_in_dollar']) if 'price_in_dollar' in item else Decimal(item['price']),
         url=item['url'],
         options=extract_selected_options(item['options'])
     )
 
 
+def add_order_items(order, items):
+    """
+    Creates all the items of an order at once. Business URLs and the currency are 
+    resolved in memory, the sellers are resolved once for the whole batch, and the 
+    items are written with a single INSERT. Item hashes must have been verified 
+    beforehand.
+    """
+
+    item_business_urls = []
+    for item in items:
+        businessUrl = check_if_valid_url(item['url'])
+        if not businessUrl:
+            raise Exception("There is no business with that domain name.")
+        item_business_urls.append(businessUrl)
+
+    sellers = get_or_create_sellers(set(item["brand"] for item in items))
+    currency = get_fiat_currency("USD")
+
+    return OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            website_domain=business_url,
+            seller=sellers[item["brand"]],
+            image_url=item['imageurl'],
+            name=item["productName"],
+            quantity=item['amount'],
+            currency=currency,
+            price=Decimal(item['price_in_dollar']) if 'price_in_dollar' in item else Decimal(item['price']),
+            url=item['url'],
+            options=extract_selected_options(item['options'])
+        )
+        for item, business_url in zip(items, item_business_urls)
+    ])
+
+
+def get_or_create_sellers(names):
+    """
+    Returns a dict of sellers keyed by their names, creating the ones that don't exist 
+    yet with a single INSERT.
+    """
+
+    sellers = {}
+    for seller in OrderItemSeller.objects.filter(name__in=names).order_by("id"):
+        sellers.setdefault(seller.name, seller)
+
+    missing = [OrderItemSeller(name=name) for name in names if name not in sellers]
+    for seller in OrderItemSeller.objects.bulk_create(missing):
+        sellers[seller.name] = seller
+
+    return sellers
+
+
 def check_if_valid_url(url):
-    if check_if_amazon_url(url):
-        try:
-            businessURL = get_businessUrl_amazon(url)
-            return businessURL
-        except Exception as e:
-            print(e)
+    route = resolve_url(url)
+    if route:
+        return route.business_url
 
     return None
 
 
 def check_if_amazon_url(url):
-    result = re.search(AMAZON_LINK_REGEX, url)
+    result = AMAZON_LINK_REGEX.search(url)
     if result:
         return result.group()
 
     return None
 
 
-def get_businessUrl_amazon(url):
-    regex = "(?:amazon|amzn){1}\.(com\.au|com|co\.uk|co\.jp|de|fr|es|in)"
-    result = re.search(regex, url)
+def get_domain_amazon(url):
+    result = AMAZON_DOMAIN_REGEX.search(url)
     if result:
-        return BusinessUrl.objects.select_related("currency").filter(
-            url__contains=result.group()).order_by("-currency__ticker").first()
+        return result.group()
+
+    return None
+
+
+def get_businessUrl_amazon(url):
+    if get_domain_amazon(url):
+        return find_business_url(hostname_of(url))
 
     return None
 
 
 def check_if_ebay_url(url):
-    result = re.search(EBAY_LINK_REGEX, url)
+    result = EBAY_LINK_REGEX.search(url)
     if not result:
         return ""
 
@@ -135,6 +193,15 @@ def verify_item_hash(data):
         return False
 
 
+def touch_order(order_id, using=None):
+    """
+    Marks an order as modified after a change to one of the rows shown with it, so that
+    the ETag of its detail changes too.
+    """
+
+    Order.objects.using(using).filter(pk=order_id).update(modified_at=timezone.now())
+
+
 def escape_xss_characters(string):
     return escape(string)
 
@@ -164,27 +231,22 @@ def return_data_for_finding_intermediary(order_id):
         "orderpaymentlink__payment__additional_cost",
     ]
 
-    order_qs = Order.objects.prefetch_related(
+    order = Order.objects.prefetch_related(
         "order_items",
-        Prefetch(
-            "orderintermediarycandidate_set",
-            queryset=OrderIntermediaryCandidate.objects.select_related("user").filter(
-                order__url_id=order_id).only("user", "user__username"),
-            to_attr="intermediary_candidates"
-        )
+        "orderpaymentlink__payment__payment_methods",
     ).select_related(
         "orderaddresslink__address",
         "orderpaymentlink__payment",
         "status"
     ).filter(
         url_id=order_id
-    ).only(*only_fields)
+    ).only(*only_fields).first()
 
-    if not order_qs.exists():
+    if order is None:
         return None
 
     serializer = OrderSerializer(
-        order_qs.first(),
+        order,
         fields=[
             "status", 
             "order_items", 
@@ -192,7 +254,6 @@ def return_data_for_finding_intermediary(order_id):
             "address", 
             "url_id", 
             "created_at", 
-            "orderintermediarycandidate_set", 
             "additional_request"
         ],
         context={
@@ -216,29 +277,36 @@ def return_data_for_finding_intermediary(order_id):
             },
             "payment_methods": {"fields": ["ticker", "cryptocurrencyrate_set"]},
             "cryptocurrencyrate_set": {
-                "created_at": order_qs.first().created_at, "fields": ["rate"]
+                "created_at": order.created_at, "fields": ["rate"]
             },
-            "orderintermediarycandidate_set": {"fields": ["user", "rate"]},
-            "user": {"fields": ["username"]}
         }
     )
-
     data = serializer.data
-    
-    ## Query a list of intermediaries and each of its average ratings
-    intermediaries = [intermediary['user']['username'] 
-        for intermediary in serializer.data["orderintermediarycandidate_set"]
+
+    ## Query the intermediaries together with their average ratings
+    candidates = list(
+        OrderIntermediaryCandidate.objects.filter(order=order).select_related(
+            "user__reputation"
+        ).only(
+            "rate", "user__username", "user__reputation__average_rating"
+        ).order_by("id")
+    )
+    # Serializing hundreds of candidates one by one is slow, so only their rate is
+    # formatted by the serializer field.
+    rate_field = OrderIntermediaryCandidateSerializer(fields=["rate"]).fields["rate"]
+    candidate_data = [
+        {
+            "user": {
+                "username": candidate.user.username,
+                "average_rating": getattr(getattr(candidate.user, "reputation", None), "average_rating", None),
+            },
+            "rate": rate_field.to_representation(candidate.rate),
+        }
+        for candidate in candidates
     ]
-    users = User.objects.annotate(
-        avg_rating=Avg("order_review_user__rating")
-    ).filter(username__in=intermediaries).only("username")
-    
-    for each in users:
-        for index in range(len(data['orderintermediarycandidate_set'])):
-            if data['orderintermediarycandidate_set'][index]['user']['username'] == each.username:
-                data['orderintermediarycandidate_set'][index]['user']['average_rating'] = each.avg_rating
-                break
-                  
+
+    data["orderintermediarycandidate_set"] = candidate_data
+
     return data 
 
 
@@ -257,19 +325,24 @@ def return_data_for_deposit_status(order_id):
         "orderpaymentlink__payment__created_at",
         "orderpaymentlink__payment__modified_at",
     ]
-    order_qs = Order.objects.prefetch_related("order_items").select_related(
+    order = Order.objects.prefetch_related(
+        "order_items",
+        "orderpaymentlink__payment__payment_methods",
+        "orderpaymentlink__payment__orderpaymentinvoice_set",
+        "orderintermediarycandidate_set__user",
+    ).select_related(
         "orderaddresslink__address", 
         "orderpaymentlink__payment",
         "status"
     ).filter(
         url_id=order_id
-    ).defer(*deferred_fields)
+    ).defer(*deferred_fields).first()
 
-    if not order_qs.exists():
+    if order is None:
         return {}
 
     serializer = OrderSerializer(
-        order_qs.first(),
+        order,
         fields_exclude=[
             "customer",
             "intermediary",
@@ -292,7 +365,7 @@ def return_data_for_deposit_status(order_id):
             "invoice": {"fields": ["invoice_id"]},
             "payment_methods": {"fields": ["ticker", "name", "cryptocurrencyrate_set"]},
             "cryptocurrencyrate_set": {
-                "created_at": order_qs.first().created_at, 
+                "created_at": order.created_at, 
                 "fields": ["rate"]
             }
         }
@@ -331,6 +404,8 @@ def update_order_additional_info(order, data):
                 data["address"][key] = escape_xss_characters(data["address"][key])
 
             OrderAddress.objects.filter(id=order.orderaddresslink.address.id).update(**data["address"])
+            # Updating the address in place doesn't send post_save.
+            touch_order(order.pk)
 
     return Response(
         status=status.HTTP_200_OK, 
@@ -378,7 +453,7 @@ def update_order_intermediary(order, data):
                 }
             )
 
-        order.status = OrderStatus.objects.get(step=order.status.step+1)
+        order.status = get_order_status(order.status.step+1)
         order.save()
 
         data = return_data_for_deposit_status(order.url_id)
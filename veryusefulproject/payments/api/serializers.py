@@ -22,11 +22,16 @@ class OrderPaymentSerializer(DynamicFieldsSerializerMixin, serializers.ModelSeri
 
     def get_payment_methods(self, obj):
         context = self.context.get("payment_methods", {})
-        serializer = CryptoCurrencySerializer(obj.payment_methods.all(), many=True, context=self.context, **context)
-        return serializer.data
+        return self.serialize_nested(
+            CryptoCurrencySerializer, obj.payment_methods.all(), many=True, context=self.context, **context
+        )
 
     def get_orderpaymentinvoice_set(self, obj):
         context = self.context.get("invoice", {})
-        serializer = OrderPaymentInvoiceSerializer(obj.orderpaymentinvoice_set.all(), many=True, context=self.context, **context)
-
-        return serializer.data
+        return self.serialize_nested(
+            OrderPaymentInvoiceSerializer,
+            obj.orderpaymentinvoice_set.all(),
+            many=True,
+            context=self.context,
+            **context,
+        )
@@ -1,5 +1,5 @@
-from veryusefulproject.core.paginations import BasicPagination
+from veryusefulproject.core.paginations import KeysetPagination
 
 
-class RequestsListPagination(BasicPagination):
+class RequestsListPagination(KeysetPagination):
     page_size = 10
@@ -1,5 +1,4 @@
 from decimal import Decimal
-from django.db.models import Q, Prefetch, Avg
 from django.forms.models import ValidationError
 from rest_framework import status
 from rest_framework.generics import CreateAPIView
@@ -11,12 +10,13 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
 from veryusefulproject.core.mixins import PaginationHandlerMixin
-from veryusefulproject.currencies.utils import get_orders_cryptocurrency_rate
-from veryusefulproject.orders.models import Order, OrderIntermediaryCandidate, OrderItem, OrderReview
-from veryusefulproject.orders.api.serializers import OrderSerializer, OrderIntermediaryCandidateSerializer
+from veryusefulproject.currencies.history import crypto_rate_history
+from veryusefulproject.orders.models import Order, OrderIntermediaryCandidate
+from veryusefulproject.orders.api.serializers import OrderIntermediaryCandidateSerializer
 from veryusefulproject.users.api.authentication import JWTAuthentication
 
 from .paginations import RequestsListPagination
+from ..read_models import AVAILABLE_OFFER_LIST
 
 
 class SignUpOrderIntermediaryApplicantView(CreateAPIView):
@@ -100,111 +100,35 @@ class SignUpOrderIntermediaryApplicantView(CreateAPIView):
 class DisplayAvailableOffersView(PaginationHandlerMixin, APIView):
     authentication_classes = [JWTAuthentication]
     pagination_class = RequestsListPagination
-    serializer_class = OrderSerializer
 
     @ method_decorator(cache_page(30))
     def get(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
-        only_fields = [
-            "url_id",
-            "created_at",
-            "orderaddresslink__address__country",
-            "ordercustomerlink__customer__username",
-            "ordercustomerlink__customer__date_joined",
-            "orderpaymentlink__payment__additional_cost",
-            "orderpaymentlink__payment__fiat_currency__symbol",
-            "orderpaymentlink__payment__fiat_currency__ticker"
-        ]
+        queryset = Order.objects.filter(status__step=1).order_by("-created_at")
 
-        username = request.user.get_username()
+        # Orders are read as plain rows, along with the average rating of their customers.
+        rows = AVAILABLE_OFFER_LIST.values(queryset, *self.paginator.key_fields)
+        page = self.paginate_queryset(rows)
+        results = AVAILABLE_OFFER_LIST.render(page if page is not None else rows)
 
-        queryset = Order.objects.select_related(
-            "orderaddresslink__address",
-            "ordercustomerlink__customer",
-            "orderpaymentlink__payment__fiat_currency",
-        ).prefetch_related(
-            Prefetch(
-                "order_items",
-                queryset=OrderItem.objects.all().only("name", "price")
-            )
-        ).only(*only_fields).filter(status__step=1).order_by("-created_at")
-        """
-        queryset = Order.objects.select_related(
-            "orderaddresslink__address",
-            "ordercustomerlink__customer",
-            "orderpaymentlink__payment__fiat_currency",
-            "orderpaymentlink__payment__order_payment_balance__payment_method",
-        ).prefetch_related(
-            Prefetch(
-                "order_reviews",
-                queryset=OrderReview.objects.select_related("user").all().only("rating")
-            ),
-            Prefetch(
-                "order_items",
-                queryset=OrderItem.objects.select_related("company").all().only("name", "price")
-            )
-        ).exclude(
-            Q(ordercustomerlink__customer__username=username) |
-            Q(orderintermediarylink__intermediary__username__regex=r"^[\w]+")
-        ).only(*only_fields)
-        """
-
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_paginated_response(
-                self.serializer_class(
-                    page,
-                    many=True,
-                    fields=["address", "customer", "order_items", "payment", "url_id", "created_at"],
-                    context={
-                        "customer": {"fields": ["username", "date_joined"]},
-                        "address": {"fields": ["country"]},
-                        "payment": {"fields": ["additional_cost", "fiat_currency", "payment_methods"]},
-                        "payment_methods": {"fields": ["name", "ticker"]},
-                        "order_items": {"fields": ["name", "price", "image_url", "options", "quantity", "url"]},
-                    }
-                ).data
-            )
-        else:
-            serializer = self.serializer_class(
-                queryset,
-                many=True,
-                fields=["address", "customer", "order_items", "payment", "url_id", "created_at"],
-                context={
-                    "customer": {"fields": ["username", "date_joined"]},
-                    "address": {"fields": ["country"]},
-                    "payment": {"fields": ["additional_cost", "fiat_currency", "payment_methods"]},
-                    "payment_methods": {"fields": ["name", "ticker"]},
-                    "order_items": {"fields": ["name", "price", "image_url", "options", "quantity", "url"]},
-                }
+        # Look up the rate of Cryptocurrency at the time of the creation of every order at once
+        paid = [
+            x for x in range(len(results))
+            if results[x]["payment"] and results[x]["payment"]["payment"]["payment_methods"]
+        ]
+        rates = crypto_rate_history.rates_at([
+            (results[x]["payment"]["payment"]["payment_methods"][0]["ticker"], results[x]["created_at"])
+            for x in paid
+        ])
+        for x, rate in zip(paid, rates):
+            results[x]["payment"]["payment"]["payment_methods"][0]["rate"] = (
+                float(rate) if rate is not None else None
             )
 
-        data = serializer.data
-        results = list(data['results'])
-
-        # Complie a list of average rating of every customer so far since its registration in a page
-        user_ratings = {}
-        users = set([order["customer"]["customer"]["username"] for order in results if order.get("customer")])
-
-        # iterate over a set of users and calculate the average rating of each user
-        for user in users:
-            user_avg_rating = OrderReview.objects.filter(user__username=user).aggregate(Avg("rating"))["rating__avg"]
-            user_ratings[user] = user_avg_rating
-
-        for x in range(len(results)):
-            # Assign the rate of Cryptocurrency at the time of the creation of an order
-            if results[x].get("payment", None):
-                cryptocurrency_ticker = results[x]["payment"]["payment"]["payment_methods"][0]["ticker"]
-                serialized_datetime = results[x]["created_at"]
-
-                data["results"][x]["payment"]["payment"]["payment_methods"][0]["rate"] = get_orders_cryptocurrency_rate(
-                    serialized_datetime, cryptocurrency_ticker)
-
-            # Assign the average rating to every order of a customer
-            if data['results'][x]['customer']:
-                username = data['results'][x]['customer']['customer']['username']
-                data['results'][x]['customer']['customer']['average_rating'] = user_ratings[username]
+        if page is None:
+            return Response(status=status.HTTP_200_OK, data=results)
 
+        data = self.get_paginated_response(results).data
         return Response(status=status.HTTP_200_OK, data=data)
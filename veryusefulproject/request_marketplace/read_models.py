@@ -0,0 +1,34 @@
+from veryusefulproject.core.read_models import Column, Group, ReadModel, Related
+from veryusefulproject.orders.models import Order
+
+# Same shape as OrderSerializer with the contexts that DisplayAvailableOffersView used to
+# pass, plus the average rating of the customer, which is read with the same query.
+AVAILABLE_OFFER_LIST = ReadModel(Order, {
+    "address": Group({
+        "address": Group({"country": "country"}, relation="address"),
+    }, relation="orderaddresslink"),
+    "customer": Group({
+        "customer": Group({
+            "username": "username",
+            "date_joined": "date_joined",
+            "average_rating": Column("reputation__average_rating", raw=True),
+        }, relation="customer"),
+    }, relation="ordercustomerlink"),
+    "order_items": Related("order_items", {
+        "name": "name",
+        "price": "price",
+        "image_url": "image_url",
+        "options": "options",
+        "quantity": "quantity",
+        "url": "url",
+    }),
+    "payment": Group({
+        "payment": Group({
+            "additional_cost": "additional_cost",
+            "fiat_currency": "fiat_currency",
+            "payment_methods": Related("payment_methods", {"name": "name", "ticker": "ticker"}),
+        }, relation="payment"),
+    }, relation="orderpaymentlink"),
+    "url_id": "url_id",
+    "created_at": "created_at",
+})
@@ -1,3 +1,221 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import json
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from veryusefulproject.core.query_plans import assert_uses_indexes, supports_plans
+from veryusefulproject.currencies.models import CryptoCurrency, CryptoCurrencyRate, FiatCurrency
+from veryusefulproject.orders.models import (
+    Order,
+    OrderAddress,
+    OrderAddressLink,
+    OrderCustomerLink,
+    OrderPaymentLink,
+    OrderReview,
+    OrderStatus,
+    UserReputation,
+)
+from veryusefulproject.orders.api.serializers import OrderSerializer
+from veryusefulproject.payments.models import OrderPayment
+from veryusefulproject.request_marketplace.api.paginations import RequestsListPagination
+from veryusefulproject.request_marketplace.api.views import DisplayAvailableOffersView
+from veryusefulproject.request_marketplace.read_models import AVAILABLE_OFFER_LIST
+
+pytestmark = pytest.mark.django_db
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The listing is cached per URL for 30 seconds.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def market():
+    usd = FiatCurrency.objects.create(ticker="USD", name="Dollar", desc="")
+    btc = CryptoCurrency.objects.create(ticker="BTC", name="Bitcoin", desc="")
+    rate = CryptoCurrencyRate.objects.create(cryptocurrency=btc, fiat_currency=usd, rate=Decimal("20000"))
+    CryptoCurrencyRate.objects.filter(id=rate.id).update(created_at=timezone.now() - timedelta(days=1))
+    status = OrderStatus.objects.create(name="finding-intermediary", step=1, desc="")
+    return usd, btc, status
+
+
+def create_user(username):
+    return User.objects.create(username=username, nickname=username, second_password="x")
+
+
+def create_orders(market, count):
+    usd, btc, status = market
+    start = Order.objects.count()
+    for index in range(start, start + count):
+        customer = create_user(f"customer{index}")
+        order = Order.objects.create(status=status)
+        OrderCustomerLink.objects.create(order=order, customer=customer)
+        address = OrderAddress.objects.create(
+            name="Name", address1="Street", city="City", state="State", zipcode="00000", country="Country"
+        )
+        OrderAddressLink.objects.create(order=order, address=address)
+        payment = OrderPayment.objects.create(fiat_currency=usd)
+        payment.payment_methods.add(btc)
+        OrderPaymentLink.objects.create(order=order, payment=payment)
+        OrderReview.objects.create(
+            order=order, user=customer, author=customer, title="", content="", rating=Decimal(4), upvote=0, downvote=0
+        )
+
+
+def list_offers():
+    viewer = User.objects.filter(username="viewer").first() or create_user("viewer")
+    request = APIRequestFactory().get("/", {"page": 1})
+    force_authenticate(request, user=viewer)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = DisplayAvailableOffersView.as_view()(request)
+
+    return response, len(queries)
+
+
+class TestDisplayAvailableOffersView:
+    def test_rates_and_ratings(self, market):
+        create_orders(market, 2)
+
+        response, _ = list_offers()
+
+        assert response.status_code == 200
+        for order in response.data["results"]:
+            assert order["payment"]["payment"]["payment_methods"][0]["rate"] == 20000.0
+            assert order["customer"]["customer"]["average_rating"] == Decimal(4)
+
+    def test_query_count_does_not_grow_with_the_page(self, market):
+        create_orders(market, 2)
+        list_offers()
+        _, small_page = list_offers()
+
+        cache.clear()
+        create_orders(market, 10)
+        _, full_page = list_offers()
+
+        assert full_page == small_page
+
+
+def serialize_offers(orders):
+    """
+    Serializes orders the way DisplayAvailableOffersView did before it used a read model.
+    """
+
+    data = OrderSerializer(
+        orders,
+        many=True,
+        fields=["address", "customer", "order_items", "payment", "url_id", "created_at"],
+        context={
+            "customer": {"fields": ["username", "date_joined"]},
+            "address": {"fields": ["country"]},
+            "payment": {"fields": ["additional_cost", "fiat_currency", "payment_methods"]},
+            "payment_methods": {"fields": ["name", "ticker"]},
+            "order_items": {"fields": ["name", "price", "image_url", "options", "quantity", "url"]},
+        }
+    ).data
+
+    ratings = dict(UserReputation.objects.values_list("user__username", "average_rating"))
+    for order in data:
+        if order["customer"]:
+            customer = order["customer"]["customer"]
+            customer["average_rating"] = ratings.get(customer["username"])
+
+    return data
+
+
+def as_json(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+class TestAvailableOfferListReadModel:
+    def test_same_output_as_order_serializer(self, market):
+        create_orders(market, 3)
+        # An order nobody has paid for or given an address yet
+        Order.objects.create(status=market[2])
+        orders = Order.objects.order_by("-created_at", "-id")
+
+        assert as_json(AVAILABLE_OFFER_LIST.serialize(orders)) == as_json(serialize_offers(orders))
+
+    def offers(self, market):
+        create_orders(market, 20)
+        return Order.objects.select_related(
+            "orderaddresslink__address",
+            "ordercustomerlink__customer",
+            "orderpaymentlink__payment",
+        ).prefetch_related("order_items", "orderpaymentlink__payment__payment_methods").order_by("-created_at")
+
+    def test_query_count(self, market):
+        orders = self.offers(market)
+
+        with CaptureQueriesContext(connection) as serializer_queries:
+            serialize_offers(orders)
+        with CaptureQueriesContext(connection) as read_model_queries:
+            AVAILABLE_OFFER_LIST.serialize(orders)
+
+        assert len(read_model_queries) == 3
+        assert len(read_model_queries) <= len(serializer_queries)
+
+    @pytest.mark.benchmark
+    def test_throughput(self, market):
+        """
+        Benchmark of a page of 20 offers with OrderSerializer and with the read model.
+        """
+
+        orders = self.offers(market)
+
+        start = time.perf_counter()
+        serialize_offers(orders)
+        serializer_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        AVAILABLE_OFFER_LIST.serialize(orders)
+        read_model_elapsed = time.perf_counter() - start
+
+        assert read_model_elapsed < serializer_elapsed, (
+            f"20 offers: OrderSerializer {serializer_elapsed * 1000:.1f}ms, "
+            f"read model {read_model_elapsed * 1000:.1f}ms"
+        )
+
+
+def open_orders_page(position=None):
+    """
+    The query of a page of DisplayAvailableOffersView.
+    """
+
+    pagination = RequestsListPagination()
+    queryset = AVAILABLE_OFFER_LIST.values(
+        Order.objects.filter(status__step=1), *pagination.key_fields
+    ).order_by("-created_at", "-id")
+    if position is not None:
+        queryset = queryset.filter(pagination.beyond(position, False))
+
+    return queryset[:pagination.page_size + 1]
+
+
+@pytest.mark.skipif(not supports_plans(), reason="Query plans are only checked on PostgreSQL.")
+class TestOpenOrdersQueryPlan:
+    def test_first_page(self, market):
+        create_orders(market, 2)
+
+        assert_uses_indexes(open_orders_page(), ["orders_order"])
+
+    def test_later_page(self, market):
+        create_orders(market, 2)
+        last = Order.objects.order_by("created_at", "id").first()
+
+        assert_uses_indexes(open_orders_page((last.created_at, last.id)), ["orders_order"])